@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_user_id, get_user_today
+from app.core.metrics import InstrumentedRoute
+from app.db.session import DBSession, read_db_dependency, run_db
+from app.schemas.analytics import (
+    HeatmapResponse,
+    HistogramResponse,
+    MoodBreakdownResponse,
+    RollingResponse,
+)
+from app.services.analytics import (
+    column_store,
+    daily_series,
+    histogram,
+    mood_breakdown,
+    rolling_mean,
+    weekday_hour_heatmap,
+)
+
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=InstrumentedRoute)
+
+# Default look-back when no range is given, and the longest range accepted.
+DEFAULT_RANGE_DAYS = 365
+MAX_RANGE_DAYS = 20 * 366
+
+
+def _date_range(
+    start_date: Optional[date], end_date: Optional[date], today: date
+) -> Tuple[date, date]:
+    end = end_date or today
+    start = start_date or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date.",
+        )
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {MAX_RANGE_DAYS} days.",
+        )
+    return start, end
+
+
+def _rolling(
+    db: Session, user_id: int, metric: str, window: int, start: date, end: date
+) -> Dict[str, Any]:
+    series = daily_series(column_store.get(db, user_id), metric, start, end)
+    rolling = rolling_mean(series, window)
+    return {
+        "metric": metric,
+        "window": window,
+        "start_date": start,
+        "end_date": end,
+        "points": [
+            {"date": start + timedelta(days=i), "value": value, "rolling_mean": mean}
+            for i, (value, mean) in enumerate(zip(series.tolist(), rolling.tolist()))
+        ],
+    }
+
+
+@router.get("/rolling", response_model=RollingResponse)
+async def get_rolling(
+    metric: Literal["sessions", "minutes", "reels"] = "minutes",
+    window: int = Query(default=7, ge=1, le=365),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+    db: DBSession = Depends(read_db_dependency),
+) -> Dict[str, Any]:
+    """
+    Daily totals of `metric` with a trailing `window`-day rolling mean.
+
+    Every day in the range is present (days without sessions count as 0).
+    Defaults to the last 365 days.
+    """
+    start, end = _date_range(start_date, end_date, today)
+    return await run_db(db, _rolling, user_id, metric, window, start, end)
+
+
+def _histogram(
+    db: Session, user_id: int, field: str, bins: int, start: date, end: date
+) -> Dict[str, Any]:
+    counts, edges = histogram(column_store.get(db, user_id), field, start, end, bins)
+    return {
+        "field": field,
+        "start_date": start,
+        "end_date": end,
+        "bin_edges": edges.tolist(),
+        "counts": counts.tolist(),
+    }
+
+
+@router.get("/histogram", response_model=HistogramResponse)
+async def get_histogram(
+    field: Literal["duration", "reels"] = "duration",
+    bins: int = Query(default=20, ge=1, le=200),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+    db: DBSession = Depends(read_db_dependency),
+) -> Dict[str, Any]:
+    """Distribution of session duration (minutes) or reels watched."""
+    start, end = _date_range(start_date, end_date, today)
+    return await run_db(db, _histogram, user_id, field, bins, start, end)
+
+
+def _heatmap(db: Session, user_id: int, start: date, end: date) -> Dict[str, Any]:
+    sessions, minutes = weekday_hour_heatmap(column_store.get(db, user_id), start, end)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "sessions": sessions.tolist(),
+        "minutes": minutes.tolist(),
+    }
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_heatmap(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+    db: DBSession = Depends(read_db_dependency),
+) -> Dict[str, Any]:
+    """
+    Sessions and minutes per weekday x hour.
+
+    Weekday is the client-local session date; the hour is the start hour in
+    the user's time zone.
+    """
+    start, end = _date_range(start_date, end_date, today)
+    return await run_db(db, _heatmap, user_id, start, end)
+
+
+def _moods(db: Session, user_id: int, start: date, end: date) -> Dict[str, Any]:
+    items = mood_breakdown(column_store.get(db, user_id), start, end)
+    return {"start_date": start, "end_date": end, "items": items}
+
+
+@router.get("/moods", response_model=MoodBreakdownResponse)
+async def get_moods(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+    db: DBSession = Depends(read_db_dependency),
+) -> Dict[str, Any]:
+    """Sessions, minutes and reels grouped by mood (null = no mood recorded)."""
+    start, end = _date_range(start_date, end_date, today)
+    return await run_db(db, _moods, user_id, start, end)
+
+
+@router.get("/stats")
+async def get_analytics_stats() -> Dict[str, int]:
+    """Size and hit/load counters of the in-memory column store."""
+    return column_store.stats()
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import Depends, Header, Query
+
+from app.core.changes import change_counters
+from app.core.config import get_settings
+from app.db.session import DBSession, read_db_dependency, run_db
+from app.services.timezones import user_zones
+
+settings = get_settings()
+
+
+def get_user_id(
+    x_user_id: Optional[int] = Header(
+        default=None, ge=1, description="Calling user; defaults to DEFAULT_USER_ID."
+    ),
+) -> int:
+    """
+    Resolve the user a request acts for.
+
+    There is no authentication yet: clients identify themselves with an
+    `X-User-Id` header, and requests without one act as the default user.
+
+    Also the point where this process catches up with writes other
+    processes made for the user (see `app.core.changes`), before any of
+    its cached state is read.
+    """
+    user_id = x_user_id if x_user_id is not None else settings.DEFAULT_USER_ID
+    change_counters.sync(user_id)
+    return user_id
+
+
+def get_stream_user_id(
+    x_user_id: Optional[int] = Header(default=None, ge=1),
+    user_id: Optional[int] = Query(
+        default=None, ge=1, description="Calling user, for clients that cannot set headers."
+    ),
+) -> int:
+    """
+    `get_user_id` for push streams.
+
+    Browsers' EventSource and WebSocket APIs cannot send custom headers, so
+    the user may also be given as a `user_id` query parameter.
+    """
+    if x_user_id is not None:
+        user_id = x_user_id
+    elif user_id is None:
+        user_id = settings.DEFAULT_USER_ID
+    change_counters.sync(user_id)
+    return user_id
+
+
+async def get_user_today(
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(read_db_dependency),
+) -> date:
+    """
+    The calling user's current local day, in their stored time zone (UTC if unset).
+
+    Default summary/analytics ranges and streaks are relative to it. The
+    zone is cached per user, so this normally costs no query.
+    """
+    zone = user_zones.cached(user_id)
+    if zone is None:
+        zone = await run_db(db, user_zones.get, user_id)
+    return datetime.now(zone).date()
@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import suppress
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_stream_user_id
+from app.core.config import get_settings
+from app.core.pubsub import Subscription, event_broker
+from app.core.serialization import dumps
+
+router = APIRouter(tags=["events"])
+
+settings = get_settings()
+
+# First message on every connection: the client (re)loads its snapshot and
+# from then on applies events on top of it.
+READY = {"type": "ready"}
+
+
+async def _sse_stream(user_id: int) -> AsyncIterator[bytes]:
+    # Subscribed only once the body is iterated, so the finally always runs:
+    # a response that is never sent leaves no subscription behind.
+    subscription = event_broker.subscribe(user_id)
+    try:
+        yield b"data: " + dumps(READY) + b"\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), timeout=settings.PUSH_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle stream.
+                yield b": ping\n\n"
+                continue
+            yield b"data: " + dumps(event) + b"\n\n"
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def stream_events(user_id: int = Depends(get_stream_user_id)) -> StreamingResponse:
+    """
+    Server-sent events for the calling user.
+
+    Each `data:` line is a JSON event:
+    - `ready`: connected; (re)load summaries and the active session.
+    - `session.started` / `session.ended`: `session` as in `SessionResponse`.
+    - `summary.changed`: the current `daily`, `weekly` and `monthly` rows of
+      `date` (same fields as the /summary items) and `streaks` when a new
+      day started. Upsert them by key.
+    - `summary.reset` / `resync`: refetch everything (after an import, or
+      when this client fell behind).
+    """
+    return StreamingResponse(
+        _sse_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _forward(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        await websocket.send_text(dumps(await subscription.get()).decode())
+
+
+@router.websocket("/events/ws")
+async def events_websocket(websocket: WebSocket, user_id: int = Depends(get_stream_user_id)) -> None:
+    """Same events as `GET /events`, one JSON text frame each."""
+    await websocket.accept()
+    subscription = event_broker.subscribe(user_id)
+    sender: Optional["asyncio.Task[None]"] = None
+    try:
+        await websocket.send_text(dumps(READY).decode())
+        sender = asyncio.create_task(_forward(websocket, subscription))
+        # Incoming frames are ignored; this only waits for the disconnect.
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_broker.unsubscribe(subscription)
+        if sender is not None:
+            sender.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await sender
+
+
+@router.get("/events/stats")
+async def get_event_stats() -> Dict[str, int]:
+    """Connected push clients and published/delivered/dropped event counters."""
+    return event_broker.stats()
@@ -0,0 +1,64 @@
+from typing import Dict, FrozenSet
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import summary_cache
+from app.core.changes import change_counters
+from app.core.coalesce import read_flights
+from app.core.metrics import metrics
+from app.core.pubsub import event_broker
+from app.core.ratelimit import rate_limiter
+from app.services.ingest import ingest_queue
+from app.services.sweeper import session_sweeper
+
+router = APIRouter(tags=["metrics"])
+
+# Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stats that only ever grow, per metric prefix; exported as `<name>_total`
+# counters. Everything else (sizes, limits, in-flight work) is a gauge.
+COUNTER_STATS: Dict[str, FrozenSet[str]] = {
+    "summary_cache": frozenset({"hits", "misses", "evictions", "expirations", "invalidations"}),
+    "cache_sync": frozenset({"bumps", "syncs", "dropped"}),
+    "read_coalescing": frozenset({"leaders", "followers"}),
+    "rate_limit": frozenset(
+        {"read_allowed", "read_limited", "write_allowed", "write_limited", "evictions"}
+    ),
+    # push "dropped" sums over live subscribers, so it falls when they leave.
+    "push": frozenset({"published", "delivered"}),
+    "session_sweeper": frozenset({"sweeps", "closed"}),
+    "ingest_queue": frozenset({"appended", "applied", "batches", "lost_ends"}),
+}
+
+
+def _add(
+    gauges: Dict[str, float], counters: Dict[str, float], prefix: str, stats: Dict[str, int]
+) -> None:
+    for key, value in stats.items():
+        family = counters if key in COUNTER_STATS[prefix] else gauges
+        family[f"{prefix}_{key}"] = value
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Request/DB/serialization histograms plus cache, cache-sync, coalescing,
+    rate-limit, push, sweeper and ingest-queue gauges and counters (of this
+    worker process).
+    """
+    gauges: Dict[str, float] = {}
+    counters: Dict[str, float] = {}
+    _add(gauges, counters, "summary_cache", summary_cache.stats())
+    if change_counters.enabled:
+        _add(gauges, counters, "cache_sync", change_counters.stats())
+    _add(gauges, counters, "read_coalescing", read_flights.stats())
+    if rate_limiter.enabled:
+        _add(gauges, counters, "rate_limit", rate_limiter.stats())
+    _add(gauges, counters, "push", event_broker.stats())
+    if session_sweeper.enabled:
+        _add(gauges, counters, "session_sweeper", session_sweeper.stats())
+    if ingest_queue.enabled:
+        _add(gauges, counters, "ingest_queue", ingest_queue.stats())
+    return PlainTextResponse(metrics.render(gauges, counters), media_type=CONTENT_TYPE)
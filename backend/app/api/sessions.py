@@ -1,78 +1,145 @@
+import base64
+import csv
+import io
 from datetime import datetime, date, timedelta, timezone
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, and_, or_, select, update
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.api.deps import get_user_id
+from app.core.cache import summary_cache
+from app.core.coalesce import read_flights
+from app.core.config import get_settings
+from app.core.metrics import InstrumentedRoute, timed_serialization
+from app.core.pubsub import event_broker
+from app.core.serialization import encode, fast_json_enabled
+from app.db.session import (
+    AsyncSessionLocal,
+    DBSession,
+    ReadSessionLocal,
+    SessionLocal,
+    db_dependency,
+    run_db,
+    run_db_detached,
+)
 from app.models.session import Session as SessionModel
-from app.models.daily_summary import DailySummary
+from app.services.analytics import column_store
+from app.services.archive import session_archive
+from app.services.imports import SessionImportError, import_sessions, read_records
+from app.services.ingest import IngestView, StaleView, ingest_queue
+from app.services.push import publish_session, session_payload, summary_event
+from app.services.sweeper import session_sweeper
+from app.services.summaries import (
+    date_keys,
+    month_key_of,
+    record_hour_totals,
+    record_mood_totals,
+    record_session_totals,
+)
+from app.services.timezones import as_utc, local_date, local_hour, user_zones
 from app.schemas.session import (
     SessionStartRequest,
     SessionEndRequest,
     SessionResponse,
     SessionListResponse,
+    SessionImportResponse,
 )
 
 # Prefix is empty so paths match the public API exactly, e.g.:
 # - POST /session/start
 # - POST /session/end
 # - GET  /sessions
+# - GET  /sessions/export
 # - GET  /session/active
-router = APIRouter(tags=["sessions"])
+router = APIRouter(tags=["sessions"], route_class=InstrumentedRoute)
 
+settings = get_settings()
 
-def _ensure_utc_aware(dt: datetime) -> datetime:
-    """
-    Make a datetime UTC-aware.
+# Rows fetched per round-trip when streaming NDJSON.
+STREAM_BATCH_SIZE = 500
 
-    Backward compatible with previously stored naive datetimes (assumed UTC).
-    """
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
+# Column order of CSV exports (`POST /sessions/import` reads them back).
+EXPORT_CSV_FIELDS = (
+    "id", "start_time", "end_time", "duration_minutes", "reels_watched", "mood", "date"
+)
 
+# Ingestion mode: attempts when a batch commits between reading the overlay
+# and queueing the event (see `StaleView`).
+INGEST_STALE_RETRIES = 5
 
-def _local_date_from_utc(now_utc: datetime, tz_offset_minutes: Optional[int]) -> date:
+
+def _local_date_from_utc(
+    db: Session, user_id: int, now_utc: datetime, tz_offset_minutes: Optional[int]
+) -> date:
     """
     Compute client-local calendar date using provided offset (minutes east of UTC).
-    If no offset is provided, fall back to UTC date.
+    If no offset is provided, use the user's stored time zone (UTC if unset).
     """
     if tz_offset_minutes is None:
-        return now_utc.date()
+        return local_date(now_utc, user_zones.get(db, user_id))
     return (now_utc + timedelta(minutes=int(tz_offset_minutes))).date()
 
 
-@router.post("/session/start", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
-def start_session(
-    payload: SessionStartRequest, db: Session = Depends(get_db)
-) -> SessionResponse:
-    """
-    Start a new Instagram session.
+def _already_active() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="A session is already active. End it before starting a new one.",
+    )
 
-    Rules:
-    - Only one active session (end_time is NULL) is allowed at a time.
-    """
-    existing_active = (
-        db.query(SessionModel)
-        .filter(SessionModel.end_time.is_(None))
-        .order_by(SessionModel.start_time.desc())
-        .first()
+
+def _already_ended() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Session is already ended.",
     )
-    if existing_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="A session is already active. End it before starting a new one.",
-        )
+
+
+def _ingest_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Session queue is busy, please retry.",
+    )
+
+
+def _start_session_queued(db: Session, user_id: int, payload: SessionStartRequest) -> SessionModel:
+    for _ in range(INGEST_STALE_RETRIES):
+        view, active = _queued_active_session(db, user_id)
+        if active:
+            raise _already_active()
+        now_utc = datetime.now(timezone.utc)
+        day = _local_date_from_utc(db, user_id, now_utc, payload.tz_offset_minutes)
+        try:
+            session = ingest_queue.start_session(view, user_id, now_utc, day)
+        except StaleView:
+            db.rollback()  # end the read transaction so the retry sees the batch
+            continue
+        if session is None:
+            raise _already_active()
+        return session
+    raise _ingest_busy()
+
+
+def _start_session(db: Session, user_id: int, payload: SessionStartRequest) -> SessionModel:
+    if ingest_queue.enabled:
+        return _start_session_queued(db, user_id, payload)
+
+    if _get_active_session(db, user_id):
+        raise _already_active()
 
     now_utc = datetime.now(timezone.utc)
+    day = _local_date_from_utc(db, user_id, now_utc, payload.tz_offset_minutes)
     session = SessionModel(
+        user_id=user_id,
         start_time=now_utc,
         end_time=None,
         duration_minutes=None,
         reels_watched=None,
         mood=None,
-        date=_local_date_from_utc(now_utc, payload.tz_offset_minutes),
+        date=day,
+        **date_keys(day),
     )
     db.add(session)
     db.commit()
@@ -80,102 +147,506 @@ def start_session(
     return session
 
 
-@router.post("/session/end", response_model=SessionResponse)
-def end_session(payload: SessionEndRequest, db: Session = Depends(get_db)) -> SessionResponse:
+@router.post("/session/start", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+async def start_session(
+    payload: SessionStartRequest,
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+) -> SessionResponse:
     """
-    End an existing active session.
+    Start a new Instagram session.
 
-    - Calculates duration in whole minutes.
-    - Updates daily summary (upsert behavior).
+    Rules:
+    - Only one active session (end_time is NULL) is allowed per user at a time.
     """
+    session = await run_db(db, _start_session, user_id, payload)
+    read_flights.forget(_active_flight(user_id))
+    publish_session("session.started", session)
+    return session
+
+
+def _find_session(db: Session, user_id: int, session_id: int) -> SessionModel:
     session: Optional[SessionModel] = (
-        db.query(SessionModel).filter(SessionModel.id == payload.session_id).first()
+        db.query(SessionModel)
+        .filter(SessionModel.id == session_id, SessionModel.user_id == user_id)
+        .first()
     )
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found.",
         )
+    return session
 
-    if session.end_time is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Session is already ended.",
-        )
 
-    now_utc = datetime.now(timezone.utc)
-    start_utc = _ensure_utc_aware(session.start_time)
+def _duration_until(session: SessionModel, now_utc: datetime) -> int:
+    start_utc = as_utc(session.start_time)
     duration_minutes = int((now_utc - start_utc).total_seconds() // 60)
     if duration_minutes < 0:
         # Defensive check; should not happen with system clock moving backwards.
         duration_minutes = 0
+    return duration_minutes
 
-    session.end_time = now_utc
-    session.duration_minutes = duration_minutes
-    session.reels_watched = payload.reels_watched
-    session.mood = payload.mood
+
+def _end_session_queued(db: Session, user_id: int, payload: SessionEndRequest) -> SessionModel:
+    for _ in range(INGEST_STALE_RETRIES):
+        view = ingest_queue.view(user_id)
+        session = view.session(payload.session_id) or _find_session(
+            db, user_id, payload.session_id
+        )
+        if session.end_time is not None or session.id in view.ended:
+            raise _already_ended()
+
+        now_utc = datetime.now(timezone.utc)
+        if session.date is None:
+            session.date = as_utc(session.start_time).date()
+        try:
+            ended = ingest_queue.end_session(
+                view,
+                session,
+                end_time=now_utc,
+                duration_minutes=_duration_until(session, now_utc),
+                reels_watched=payload.reels_watched,
+                mood=payload.mood,
+            )
+        except StaleView:
+            db.rollback()  # end the read transaction so the retry sees the batch
+            continue
+        if ended is None:
+            raise _already_ended()
+        return ended
+    raise _ingest_busy()
+
+
+def _end_session(db: Session, user_id: int, payload: SessionEndRequest) -> SessionModel:
+    if ingest_queue.enabled:
+        return _end_session_queued(db, user_id, payload)
+
+    session = _find_session(db, user_id, payload.session_id)
+    if session.end_time is not None:
+        raise _already_ended()
+
+    now_utc = datetime.now(timezone.utc)
+    duration_minutes = _duration_until(session, now_utc)
 
     # Ensure date is set from start_time if missing.
-    session.date = session.date or start_utc.date()
-
-    # Update or create daily summary.
-    summary_date = session.date
-    daily_summary: Optional[DailySummary] = (
-        db.query(DailySummary)
-        .filter(DailySummary.summary_date == summary_date)
-        .with_for_update(of=DailySummary)
-        .first()
-    )
+    summary_date = session.date or as_utc(session.start_time).date()
 
-    reels_delta = payload.reels_watched or 0
-    minutes_delta = duration_minutes or 0
-
-    if daily_summary:
-        daily_summary.total_sessions += 1
-        daily_summary.total_reels += reels_delta
-        daily_summary.total_minutes += minutes_delta
-    else:
-        daily_summary = DailySummary(
-            summary_date=summary_date,
-            total_sessions=1,
-            total_reels=reels_delta,
-            total_minutes=minutes_delta,
+    # Claim the session with a conditional UPDATE so two concurrent ends
+    # cannot both fold it into the summaries.
+    claimed = db.execute(
+        update(SessionModel)
+        .where(SessionModel.id == session.id, SessionModel.end_time.is_(None))
+        .values(
+            end_time=now_utc,
+            duration_minutes=duration_minutes,
+            reels_watched=payload.reels_watched,
+            mood=payload.mood,
+            date=summary_date,
         )
-        db.add(daily_summary)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        raise _already_ended()
+
+    # Update daily summary and its weekly/monthly rollups (upsert behavior).
+    new_day = record_session_totals(
+        db,
+        user_id,
+        summary_date,
+        reels_delta=payload.reels_watched or 0,
+        minutes_delta=duration_minutes or 0,
+    )
+    # Hour-of-day (local start hour) and mood breakdowns of the same day.
+    start_hour = local_hour(session.start_time, user_zones.get(db, user_id))
+    record_hour_totals(
+        db,
+        user_id,
+        summary_date,
+        start_hour,
+        reels_delta=payload.reels_watched or 0,
+        minutes_delta=duration_minutes or 0,
+    )
+    record_mood_totals(
+        db,
+        user_id,
+        summary_date,
+        payload.mood,
+        reels_delta=payload.reels_watched or 0,
+        minutes_delta=duration_minutes or 0,
+    )
 
     db.commit()
+    summary_cache.invalidate_day(user_id, summary_date, streaks=new_day)
+    column_store.invalidate(user_id)
+    if event_broker.has_subscribers(user_id):
+        event_broker.publish(user_id, summary_event(db, user_id, summary_date, new_day))
     db.refresh(session)
     return session
 
 
-@router.get("/session/active", response_model=Optional[SessionResponse])
-def get_active_session(db: Session = Depends(get_db)) -> Optional[SessionResponse]:
+@router.post("/session/end", response_model=SessionResponse)
+async def end_session(
+    payload: SessionEndRequest,
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+) -> SessionResponse:
     """
-    Return the currently active session if any, otherwise null.
-    Useful for the frontend to restore state across reloads.
+    End an existing active session.
+
+    - Calculates duration in whole minutes.
+    - Updates daily summary and weekly/monthly rollups (upsert behavior);
+      in ingestion mode this happens in the next batch, after the response.
     """
-    active = (
+    session = await run_db(db, _end_session, user_id, payload)
+    read_flights.forget(_active_flight(user_id))
+    publish_session("session.ended", session)
+    return session
+
+
+def _query_active_session(db: Session, user_id: int) -> Optional[SessionModel]:
+    return (
         db.query(SessionModel)
-        .filter(SessionModel.end_time.is_(None))
+        .filter(SessionModel.user_id == user_id, SessionModel.end_time.is_(None))
         .order_by(SessionModel.start_time.desc())
         .first()
     )
-    return active
+
+
+def _queued_active_session(
+    db: Session, user_id: int
+) -> Tuple[IngestView, Optional[SessionModel]]:
+    # Take the overlay before querying: a batch released after this point
+    # was committed before the query runs, so nothing falls in between.
+    view = ingest_queue.view(user_id)
+    if view.active_id is not None:
+        return view, view.active
+    session = _query_active_session(db, user_id)
+    if session is not None and session.id in view.ended:
+        session = None
+    return view, session
+
+
+def _get_active_session(db: Session, user_id: int) -> Optional[SessionModel]:
+    if ingest_queue.enabled:
+        return _queued_active_session(db, user_id)[1]
+    return _query_active_session(db, user_id)
+
+
+def _active_flight(user_id: int) -> Tuple[Any, ...]:
+    # Single-flight key of `GET /session/active`; start/end forget it.
+    return ("active", user_id)
+
+
+def _active_response(db: Session, user_id: int) -> Optional[SessionResponse]:
+    # Built inside the flight: waiters share the response, not an ORM row
+    # bound to the leader's session.
+    session = _get_active_session(db, user_id)
+    return SessionResponse.from_orm(session) if session is not None else None
+
+
+@router.get("/session/active", response_model=Optional[SessionResponse])
+async def get_active_session(
+    user_id: int = Depends(get_user_id),
+) -> Optional[SessionResponse]:
+    """
+    Return the currently active session if any, otherwise null.
+    Useful for the frontend to restore state across reloads.
+
+    Every open tab calls this on load, so concurrent calls for the same
+    user share one query (see `app.core.coalesce`), run on a session of its
+    own rather than the first caller's.
+    """
+    return await read_flights.run(
+        _active_flight(user_id), lambda: run_db_detached(_active_response, user_id)
+    )
+
+
+@router.get("/session/ingest/stats")
+async def ingest_stats() -> dict:
+    """Ingestion-mode queue counters (pending, appended, applied, batches)."""
+    return dict(ingest_queue.stats(), enabled=ingest_queue.enabled)
+
+
+@router.get("/session/sweeper/stats")
+async def sweeper_stats() -> dict:
+    """Stale-session sweeper counters (sweeps run, sessions auto-closed)."""
+    return dict(session_sweeper.stats(), enabled=session_sweeper.enabled)
+
+
+def _encode_cursor(row: SessionModel) -> str:
+    """Opaque keyset cursor pointing just past `row` in (start_time, id) order."""
+    raw = f"{row.start_time.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        start_raw, id_raw = raw.rsplit("|", 1)
+        return datetime.fromisoformat(start_raw), int(id_raw)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+
+
+def _parse_period(week: Optional[str], month: Optional[str]) -> Dict[str, int]:
+    """`week` (YYYY-Www) / `month` (YYYY-MM) as equality filters on the precomputed keys."""
+    keys: Dict[str, int] = {}
+    try:
+        if week:
+            iso_year, iso_week = int(week[:4]), int(week[6:])
+            date.fromisocalendar(iso_year, iso_week, 1)  # rejects W00 / W53 of short years
+            keys.update(iso_year=iso_year, iso_week=iso_week)
+        if month:
+            year, month_number = int(month[:4]), int(month[5:])
+            keys["month_key"] = month_key_of(date(year, month_number, 1))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid week or month.",
+        )
+    return keys
+
+
+def _sessions_select(
+    user_id: int,
+    date_filter: Optional[date],
+    cursor: Optional[str],
+    period: Optional[Dict[str, int]] = None,
+) -> Select:
+    """Newest-first sessions of one user, keyset-filtered on (start_time, id)."""
+    stmt = (
+        select(SessionModel)
+        .where(SessionModel.user_id == user_id)
+        .order_by(SessionModel.start_time.desc(), SessionModel.id.desc())
+    )
+    if date_filter:
+        stmt = stmt.where(SessionModel.date == date_filter)
+    for name, value in (period or {}).items():
+        stmt = stmt.where(getattr(SessionModel, name) == value)
+    if cursor:
+        start_time, session_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                SessionModel.start_time < start_time,
+                and_(SessionModel.start_time == start_time, SessionModel.id < session_id),
+            )
+        )
+    return stmt
+
+
+def _list_sessions(
+    db: Session,
+    user_id: int,
+    date_filter: Optional[date],
+    cursor: Optional[str],
+    limit: int,
+    period: Dict[str, int],
+    archived_before: Optional[date],
+) -> Union[SessionListResponse, Response]:
+    # Fetch one extra row to know whether another page exists.
+    stmt = _sessions_select(user_id, date_filter, cursor, period).limit(limit + 1)
+    if not fast_json_enabled():
+        rows = db.execute(stmt).scalars().all()
+        next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return SessionListResponse(
+            sessions=rows[:limit], next_cursor=next_cursor, archived_before=archived_before
+        )
+
+    # Fast path: plain column rows straight to JSON bytes; returning a
+    # Response skips FastAPI's second pass through `response_model`.
+    rows = db.execute(stmt.with_only_columns(*SessionModel.__table__.c)).all()
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    with timed_serialization():
+        body = encode(
+            SessionListResponse,
+            {
+                "sessions": [session_payload(r) for r in rows[:limit]],
+                "next_cursor": next_cursor,
+                "archived_before": archived_before,
+            },
+        )
+    return Response(content=body, media_type="application/json")
+
+
+def _ndjson_line(row: SessionModel) -> bytes:
+    return encode(SessionResponse, session_payload(row)) + b"\n"
+
+
+def _stream_sessions_sync(stmt: Select) -> Iterator[bytes]:
+    # Own DB session: the request-scoped one is closed before the body streams.
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"yield_per": STREAM_BATCH_SIZE})
+        for row in result.scalars():
+            yield _ndjson_line(row)
+    finally:
+        db.close()
+
+
+async def _stream_sessions_async(stmt: Select) -> AsyncIterator[bytes]:
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(
+            stmt, execution_options={"yield_per": STREAM_BATCH_SIZE}
+        )
+        async for row in result:
+            yield _ndjson_line(row)
 
 
 @router.get("/sessions", response_model=SessionListResponse)
-def list_sessions(
-    date_filter: Optional[date] = None, db: Session = Depends(get_db)
-) -> SessionListResponse:
+async def list_sessions(
+    date_filter: Optional[date] = None,
+    week: Optional[str] = Query(default=None, pattern=r"^\d{4}-W\d{2}$", examples=["2024-W05"]),
+    month: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}$", examples=["2024-03"]),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    stream: bool = False,
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+):
     """
-    List sessions.
+    List sessions, newest first, with keyset pagination.
 
     - If `date_filter` is provided, returns sessions for that calendar date.
-    - Otherwise, returns all sessions (for an MVP-scale single user this is fine).
+    - `week` (ISO week, e.g. 2024-W05) and `month` (e.g. 2024-03) select
+      sessions by their local date, like the weekly/monthly summaries.
+    - Pages hold at most `limit` rows; pass `next_cursor` back as `cursor`
+      to fetch the following page.
+    - With `stream=true`, every matching row after `cursor` is streamed as
+      NDJSON (one session per line) from a server-side cursor, ignoring `limit`.
+    - Only live sessions are listed: months moved out by
+      `python -m app.cli archive-sessions` are skipped. `archived_before`
+      (the `X-Archived-Before` header when streaming) gives the first day
+      after the archived months; use `GET /sessions/export` for full history.
     """
-    query = db.query(SessionModel).order_by(SessionModel.start_time.desc())
-    if date_filter:
-        query = query.filter(SessionModel.date == date_filter)
-    sessions = query.all()
-    return SessionListResponse(sessions=sessions)
+    period = _parse_period(week, month)
+    archived_before = session_archive.frozen_before()
+    if stream:
+        stmt = _sessions_select(user_id, date_filter, cursor, period)
+        body = _stream_sessions_async(stmt) if settings.DB_ASYNC else _stream_sessions_sync(stmt)
+        headers = {"X-Archived-Before": archived_before.isoformat()} if archived_before else None
+        return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+    return await run_db(
+        db, _list_sessions, user_id, date_filter, cursor, limit, period, archived_before
+    )
+
+
+def _export_payload(row: Any) -> Dict[str, Any]:
+    payload = session_payload(row)
+    payload["start_time"] = as_utc(row.start_time)
+    if row.end_time is not None:
+        payload["end_time"] = as_utc(row.end_time)
+    return payload
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
 
+def _export_sessions(
+    user_id: int, start: Optional[date], end: Optional[date], fmt: str
+) -> Iterator[bytes]:
+    # Sync even in DB_ASYNC mode: archive blocks are decompressed on the
+    # threadpool thread StreamingResponse iterates sync bodies on.
+    db = ReadSessionLocal()
+    try:
+        rows = session_archive.export(db, user_id, start, end)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_FIELDS)
+            for count, row in enumerate(rows, start=1):
+                payload = _export_payload(row)
+                writer.writerow(_csv_value(payload[field]) for field in EXPORT_CSV_FIELDS)
+                if count % STREAM_BATCH_SIZE == 0:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode()
+        else:
+            lines: List[bytes] = []
+            for row in rows:
+                lines.append(encode(SessionResponse, _export_payload(row)) + b"\n")
+                if len(lines) >= STREAM_BATCH_SIZE:
+                    yield b"".join(lines)
+                    lines = []
+            yield b"".join(lines)
+    finally:
+        db.close()
+
+
+@router.get("/sessions/export")
+async def export_sessions(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: Literal["csv", "ndjson"] = "ndjson",
+    user_id: int = Depends(get_user_id),
+) -> StreamingResponse:
+    """
+    Stream every session with local date in [start_date, end_date], oldest first.
+
+    - Both bounds are optional; without them the whole history is exported.
+    - Archived months (see `python -m app.cli archive-sessions`) are read
+      from their segment files and merged with the rows still in the table,
+      so the export is complete however much has been archived.
+    - NDJSON (one `SessionResponse` per line) or CSV with a header row; both
+      can be fed back to `POST /sessions/import`. Timestamps are UTC.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date.",
+        )
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_sessions(user_id, start_date, end_date, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sessions.{format}"'},
+    )
+
+
+def _import_sessions(
+    db: Session, user_id: int, lines: List[str], fmt: str
+) -> SessionImportResponse:
+    try:
+        result = import_sessions(
+            db,
+            user_id,
+            read_records(lines, fmt),
+            id_source=ingest_queue.allocate_id if ingest_queue.enabled else None,
+        )
+    except SessionImportError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    summary_cache.invalidate_user(user_id)
+    column_store.invalidate(user_id)
+    # Any summary may have changed: connected clients refetch.
+    event_broker.publish(user_id, {"type": "summary.reset"})
+    return SessionImportResponse(
+        imported=result.imported, first_date=result.first_date, last_date=result.last_date
+    )
+
+
+@router.post("/sessions/import", response_model=SessionImportResponse)
+async def import_sessions_batch(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "ndjson",
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+) -> SessionImportResponse:
+    """
+    Bulk-import finished historical sessions.
+
+    - Body is CSV (with header) or NDJSON, one session per row/line, with
+      `start_time`, `end_time`, optional `reels_watched`, `mood`, `date`.
+    - Rows are inserted in bulk and the affected daily/weekly/monthly
+      summaries and streaks are recomputed set-based, in one transaction.
+    - For very large files prefer `python -m app.cli import-sessions`.
+    """
+    body = (await request.body()).decode("utf-8-sig")
+    return await run_db(db, _import_sessions, user_id, body.splitlines(), format)
@@ -1,194 +1,471 @@
 from datetime import date, timedelta
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.api.deps import get_user_id, get_user_today
+from app.core.cache import CacheEntry, summary_cache
+from app.core.coalesce import read_flights
+from app.core.metrics import InstrumentedRoute, timed_serialization
+from app.core.serialization import encode
+from app.db.session import run_db_detached
 from app.models.daily_summary import DailySummary
+from app.models.hourly_summary import HourlySummary
+from app.models.monthly_summary import MonthlySummary
+from app.models.mood_summary import NO_MOOD, MoodSummary
+from app.models.weekly_summary import WeeklySummary
 from app.schemas.summary import (
-    DailySummaryResponse,
     DailySummaryListResponse,
-    WeeklySummaryItem,
+    DashboardResponse,
+    HourlySummaryListResponse,
+    MoodSummaryListResponse,
     WeeklySummaryListResponse,
-    MonthlySummaryItem,
     MonthlySummaryListResponse,
     StreaksResponse,
 )
+from app.services.summaries import current_streaks, month_start_of, week_start_of
 
-router = APIRouter(prefix="/summary", tags=["summaries"])
+router = APIRouter(prefix="/summary", tags=["summaries"], route_class=InstrumentedRoute)
 
 
-def _default_date_range() -> Tuple[date, date]:
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+async def _cached_response(
+    request: Request,
+    user_id: int,
+    key: Tuple[Hashable, ...],
+    span: Optional[Tuple[date, date]],
+    model: Type[BaseModel],
+    fn: Callable[..., Dict[str, Any]],
+    *args: Any,
+    streaks: bool = False,
+) -> Response:
+    """
+    Serve a summary from the in-process cache, computing it on a miss.
+
+    `fn` returns the plain payload, encoded as `model` (see `encode`). The
+    cached body is pre-serialized JSON; a matching If-None-Match gets a
+    304 without touching the DB or serializing anything. `response_model` on
+    the route still documents the payload in OpenAPI. `streaks` marks a
+    payload embedding streaks, so it is also dropped when they change.
+
+    Concurrent misses for the same key share one query (`read_flights`);
+    the user's cache version is part of the flight key, so a request
+    arriving after an invalidating write runs its own. The flight runs on a session
+    of its own, so the leading request may disconnect meanwhile.
+    """
+    cache_key = (user_id,) + key  # (user_id, kind, range...)
+    entry = summary_cache.get(cache_key)
+    if entry is None:
+        version = summary_cache.version_of(user_id)
+
+        async def compute() -> CacheEntry:
+            payload = await run_db_detached(fn, user_id, *args, read_only=True)
+            with timed_serialization():
+                body = encode(model, payload)
+            return summary_cache.put(cache_key, body, span, version, streaks=streaks)
+
+        entry = await read_flights.run(("summary", version) + cache_key, compute)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _default_date_range(today: date) -> Tuple[date, date]:
     """Default date range for daily summaries: last 30 days including today."""
-    today = date.today()
     start = today - timedelta(days=29)
     return start, today
 
 
+def _months_back(month_start: date, months: int) -> date:
+    """First day of the month `months` calendar months before `month_start`."""
+    index = month_start.year * 12 + month_start.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _items(db: Session, stmt: Select) -> Dict[str, Any]:
+    # Labelled columns straight into dicts: no ORM objects per row.
+    return {"items": [dict(row) for row in db.execute(stmt).mappings()]}
+
+
+def _daily_summaries(
+    db: Session, user_id: int, start_date: date, end_date: date
+) -> Dict[str, Any]:
+    stmt = (
+        select(
+            DailySummary.summary_date.label("date"),
+            DailySummary.total_sessions,
+            DailySummary.total_reels,
+            DailySummary.total_minutes,
+        )
+        .where(
+            DailySummary.user_id == user_id,
+            DailySummary.summary_date >= start_date,
+            DailySummary.summary_date <= end_date,
+        )
+        .order_by(DailySummary.summary_date.asc())
+    )
+    return _items(db, stmt)
+
+
 @router.get("/daily", response_model=DailySummaryListResponse)
-def get_daily_summaries(
+async def get_daily_summaries(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-) -> DailySummaryListResponse:
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
     """
     Return daily summaries for a date range.
 
-    - If no range is provided, last 30 days are returned.
+    - If no range is provided, last 30 days are returned, ending on the
+      user's local today (see `PUT /user/timezone`).
     """
     if not start_date or not end_date:
-        start_date, end_date = _default_date_range()
-
-    items: List[DailySummary] = (
-        db.query(DailySummary)
-        .filter(DailySummary.summary_date >= start_date)
-        .filter(DailySummary.summary_date <= end_date)
-        .order_by(DailySummary.summary_date.asc())
-        .all()
+        start_date, end_date = _default_date_range(today)
+    return await _cached_response(
+        request,
+        user_id,
+        ("daily", start_date, end_date),
+        (start_date, end_date),
+        DailySummaryListResponse,
+        _daily_summaries,
+        start_date,
+        end_date,
     )
 
-    response_items = [
-        DailySummaryResponse(
-            date=it.summary_date,
-            total_sessions=it.total_sessions,
-            total_reels=it.total_reels,
-            total_minutes=it.total_minutes,
+
+def _weekly_summaries(db: Session, user_id: int, start_date: date) -> Dict[str, Any]:
+    # Read the maintained ISO-week rollup; a range scan on its unique index.
+    stmt = (
+        select(
+            WeeklySummary.iso_year.label("year"),
+            WeeklySummary.iso_week.label("week"),
+            WeeklySummary.first_date.label("start_date"),
+            WeeklySummary.last_date.label("end_date"),
+            WeeklySummary.total_sessions,
+            WeeklySummary.total_reels,
+            WeeklySummary.total_minutes,
         )
-        for it in items
-    ]
-    return DailySummaryListResponse(items=response_items)
+        .where(WeeklySummary.user_id == user_id, WeeklySummary.week_start >= start_date)
+        .order_by(WeeklySummary.week_start.asc())
+    )
+    return _items(db, stmt)
 
 
 @router.get("/weekly", response_model=WeeklySummaryListResponse)
-def get_weekly_summaries(db: Session = Depends(get_db)) -> WeeklySummaryListResponse:
+async def get_weekly_summaries(
+    request: Request,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
     """
-    Aggregate daily summaries into ISO weeks.
+    Daily summaries aggregated into ISO weeks (served from the weekly rollup).
 
     Returns the last 8 weeks including the current week.
     """
-    today = date.today()
     start_date = today - timedelta(weeks=7, days=today.weekday())
-
-    # Group by ISO year and week for correctness around year boundaries.
-    rows = (
-        db.query(
-            func.strftime("%Y", DailySummary.summary_date).label("year"),
-            func.strftime("%W", DailySummary.summary_date).label("week"),
-            func.min(DailySummary.summary_date),
-            func.max(DailySummary.summary_date),
-            func.sum(DailySummary.total_sessions),
-            func.sum(DailySummary.total_reels),
-            func.sum(DailySummary.total_minutes),
-        )
-        .filter(DailySummary.summary_date >= start_date)
-        .group_by("year", "week")
-        .order_by("year", "week")
-        .all()
+    return await _cached_response(
+        request,
+        user_id,
+        ("weekly", start_date),
+        (start_date, date.max),
+        WeeklySummaryListResponse,
+        _weekly_summaries,
+        start_date,
     )
 
-    items: List[WeeklySummaryItem] = []
-    for year, week, start_d, end_d, sessions, reels, minutes in rows:
-        items.append(
-            WeeklySummaryItem(
-                year=int(year),
-                week=int(week),
-                start_date=start_d,
-                end_date=end_d,
-                total_sessions=sessions or 0,
-                total_reels=reels or 0,
-                total_minutes=minutes or 0,
-            )
+
+def _monthly_summaries(db: Session, user_id: int, six_months_ago: date) -> Dict[str, Any]:
+    stmt = (
+        select(
+            MonthlySummary.year,
+            MonthlySummary.month,
+            MonthlySummary.first_date.label("start_date"),
+            MonthlySummary.last_date.label("end_date"),
+            MonthlySummary.total_sessions,
+            MonthlySummary.total_reels,
+            MonthlySummary.total_minutes,
+        )
+        .where(
+            MonthlySummary.user_id == user_id, MonthlySummary.month_start >= six_months_ago
         )
-    return WeeklySummaryListResponse(items=items)
+        .order_by(MonthlySummary.month_start.asc())
+    )
+    return _items(db, stmt)
 
 
 @router.get("/monthly", response_model=MonthlySummaryListResponse)
-def get_monthly_summaries(db: Session = Depends(get_db)) -> MonthlySummaryListResponse:
+async def get_monthly_summaries(
+    request: Request,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
     """
-    Aggregate daily summaries into months.
+    Daily summaries aggregated into months (served from the monthly rollup).
 
     Returns the last 6 months including the current month.
     """
-    today = date.today()
-    six_months_ago = (today.replace(day=1) - timedelta(days=180)).replace(day=1)
-
-    rows = (
-        db.query(
-            func.strftime("%Y", DailySummary.summary_date).label("year"),
-            func.strftime("%m", DailySummary.summary_date).label("month"),
-            func.min(DailySummary.summary_date),
-            func.max(DailySummary.summary_date),
-            func.sum(DailySummary.total_sessions),
-            func.sum(DailySummary.total_reels),
-            func.sum(DailySummary.total_minutes),
-        )
-        .filter(DailySummary.summary_date >= six_months_ago)
-        .group_by("year", "month")
-        .order_by("year", "month")
-        .all()
+    six_months_ago = _months_back(month_start_of(today), 5)
+    return await _cached_response(
+        request,
+        user_id,
+        ("monthly", six_months_ago),
+        (six_months_ago, date.max),
+        MonthlySummaryListResponse,
+        _monthly_summaries,
+        six_months_ago,
     )
 
-    items: List[MonthlySummaryItem] = []
-    for year, month, start_d, end_d, sessions, reels, minutes in rows:
-        items.append(
-            MonthlySummaryItem(
-                year=int(year),
-                month=int(month),
-                start_date=start_d,
-                end_date=end_d,
-                total_sessions=sessions or 0,
-                total_reels=reels or 0,
-                total_minutes=minutes or 0,
-            )
-        )
-    return MonthlySummaryListResponse(items=items)
+
+def _streaks(db: Session, user_id: int, today: date) -> Dict[str, Any]:
+    return current_streaks(db, user_id, today)
 
 
 @router.get("/streaks", response_model=StreaksResponse)
-def get_streaks(db: Session = Depends(get_db)) -> StreaksResponse:
+async def get_streaks(
+    request: Request,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
+    """
+    Current and longest streaks (in days) with at least one session.
+
+    Served from the persisted streak state maintained by `POST /session/end`.
+    """
+    # Keyed by the user's local day: the current streak depends on it.
+    return await _cached_response(
+        request, user_id, ("streaks", today), None, StreaksResponse, _streaks, today
+    )
+
+
+def _dashboard_spans(today: date) -> Tuple[date, date, date]:
+    """(daily start, weekly start, monthly start): the defaults of the endpoints above."""
+    return (
+        _default_date_range(today)[0],
+        today - timedelta(weeks=7, days=today.weekday()),
+        _months_back(month_start_of(today), 5),
+    )
+
+
+def _period_item(key: Dict[str, int], day: date, row: Any) -> Dict[str, Any]:
+    return dict(
+        key,
+        start_date=day,
+        end_date=day,
+        total_sessions=row.total_sessions,
+        total_reels=row.total_reels,
+        total_minutes=row.total_minutes,
+    )
+
+
+def _add_day(item: Dict[str, Any], day: date, row: Any) -> None:
+    # Rows arrive in date order, so the last day seen is the period's end.
+    item["end_date"] = day
+    item["total_sessions"] += row.total_sessions
+    item["total_reels"] += row.total_reels
+    item["total_minutes"] += row.total_minutes
+
+
+def _dashboard(db: Session, user_id: int, today: date) -> Dict[str, Any]:
     """
-    Compute current and longest streaks (in days) with at least one session.
+    Daily, weekly, monthly and streak views in one read.
+
+    One range scan of `daily_summaries` from the earliest default start
+    (six months back) feeds all three lists; weeks and months are summed in
+    Python exactly as the rollups sum them. Streaks come from the persisted
+    streak state: the longest streak needs full history, not just the span.
     """
-    rows = (
-        db.query(DailySummary.summary_date)
-        .filter(DailySummary.total_sessions > 0)
+    daily_start, weekly_start, monthly_start = _dashboard_spans(today)
+    stmt = (
+        select(
+            DailySummary.summary_date,
+            DailySummary.total_sessions,
+            DailySummary.total_reels,
+            DailySummary.total_minutes,
+        )
+        .where(
+            DailySummary.user_id == user_id,
+            DailySummary.summary_date >= min(daily_start, weekly_start, monthly_start),
+        )
         .order_by(DailySummary.summary_date.asc())
-        .all()
     )
-    dates = [r[0] for r in rows]
-
-    longest = 0
-    current = 0
-    today = date.today()
-
-    if not dates:
-        return StreaksResponse(current_streak=0, longest_streak=0)
-
-    streak = 1
-    longest = 1
-    for i in range(1, len(dates)):
-        if dates[i] == dates[i - 1] + timedelta(days=1):
-            streak += 1
-        else:
-            if streak > longest:
-                longest = streak
-            streak = 1
-
-    if streak > longest:
-        longest = streak
-
-    # Current streak is the length of the streak ending today, if any.
-    current = 0
-    streak = 1
-    for i in range(1, len(dates)):
-        if dates[i] == dates[i - 1] + timedelta(days=1):
-            streak += 1
-        else:
-            streak = 1
-    if dates and dates[-1] == today:
-        current = streak
-
-    return StreaksResponse(current_streak=current, longest_streak=longest)
+    daily = []
+    weeks: Dict[date, Dict[str, Any]] = {}
+    months: Dict[date, Dict[str, Any]] = {}
+    for row in db.execute(stmt):
+        day = row.summary_date
+        if daily_start <= day <= today:
+            daily.append(
+                {
+                    "date": day,
+                    "total_sessions": row.total_sessions,
+                    "total_reels": row.total_reels,
+                    "total_minutes": row.total_minutes,
+                }
+            )
+        week = week_start_of(day)
+        if week >= weekly_start:
+            if week in weeks:
+                _add_day(weeks[week], day, row)
+            else:
+                iso = day.isocalendar()
+                weeks[week] = _period_item({"year": iso[0], "week": iso[1]}, day, row)
+        month = month_start_of(day)
+        if month >= monthly_start:
+            if month in months:
+                _add_day(months[month], day, row)
+            else:
+                months[month] = _period_item({"year": day.year, "month": day.month}, day, row)
+    return {
+        "daily": daily,
+        "weekly": list(weeks.values()),
+        "monthly": list(months.values()),
+        "streaks": current_streaks(db, user_id, today),
+    }
+
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    request: Request,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
+    """
+    Everything the dashboard loads, in one response.
+
+    `daily`, `weekly`, `monthly` and `streaks` equal the default responses
+    of `/summary/daily`, `/weekly`, `/monthly` and `/streaks`, read with one
+    DB session and cached (and ETagged) as a unit.
+    """
+    start_date = min(_dashboard_spans(today))
+    return await _cached_response(
+        request,
+        user_id,
+        ("dashboard", today),
+        (start_date, date.max),
+        DashboardResponse,
+        _dashboard,
+        today,
+        streaks=True,
+    )
+
+
+def _hourly_summaries(
+    db: Session, user_id: int, start_date: date, end_date: date
+) -> Dict[str, Any]:
+    # At most 24 groups per day in range; summed from the hourly breakdown.
+    stmt = (
+        select(
+            HourlySummary.hour,
+            func.sum(HourlySummary.total_sessions).label("total_sessions"),
+            func.sum(HourlySummary.total_reels).label("total_reels"),
+            func.sum(HourlySummary.total_minutes).label("total_minutes"),
+        )
+        .where(
+            HourlySummary.user_id == user_id,
+            HourlySummary.summary_date >= start_date,
+            HourlySummary.summary_date <= end_date,
+        )
+        .group_by(HourlySummary.hour)
+        .order_by(HourlySummary.hour.asc())
+    )
+    return _items(db, stmt)
+
+
+@router.get("/hourly", response_model=HourlySummaryListResponse)
+async def get_hourly_summaries(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
+    """
+    Totals per hour of day (start hour in the user's time zone) over a date range.
+
+    - Hours without sessions are omitted.
+    - If no range is provided, the last 30 days are used.
+    """
+    if not start_date or not end_date:
+        start_date, end_date = _default_date_range(today)
+    return await _cached_response(
+        request,
+        user_id,
+        ("hourly", start_date, end_date),
+        (start_date, end_date),
+        HourlySummaryListResponse,
+        _hourly_summaries,
+        start_date,
+        end_date,
+    )
+
+
+def _mood_summaries(
+    db: Session, user_id: int, start_date: date, end_date: date
+) -> Dict[str, Any]:
+    stmt = (
+        select(
+            MoodSummary.mood,
+            func.sum(MoodSummary.total_sessions).label("total_sessions"),
+            func.sum(MoodSummary.total_reels).label("total_reels"),
+            func.sum(MoodSummary.total_minutes).label("total_minutes"),
+        )
+        .where(
+            MoodSummary.user_id == user_id,
+            MoodSummary.summary_date >= start_date,
+            MoodSummary.summary_date <= end_date,
+        )
+        .group_by(MoodSummary.mood)
+        .order_by(MoodSummary.mood.asc())
+    )
+    items = _items(db, stmt)
+    for item in items["items"]:
+        if item["mood"] == NO_MOOD:
+            item["mood"] = None
+    return items
+
+
+@router.get("/moods", response_model=MoodSummaryListResponse)
+async def get_mood_summaries(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: int = Depends(get_user_id),
+    today: date = Depends(get_user_today),
+) -> Response:
+    """
+    Totals per mood over a date range (null = no mood recorded).
+
+    - If no range is provided, the last 30 days are used.
+    """
+    if not start_date or not end_date:
+        start_date, end_date = _default_date_range(today)
+    return await _cached_response(
+        request,
+        user_id,
+        ("moods", start_date, end_date),
+        (start_date, end_date),
+        MoodSummaryListResponse,
+        _mood_summaries,
+        start_date,
+        end_date,
+    )
+
 
+@router.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, int]:
+    """Hit/miss/eviction counters of the in-process summary cache."""
+    return summary_cache.stats()
@@ -0,0 +1,62 @@
+from datetime import datetime, tzinfo
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_user_id
+from app.core.cache import summary_cache
+from app.core.metrics import InstrumentedRoute
+from app.db.session import DBSession, db_dependency, run_db
+from app.schemas.user import TimezoneRequest, TimezoneResponse
+from app.services.analytics import column_store
+from app.services.timezones import InvalidTimezone, store_timezone, user_zones, zone_name
+
+router = APIRouter(prefix="/user", tags=["user"], route_class=InstrumentedRoute)
+
+
+def _timezone_response(zone: tzinfo) -> TimezoneResponse:
+    return TimezoneResponse(timezone=zone_name(zone), today=datetime.now(zone).date())
+
+
+def _get_timezone(db: Session, user_id: int) -> TimezoneResponse:
+    return _timezone_response(user_zones.get(db, user_id))
+
+
+@router.get("/timezone", response_model=TimezoneResponse)
+async def get_timezone(
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+) -> TimezoneResponse:
+    """The calling user's stored time zone (null = UTC) and current local day."""
+    return await run_db(db, _get_timezone, user_id)
+
+
+def _set_timezone(db: Session, user_id: int, name: Optional[str]) -> TimezoneResponse:
+    try:
+        zone = store_timezone(db, user_id, name)
+    except InvalidTimezone as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    # Default ranges and the current streak are relative to the local day;
+    # heatmap hours are local to the zone.
+    summary_cache.invalidate_user(user_id)
+    column_store.invalidate(user_id)
+    return _timezone_response(zone)
+
+
+@router.put("/timezone", response_model=TimezoneResponse)
+async def set_timezone(
+    payload: TimezoneRequest,
+    user_id: int = Depends(get_user_id),
+    db: DBSession = Depends(db_dependency),
+) -> TimezoneResponse:
+    """
+    Store the calling user's time zone once, as an IANA name.
+
+    It decides the user's "today" (default summary and analytics ranges,
+    current streak) and the local date of sessions started without
+    `tz_offset_minutes`, correctly across DST changes, and the hour of
+    sessions in hour-of-day breakdowns. Dates and stored hourly totals of
+    existing sessions are not changed.
+    """
+    return await run_db(db, _set_timezone, user_id, payload.timezone)
@@ -0,0 +1,229 @@
+"""
+Maintenance commands for the tracker database.
+
+Run from the `backend/` directory:
+
+    python -m app.cli migrate
+    python -m app.cli rebuild-rollups
+    python -m app.cli rebuild-breakdowns
+    python -m app.cli repair-streaks
+    python -m app.cli sweep-sessions --max-minutes 720
+    python -m app.cli import-sessions history.csv --user-id 1
+    python -m app.cli archive-sessions --after-days 365
+    python -m app.cli check-summaries [--repair] [--workers 4]
+
+Commands that rewrite summaries tell running servers to drop what they
+have cached (through `app.core.changes`).
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+from app.core.cache import summary_cache
+from app.core.config import get_settings
+from app.db.migrations import HEAD, current_version, migrate
+from app.db.partitions import maintain_partitions
+from app.db.session import SessionLocal, get_engine
+from app.services.analytics import column_store
+from app.services.archive import session_archive
+from app.services.consistency import check_daily_summaries
+from app.services.imports import (
+    IMPORT_FORMATS,
+    SessionImportError,
+    import_sessions,
+    read_records,
+)
+from app.services.summaries import rebuild_breakdowns, rebuild_rollups, repair_streaks
+from app.services.sweeper import SessionSweeper
+
+
+def _cmd_migrate(args: argparse.Namespace) -> None:
+    if args.status:
+        print(f"Schema version {current_version(get_engine())} (latest {HEAD}).")
+        return
+    before, after = migrate(get_engine())
+    if before == after:
+        print(f"Schema is up to date (version {after}).")
+    else:
+        print(f"Migrated schema from version {before} to {after}.")
+    created = maintain_partitions(get_engine(), get_settings().PARTITION_MONTHS_AHEAD)
+    if created:
+        print(f"Created partitions {', '.join(created)}.")
+
+
+def _cmd_rebuild_rollups(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        weeks, months = rebuild_rollups(db)
+    finally:
+        db.close()
+    summary_cache.clear()
+    print(f"Rebuilt {weeks} weekly and {months} monthly summaries.")
+
+
+def _cmd_rebuild_breakdowns(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        hours, moods = rebuild_breakdowns(db)
+    finally:
+        db.close()
+    summary_cache.clear()
+    print(f"Rebuilt {hours} hourly and {moods} mood summaries.")
+
+
+def _cmd_repair_streaks(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        users = repair_streaks(db)
+    finally:
+        db.close()
+    summary_cache.clear()
+    print(f"Recomputed streak state for {users} user(s).")
+
+
+def _cmd_sweep_sessions(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    sweeper = SessionSweeper(args.max_minutes, interval=0, batch_size=settings.SWEEP_BATCH_SIZE)
+    sweeper.open(SessionLocal)
+    closed = sweeper.sweep()
+    print(f"Closed {closed} session(s) open longer than {args.max_minutes} minutes.")
+
+
+def _cmd_import_sessions(args: argparse.Namespace) -> None:
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as fh:
+            result = import_sessions(db, args.user_id, read_records(fh, fmt))
+    except SessionImportError as exc:
+        raise SystemExit(f"Import failed, nothing was written: {exc}")
+    finally:
+        db.close()
+    summary_cache.invalidate_user(args.user_id)
+    column_store.invalidate(args.user_id)
+    print(
+        f"Imported {result.imported} session(s) for user {args.user_id} "
+        f"({result.first_date} .. {result.last_date}) in {time.perf_counter() - started:.1f}s."
+    )
+
+
+def _cmd_archive_sessions(args: argparse.Namespace) -> None:
+    session_archive.after_days = args.after_days
+    cutoff = session_archive.cutoff()
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        months = session_archive.archive(db, cutoff)
+    finally:
+        db.close()
+    for month, rows in months:
+        size = os.path.getsize(session_archive.path_for(month))
+        print(f"  {month:%Y-%m}: {rows} session(s) archived, segment {size / 1024:.0f} KiB")
+    print(
+        f"Archived {sum(rows for _, rows in months)} session(s) dated before {cutoff} "
+        f"to {session_archive.directory} in {time.perf_counter() - started:.1f}s."
+    )
+
+
+def _cmd_check_summaries(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = check_daily_summaries(
+            db,
+            start=args.start,
+            end=args.end,
+            chunk_days=args.chunk_days,
+            workers=args.workers,
+            repair=args.repair,
+            batch_size=args.batch_size,
+        )
+    finally:
+        db.close()
+    if result.start is None:
+        print("No sessions or daily summaries to check.")
+        return
+    for c in result.samples:
+        print(f"  user {c.user_id} {c.day}: {c.kind}, stored {c.stored}, sessions {c.expected}")
+    print(
+        f"Checked {result.start} .. {result.end} in {result.chunks} chunk(s): "
+        f"{result.mismatches} day(s) differ ({result.missing} missing, {result.orphaned} "
+        f"without sessions, {result.wrong} wrong) for {result.users} user(s), "
+        f"{time.perf_counter() - started:.1f}s."
+    )
+    if result.repaired:
+        print(f"Repaired {result.repaired} daily summaries and those users' rollups and streaks.")
+    elif result.mismatches:
+        raise SystemExit("Run again with --repair to fix them.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrator = commands.add_parser(
+        "migrate", help="Apply pending schema migrations (safe to run while serving)."
+    )
+    migrator.add_argument("--status", action="store_true", help="Only print the version.")
+    migrator.set_defaults(func=_cmd_migrate, migrates=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-rollups", help="Recompute weekly/monthly rollups from daily summaries."
+    )
+    rebuild.set_defaults(func=_cmd_rebuild_rollups)
+
+    breakdowns = commands.add_parser(
+        "rebuild-breakdowns", help="Recompute hour-of-day and mood summaries from sessions."
+    )
+    breakdowns.set_defaults(func=_cmd_rebuild_breakdowns)
+
+    streaks = commands.add_parser(
+        "repair-streaks", help="Recompute the persisted streak state from daily summaries."
+    )
+    streaks.set_defaults(func=_cmd_repair_streaks)
+
+    sweep = commands.add_parser(
+        "sweep-sessions", help="Close sessions left open longer than --max-minutes now."
+    )
+    sweep.add_argument("--max-minutes", type=int, default=get_settings().SESSION_MAX_MINUTES)
+    sweep.set_defaults(func=_cmd_sweep_sessions)
+
+    importer = commands.add_parser(
+        "import-sessions", help="Bulk-import finished sessions from a CSV or NDJSON file."
+    )
+    importer.add_argument("path")
+    importer.add_argument("--user-id", type=int, default=get_settings().DEFAULT_USER_ID)
+    importer.add_argument("--format", choices=IMPORT_FORMATS)
+    importer.set_defaults(func=_cmd_import_sessions)
+
+    archiver = commands.add_parser(
+        "archive-sessions",
+        help="Move finished sessions of months older than --after-days to the archive.",
+    )
+    archiver.add_argument("--after-days", type=int, default=get_settings().ARCHIVE_AFTER_DAYS)
+    archiver.set_defaults(func=_cmd_archive_sessions)
+
+    settings = get_settings()
+    checker = commands.add_parser(
+        "check-summaries",
+        help="Compare daily summaries with sessions (and the archive); --repair fixes them.",
+    )
+    checker.add_argument("--start", type=date.fromisoformat, help="first day (default: all data)")
+    checker.add_argument("--end", type=date.fromisoformat, help="last day (default: all data)")
+    checker.add_argument("--repair", action="store_true", help="apply the corrections")
+    checker.add_argument("--workers", type=int, default=settings.CHECK_WORKERS, help="0 = one per CPU")
+    checker.add_argument("--chunk-days", type=int, default=settings.CHECK_CHUNK_DAYS)
+    checker.add_argument("--batch-size", type=int, default=settings.CHECK_BATCH_SIZE)
+    checker.set_defaults(func=_cmd_check_summaries)
+
+    args = parser.parse_args()
+    # Every other command works on the current schema.
+    if not getattr(args, "migrates", False):
+        migrate(get_engine())
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
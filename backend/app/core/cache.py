@@ -0,0 +1,218 @@
+"""
+In-process read cache for summary responses.
+
+Entries hold the already-serialized JSON body plus its ETag, so a hit skips
+both the DB query and Pydantic serialization. Writes invalidate precisely by
+date: each entry records the date span it covers, and `end_session` drops
+only the entries whose span contains the affected day. Other processes
+(workers, CLI commands) hear of every invalidation through
+`app.core.changes` and drop the user's entries.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Hashable, Optional, Tuple
+
+from app.core.changes import change_counters
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    body: bytes
+    etag: str
+    # Inclusive date span the entry depends on; None = only streak changes.
+    span: Optional[Tuple[date, date]]
+    expires_at: float
+    # Also dropped on streak changes (always true for span None).
+    streaks: bool = False
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+class UserVersions:
+    """
+    Per-user fill guards of an in-process cache; callers hold the cache's lock.
+
+    `of(user_id)` is read before loading a user's data and compared after:
+    a load that raced with `bump(user_id)` is returned but not stored. Other
+    users' loads are unaffected; `bump_all()` guards against everyone's.
+    At most `max_users` counters are kept: past that a new epoch replaces
+    them all (only loads in flight lose, no cached data).
+    """
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._epoch = 0
+        self._users: Dict[Optional[int], int] = {}
+
+    def of(self, user_id: Optional[int]) -> Tuple[int, int]:
+        return self._epoch, self._users.get(user_id, 0)
+
+    def bump(self, user_id: Optional[int]) -> None:
+        if user_id not in self._users and len(self._users) >= self.max_users:
+            self.bump_all()
+        self._users[user_id] = self._users.get(user_id, 0) + 1
+
+    def bump_all(self) -> None:
+        self._epoch += 1
+        self._users.clear()
+
+
+class SummaryCache:
+    """
+    Bounded LRU + TTL cache keyed by (user, kind, range).
+
+    Thread-safe: sync-mode routes run in the threadpool. Per-user versions
+    guard against a slow reader caching a result computed before a write
+    that invalidated it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = UserVersions(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def version_of(self, user_id: Optional[int]) -> Tuple[int, int]:
+        """Fill guard of `user_id`'s entries: read it before the query, pass it to `put`."""
+        change_counters.track(user_id)
+        with self._lock:
+            return self._versions.of(user_id)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(
+        self,
+        key: Hashable,
+        body: bytes,
+        span: Optional[Tuple[date, date]],
+        version: Tuple[int, int],
+        streaks: bool = False,
+    ) -> CacheEntry:
+        """
+        Store `body` under `key` (user_id first) and return the entry.
+
+        `version` is `version_of(user_id)` read before the DB query; if a
+        write invalidated the user's entries since, the entry is returned
+        but not stored. `streaks` marks an entry with a span that also embeds
+        streaks (the dashboard).
+        """
+        entry = CacheEntry(
+            body=body,
+            etag=make_etag(body),
+            span=span,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            streaks=streaks or span is None,
+        )
+        if not self.enabled:
+            return entry
+        with self._lock:
+            if version != self._versions.of(key[0]):
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate_day(self, user_id: Optional[int], day: date, streaks: bool = False) -> int:
+        """
+        Drop `user_id`'s entries whose span covers `day`.
+
+        Streak entries (span None, or put with `streaks`) are also dropped
+        when `streaks` is set, i.e. when `day` just received its first session.
+        """
+        with self._lock:
+            self._versions.bump(user_id)
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if key[0] == user_id
+                and (
+                    (entry.streaks and streaks)
+                    or (entry.span is not None and entry.span[0] <= day <= entry.span[1])
+                )
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        change_counters.bump(user_id)
+        return len(stale)
+
+    def invalidate_user(self, user_id: Optional[int]) -> int:
+        """Drop every entry of `user_id` (e.g. after a bulk import)."""
+        dropped = self.forget(user_id)
+        change_counters.bump(user_id)
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry, here and in other processes (after bulk rebuilds)."""
+        self.forget_all()
+        change_counters.bump(None)
+
+    def forget(self, user_id: Optional[int]) -> int:
+        """Drop `user_id`'s entries in this process only (see `app.core.changes`)."""
+        with self._lock:
+            self._versions.bump(user_id)
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def forget_all(self) -> None:
+        with self._lock:
+            self._versions.bump_all()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_settings = get_settings()
+
+summary_cache = SummaryCache(
+    max_entries=_settings.SUMMARY_CACHE_MAX_ENTRIES,
+    ttl_seconds=_settings.SUMMARY_CACHE_TTL_SECONDS,
+    enabled=_settings.SUMMARY_CACHE_ENABLED,
+)
+change_counters.register(summary_cache)
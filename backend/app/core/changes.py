@@ -0,0 +1,236 @@
+"""
+Cross-process change counters: cache coherence for multi-worker deployments.
+
+Each worker process keeps per-user state in memory (summary cache, analytics
+columns, time zones). Writes invalidate it precisely in the process that made
+them; every other process on the host learns about them through one small
+file of per-user change counters that all of them memory-map:
+
+- after committing, a write bumps its user's counter (the caches'
+  invalidation methods do it), or the global counter for changes to everyone;
+- before serving a user, a process compares the counter with the value it
+  last caught up with (`sync`, called from `get_user_id`): two memory reads,
+  no syscall or query. If it moved, another process wrote meanwhile and the
+  user's local state is dropped (all of it, if the global counter moved).
+
+A process that bumps a counter it had caught up with stays caught up (it has
+already invalidated precisely), so one worker behaves as before. Users share
+`CACHE_SYNC_SLOTS` counters (user_id modulo): a collision costs an extra
+reload, never a stale read. CLI commands bump the same file, so running
+servers see their repairs immediately.
+"""
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Protocol
+
+from app.core.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; run a single worker.
+    fcntl = None
+
+# Slot 0 counts changes to everyone; users hash onto the others.
+_EVERYONE = 0
+_COUNTER_BYTES = 8
+
+
+class LocalState(Protocol):
+    """Per-process cache whose entries `ChangeCounters` may drop."""
+
+    def forget(self, user_id: int) -> None: ...
+
+    def forget_all(self) -> None: ...
+
+
+class Watermark:
+    """
+    Counter values one consumer in this process has caught up with.
+
+    `catch_up(user_id)` reports (through `forget_user` / `forget_all`)
+    changes made since its previous call for that user. A user seen for the
+    first time is only recorded: consumers `track` a user before holding any
+    state of theirs, so there is nothing to drop. Bounded LRU: a user pushed
+    out is reported changed right away, since changes to them go unnoticed
+    from then on.
+    """
+
+    def __init__(
+        self,
+        counters: "ChangeCounters",
+        max_users: int,
+        forget_user: Callable[[int], None],
+        forget_all: Callable[[], None],
+    ) -> None:
+        self.counters = counters
+        self.max_users = max_users
+        self.forget_user = forget_user
+        self.forget_all = forget_all
+        self.users: "OrderedDict[int, int]" = OrderedDict()
+        self.everyone: Optional[int] = None
+
+    def catch_up(self, user_id: int) -> bool:
+        """Drop what changed for `user_id` (or everyone) elsewhere; True if anything had."""
+        counters = self.counters.view()
+        with self.counters.lock:
+            everyone = counters[_EVERYONE]
+            current = counters[self.counters.slot(user_id)]
+            seen = self.users.get(user_id)
+            everyone_changed = self.everyone is not None and everyone != self.everyone
+            user_changed = seen is not None and seen != current
+            self.everyone = everyone
+            evicted = self._record(user_id, current)
+        self._evict(evicted)
+        if everyone_changed:
+            self.forget_all()
+        elif user_changed:
+            self.forget_user(user_id)
+        return everyone_changed or user_changed
+
+    def track(self, user_id: Optional[int]) -> None:
+        """Start tracking `user_id` (None: everyone) from now on, if not tracked yet."""
+        counters = self.counters.view()
+        evicted: List[int] = []
+        with self.counters.lock:
+            if self.everyone is None:
+                self.everyone = counters[_EVERYONE]
+            if user_id is not None and user_id not in self.users:
+                evicted = self._record(user_id, counters[self.counters.slot(user_id)])
+        self._evict(evicted)
+
+    def _record(self, user_id: int, current: int) -> List[int]:
+        # Caller holds the lock; returns the users pushed out of the LRU.
+        self.users[user_id] = current
+        self.users.move_to_end(user_id)
+        evicted = []
+        while len(self.users) > self.max_users:
+            evicted.append(self.users.popitem(last=False)[0])
+        return evicted
+
+    def _evict(self, user_ids: List[int]) -> None:
+        for user_id in user_ids:
+            self.forget_user(user_id)
+
+    def _adopt(self, user_id: Optional[int], before: int, after: int) -> None:
+        # Caller holds the lock: our own bump is not a change made elsewhere.
+        if user_id is None:
+            if self.everyone == before:
+                self.everyone = after
+        elif self.users.get(user_id) == before:
+            self.users[user_id] = after
+
+
+class ChangeCounters:
+    """Per-user change counters in a file memory-mapped by every process on the host."""
+
+    def __init__(self, path: str, slots: int, max_users: int, enabled: bool = True) -> None:
+        self.path = path
+        self.slots = slots
+        self.max_users = max_users
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._view: Optional[memoryview] = None
+        self._marks: List[Watermark] = []
+        self._caches: List[LocalState] = []
+        self.requests = self.watermark(max_users, self._forget_user, self._forget_all)
+        self.bumps = 0
+        self.syncs = 0
+        self.dropped = 0
+        # A forked child maps the file anew: flock does not exclude processes
+        # sharing one open file description.
+        os.register_at_fork(after_in_child=self._unmap)
+
+    def _unmap(self) -> None:
+        self._fd = None
+        self._view = None
+
+    def slot(self, user_id: int) -> int:
+        return 1 + user_id % (self.slots - 1)
+
+    def view(self) -> memoryview:
+        """The shared counters, mapped on first use (after any fork)."""
+        if self._view is None:
+            with self.lock:
+                if self._view is None:
+                    size = self.slots * _COUNTER_BYTES
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    # Growing is idempotent, so concurrent first users are fine.
+                    if os.fstat(fd).st_size < size:
+                        os.ftruncate(fd, size)
+                    self._fd = fd
+                    self._view = memoryview(mmap.mmap(fd, size)).cast("Q")
+        return self._view
+
+    def register(self, cache: LocalState) -> None:
+        """Have `sync` drop `cache`'s entries of users changed elsewhere."""
+        self._caches.append(cache)
+
+    def watermark(
+        self, max_users: int, forget_user: Callable[[int], None], forget_all: Callable[[], None]
+    ) -> Watermark:
+        """A further consumer of changes made elsewhere (e.g. push clients)."""
+        mark = Watermark(self, max_users, forget_user, forget_all)
+        with self.lock:
+            self._marks.append(mark)
+        return mark
+
+    def bump(self, user_id: Optional[int]) -> None:
+        """Record a committed change to `user_id`'s data (None: everyone's)."""
+        if not self.enabled:
+            return
+        counters = self.view()
+        slot = _EVERYONE if user_id is None else self.slot(user_id)
+        with self.lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                before = counters[slot]
+                counters[slot] = before + 1
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            for mark in self._marks:
+                mark._adopt(user_id, before, before + 1)
+            self.bumps += 1
+
+    def sync(self, user_id: int) -> None:
+        """Drop this process's cached state of `user_id` if another process changed it."""
+        if not self.enabled:
+            return
+        dropped = self.requests.catch_up(user_id)
+        with self.lock:
+            self.syncs += 1
+            self.dropped += dropped
+
+    def track(self, user_id: int) -> None:
+        """
+        Note that this process is about to cache state of `user_id` (loaded
+        from now on); caches call it before loading, outside their own lock.
+        """
+        if self.enabled:
+            self.requests.track(user_id)
+
+    def _forget_user(self, user_id: int) -> None:
+        for cache in self._caches:
+            cache.forget(user_id)
+
+    def _forget_all(self) -> None:
+        for cache in self._caches:
+            cache.forget_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"bumps": self.bumps, "syncs": self.syncs, "dropped": self.dropped}
+
+
+_settings = get_settings()
+
+change_counters = ChangeCounters(
+    path=_settings.CACHE_SYNC_PATH,
+    slots=_settings.CACHE_SYNC_SLOTS,
+    max_users=_settings.CACHE_SYNC_MAX_USERS,
+    enabled=_settings.CACHE_SYNC_ENABLED,
+)
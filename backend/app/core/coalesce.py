@@ -0,0 +1,73 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When many requests ask for the same thing at once (every open tab calling
+`/session/active` on reload, a burst of dashboards missing the summary
+cache), the first one runs the query and the others await its result
+instead of each checking out a pooled connection and running it again.
+Only overlapping calls share: once a flight lands the next call starts a
+new one, so nothing is cached here (`app.core.cache` does that).
+
+A key must capture everything the result depends on. Writers `forget` the
+keys they affect, so a read that starts after a write never joins a flight
+that began before it. Flights are asyncio tasks on the server's event loop;
+no locking is needed.
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """At most one in-flight call per key; concurrent callers share its outcome."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()`, or the flight already running under `key`.
+
+        Exceptions reach every caller of the flight. The flight is shielded:
+        a caller going away does not cancel the query the others wait for.
+        """
+        if not self.enabled:
+            return await fn()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(functools.partial(self._land, key))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: "asyncio.Future[Any]") -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # retrieved even if every caller went away
+
+    def forget(self, key: Hashable) -> None:
+        """Make later calls for `key` start a new flight (after a write)."""
+        self._flights.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+
+_settings = get_settings()
+
+read_flights = SingleFlight(enabled=_settings.COALESCE_READS)
@@ -2,6 +2,23 @@ import os
 from functools import lru_cache
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Parse a boolean flag from the environment (1/true/yes/on)."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _async_url_from(url: str) -> str:
+    """Derive an async driver DSN from the sync one (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
 class Settings:
     """Application configuration loaded from environment variables.
 
@@ -17,9 +34,142 @@ class Settings:
         "DATABASE_URL", "sqlite:///./instagram_tracker.db"
     )
 
+    # Optional separate DSN for read-only traffic (summary endpoints); on
+    # SQLite this is the same file opened through a query-only pool.
+    READ_DATABASE_URL: str = os.getenv("READ_DATABASE_URL", DATABASE_URL)
+
+    # Connection pool sizing for the read/write and read-only pools.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    READ_POOL_SIZE: int = int(os.getenv("READ_POOL_SIZE", "10"))
+    READ_MAX_OVERFLOW: int = int(os.getenv("READ_MAX_OVERFLOW", "20"))
+
+    # SQLite performance profile, applied on every new connection. WAL lets
+    # dashboard reads proceed while `end_session` commits.
+    SQLITE_TUNING: bool = _env_bool("SQLITE_TUNING", True)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # User assumed when a request carries no X-User-Id header (and owner of
+    # rows created before multi-user support).
+    DEFAULT_USER_ID: int = int(os.getenv("DEFAULT_USER_ID", "1"))
+
+    # Apply pending schema migrations at startup (under a DB lock, so
+    # concurrently starting workers are safe). Turn off to run
+    # `python -m app.cli migrate` as a separate deploy step instead.
+    DB_AUTO_MIGRATE: bool = _env_bool("DB_AUTO_MIGRATE", True)
+
+    # Postgres only: monthly `sessions` partitions created ahead of time at
+    # every startup and `migrate` (rows of months without one land in the
+    # default partition and are moved out when the month is created).
+    PARTITION_MONTHS_AHEAD: int = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+    # Opt-in async mode: routers talk to an AsyncEngine/AsyncSession
+    # instead of tying up a threadpool worker per request.
+    DB_ASYNC: bool = _env_bool("DB_ASYNC")
+    ASYNC_DATABASE_URL: str = os.getenv(
+        "ASYNC_DATABASE_URL", _async_url_from(DATABASE_URL)
+    )
+    ASYNC_READ_DATABASE_URL: str = os.getenv(
+        "ASYNC_READ_DATABASE_URL", _async_url_from(READ_DATABASE_URL)
+    )
+
+    # In-process cache for /summary/* responses (invalidated on session end).
+    SUMMARY_CACHE_ENABLED: bool = _env_bool("SUMMARY_CACHE_ENABLED", True)
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1024"))
+    SUMMARY_CACHE_TTL_SECONDS: float = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "300"))
+
+    # Concurrent identical reads (/session/active, summary cache misses)
+    # share one in-flight query instead of each running it.
+    COALESCE_READS: bool = _env_bool("COALESCE_READS", True)
+
+    # Per-client token buckets (client = remote address): sustained
+    # requests per second and burst, for reads (GET) and for writes. Requests
+    # over the limit get 429 before touching the DB. At most
+    # RATE_LIMIT_MAX_CLIENTS buckets are kept (least recently seen dropped).
+    # Buckets are per worker process: N workers allow up to N times these.
+    # Users behind one NAT or proxy address share a bucket (see README).
+    RATE_LIMIT_ENABLED: bool = _env_bool("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_READ_PER_SECOND: float = float(os.getenv("RATE_LIMIT_READ_PER_SECOND", "20"))
+    RATE_LIMIT_READ_BURST: int = int(os.getenv("RATE_LIMIT_READ_BURST", "60"))
+    RATE_LIMIT_WRITE_PER_SECOND: float = float(os.getenv("RATE_LIMIT_WRITE_PER_SECOND", "5"))
+    RATE_LIMIT_WRITE_BURST: int = int(os.getenv("RATE_LIMIT_WRITE_BURST", "20"))
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+    # Cache coherence across worker processes on one host: writes bump
+    # per-user counters in a memory-mapped file that every process checks
+    # before serving a user (see app.core.changes). Keep it on whenever more
+    # than one process (workers, CLI commands) touches the DB.
+    CACHE_SYNC_ENABLED: bool = _env_bool("CACHE_SYNC_ENABLED", True)
+    CACHE_SYNC_PATH: str = os.getenv("CACHE_SYNC_PATH", "./instagram_tracker.changes")
+    # Shared counters (users hash onto them) and users tracked per process.
+    CACHE_SYNC_SLOTS: int = int(os.getenv("CACHE_SYNC_SLOTS", "65536"))
+    CACHE_SYNC_MAX_USERS: int = int(os.getenv("CACHE_SYNC_MAX_USERS", "100000"))
+
+    # Opt-in write-behind ingestion: session start/end events are appended to
+    # a local log and acked at once; a background worker group-commits them.
+    INGEST_QUEUE_ENABLED: bool = _env_bool("INGEST_QUEUE_ENABLED")
+    INGEST_LOG_PATH: str = os.getenv("INGEST_LOG_PATH", "./instagram_tracker.ingest.log")
+    # Pending events that trigger an early flush, and the max time between flushes.
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+    INGEST_FLUSH_INTERVAL_MS: int = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", "50"))
+    # fsync every appended event (power-loss safe) instead of only flushing
+    # to the OS (process-crash safe, like SQLite's synchronous=NORMAL).
+    INGEST_FSYNC: bool = _env_bool("INGEST_FSYNC")
+
+    # Built-in instrumentation: per-route histograms at /metrics and a
+    # Server-Timing header (app / db / serialization time) on responses.
+    METRICS_ENABLED: bool = _env_bool("METRICS_ENABLED", True)
+    SERVER_TIMING_ENABLED: bool = _env_bool("SERVER_TIMING_ENABLED", True)
+
+    # Opt-in fast JSON path: list/summary payloads are built from DB rows and
+    # encoded with orjson instead of Pydantic models (needs `orjson`).
+    FAST_JSON: bool = _env_bool("FAST_JSON")
+
+    # Users whose sessions are kept as in-memory columns for /analytics.
+    ANALYTICS_MAX_USERS: int = int(os.getenv("ANALYTICS_MAX_USERS", "256"))
+
+    # Users whose time zone (users.timezone) is cached in-process.
+    TIMEZONE_CACHE_MAX_USERS: int = int(os.getenv("TIMEZONE_CACHE_MAX_USERS", "100000"))
+
+    # Stale-session sweeper: sessions left open longer than this are closed
+    # with the capped duration and folded into the summaries (0 disables).
+    SESSION_MAX_MINUTES: int = int(os.getenv("SESSION_MAX_MINUTES", "720"))
+    SWEEP_INTERVAL_SECONDS: float = float(os.getenv("SWEEP_INTERVAL_SECONDS", "60"))
+    # Sessions closed per transaction.
+    SWEEP_BATCH_SIZE: int = int(os.getenv("SWEEP_BATCH_SIZE", "500"))
+
+    # Archive of cold sessions (`python -m app.cli archive-sessions`):
+    # finished sessions of whole months older than ARCHIVE_AFTER_DAYS move
+    # to compressed monthly segment files in ARCHIVE_DIR.
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "./instagram_tracker.archive")
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    # Rows per compressed block; readers decompress whole blocks.
+    ARCHIVE_BLOCK_ROWS: int = int(os.getenv("ARCHIVE_BLOCK_ROWS", "16384"))
+
+    # Daily summary consistency check (`python -m app.cli check-summaries`):
+    # days per chunk, worker processes (0 = one per CPU) and corrected rows
+    # per repair transaction.
+    CHECK_CHUNK_DAYS: int = int(os.getenv("CHECK_CHUNK_DAYS", "31"))
+    CHECK_WORKERS: int = int(os.getenv("CHECK_WORKERS", "0"))
+    CHECK_BATCH_SIZE: int = int(os.getenv("CHECK_BATCH_SIZE", "1000"))
+
+    # Push channel (/events SSE + WebSocket): session start/end and changed
+    # summary rows are broadcast to the user's connected clients.
+    PUSH_ENABLED: bool = _env_bool("PUSH_ENABLED", True)
+    # Events buffered per client before it is told to resync instead.
+    PUSH_QUEUE_SIZE: int = int(os.getenv("PUSH_QUEUE_SIZE", "100"))
+    # Idle interval after which SSE streams send a keep-alive comment.
+    PUSH_HEARTBEAT_SECONDS: float = float(os.getenv("PUSH_HEARTBEAT_SECONDS", "15"))
+    # How often clients are told to resync after another process (worker,
+    # CLI command) changed their user's data.
+    PUSH_RELAY_INTERVAL_SECONDS: float = float(os.getenv("PUSH_RELAY_INTERVAL_SECONDS", "1"))
+
 
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
-
-
@@ -0,0 +1,334 @@
+"""
+Built-in request instrumentation, exported in Prometheus text format.
+
+Per request we track total latency, DB queries/time (cursor execute hooks)
+and serialization time (from endpoint return to response, plus explicit
+`timed_serialization()` blocks). Numbers go to per-route histograms served
+at `/metrics` and to a `Server-Timing` header on every response.
+
+Kept cheap enough to leave on: a pure ASGI middleware, one contextvar per
+request, and a single lock acquisition when the request finishes.
+"""
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SERIALIZATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 100)
+
+# Route label for requests that matched no route (keeps label cardinality bounded).
+UNMATCHED_ROUTE = "<unmatched>"
+BACKGROUND_ROUTE = "<background>"
+
+Labels = Tuple[str, ...]
+
+
+class RequestMetrics:
+    """Counters for the request running in the current context."""
+
+    __slots__ = ("started", "db_queries", "db_seconds", "endpoint_done", "serialize_seconds")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.endpoint_done: Optional[float] = None
+        self.serialize_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; callers hold the registry lock."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Process-wide metric families keyed by label values."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._latency: Dict[Labels, Histogram] = {}
+        self._serialization: Dict[Labels, Histogram] = {}
+        self._queries_per_request: Dict[Labels, Histogram] = {}
+        self._db_queries: Dict[Labels, int] = {}
+        self._db_seconds: Dict[Labels, float] = {}
+
+    @staticmethod
+    def _histogram(family: Dict[Labels, Histogram], labels: Labels, buckets: Sequence[float]) -> Histogram:
+        hist = family.get(labels)
+        if hist is None:
+            hist = family[labels] = Histogram(buckets)
+        return hist
+
+    def observe_request(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestMetrics
+    ) -> None:
+        with self._lock:
+            self._histogram(self._latency, (method, route, str(status)), LATENCY_BUCKETS).observe(
+                seconds
+            )
+            self._histogram(self._serialization, (route,), SERIALIZATION_BUCKETS).observe(
+                stats.serialize_seconds
+            )
+            self._histogram(self._queries_per_request, (route,), QUERY_COUNT_BUCKETS).observe(
+                stats.db_queries
+            )
+            self._add_db((route,), stats.db_queries, stats.db_seconds)
+
+    def observe_background_query(self, seconds: float) -> None:
+        with self._lock:
+            self._add_db((BACKGROUND_ROUTE,), 1, seconds)
+
+    def _add_db(self, labels: Labels, queries: int, seconds: float) -> None:
+        self._db_queries[labels] = self._db_queries.get(labels, 0) + queries
+        self._db_seconds[labels] = self._db_seconds.get(labels, 0.0) + seconds
+
+    def render(
+        self,
+        gauges: Optional[Dict[str, float]] = None,
+        counters: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+
+        `gauges` are current values; `counters` only ever grow and are
+        exported with a `_total` suffix so `rate()`/`increase()` apply.
+        """
+        lines: List[str] = []
+        with self._lock:
+            self._render_histograms(
+                lines,
+                "http_request_duration_seconds",
+                "Request latency by route.",
+                ("method", "route", "status"),
+                self._latency,
+            )
+            self._render_histograms(
+                lines,
+                "http_response_serialization_seconds",
+                "Time spent serializing responses by route.",
+                ("route",),
+                self._serialization,
+            )
+            self._render_histograms(
+                lines,
+                "db_queries_per_request",
+                "SQL statements executed per request by route.",
+                ("route",),
+                self._queries_per_request,
+            )
+            self._render_counter(
+                lines, "db_queries_total", "SQL statements executed.", self._db_queries
+            )
+            self._render_counter(
+                lines, "db_query_seconds_total", "Time spent executing SQL.", self._db_seconds
+            )
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for name, value in sorted((counters or {}).items()):
+            lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(
+        lines: List[str],
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        family: Dict[Labels, Histogram],
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, hist in sorted(family.items()):
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                le = _format_labels(label_names, labels, f'le="{bound}"')
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            le = _format_labels(label_names, labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{le} {hist.count}")
+            lines.append(f"{name}_sum{_format_labels(label_names, labels)} {hist.sum}")
+            lines.append(f"{name}_count{_format_labels(label_names, labels)} {hist.count}")
+
+    @staticmethod
+    def _render_counter(
+        lines: List[str], name: str, help_text: str, family: Dict[Labels, float]
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(family.items()):
+            lines.append(f"{name}{_format_labels(('route',), labels)} {value}")
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and time on `engine` (sync, or an AsyncEngine's `sync_engine`)."""
+
+    # The start time lives on the statement's execution context, not on the
+    # pooled connection: a statement that raises never reaches
+    # `after_cursor_execute`, and nothing of it may outlive the statement.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - context._query_start
+        stats = _current.get()
+        if stats is None:
+            metrics.observe_background_query(elapsed)
+        else:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+
+@contextmanager
+def timed_serialization() -> Iterator[None]:
+    """Attribute the enclosed block to the current request's serialization time."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_seconds += time.perf_counter() - started
+
+
+def _mark_endpoint_done() -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.endpoint_done = time.perf_counter()
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    APIRoute that marks when the endpoint returns, so the time FastAPI then
+    spends validating/encoding the response model counts as serialization.
+    """
+
+    def get_route_handler(self) -> Callable:
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def timed_call(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    _mark_endpoint_done()
+
+        else:
+
+            @functools.wraps(call)
+            def timed_call(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    _mark_endpoint_done()
+
+        self.dependant.call = timed_call
+        handler = super().get_route_handler()
+
+        async def instrumented_handler(request: Any) -> Any:
+            response = await handler(request)
+            stats = _current.get()
+            if stats is not None and stats.endpoint_done is not None:
+                stats.serialize_seconds += time.perf_counter() - stats.endpoint_done
+            return response
+
+        return instrumented_handler
+
+
+def _server_timing(stats: RequestMetrics, now: float) -> bytes:
+    return (
+        f"app;dur={(now - stats.started) * 1000:.2f}, "
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_queries} queries", '
+        f"ser;dur={stats.serialize_seconds * 1000:.2f}"
+    ).encode()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency histograms + `Server-Timing`."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestMetrics()
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, time.perf_counter())))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status_code,
+                time.perf_counter() - stats.started,
+                stats,
+            )
+
+
+_settings = get_settings()
+
+metrics = MetricsRegistry(enabled=_settings.METRICS_ENABLED)
@@ -0,0 +1,137 @@
+"""
+In-process publish/subscribe for pushed updates (`/events`).
+
+Writers (sync routes in the threadpool, the ingest worker thread) publish
+per-user events; every connected SSE/WebSocket client owns a bounded
+asyncio queue on the server's event loop. Publishing for a user nobody is
+listening to costs one dict lookup, so the write path is unchanged when no
+client is connected. A client that falls behind has its backlog replaced by
+a single `resync` event (it refetches) instead of slowing writers down.
+
+Events are published by the process that made the write. With several
+worker processes, `relay_changes` tells this process's clients to resync
+when another process changed their user (see `app.core.changes`).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+from app.core.changes import change_counters
+from app.core.config import get_settings
+
+Event = Dict[str, Any]
+
+RESYNC: Event = {"type": "resync"}
+
+
+class Subscription:
+    """One connected client's queue of pending events."""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, max_pending: int) -> None:
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def _offer(self, event: Event) -> None:
+        # Runs on `loop`: the queue is not thread-safe.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> Event:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Fan-out of per-user events to subscriptions, safe to publish from any thread."""
+
+    def __init__(self, max_pending: int, enabled: bool = True) -> None:
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        # Users' changes made by other processes (see `relay_changes`).
+        self._elsewhere = change_counters.watermark(
+            change_counters.max_users, self._resync_user, self._resync_all
+        )
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Register a client; call from the event loop that will consume it."""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        if change_counters.enabled:
+            self._elsewhere.track(user_id)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        # Unlocked read: a client connecting concurrently refetches on connect.
+        return user_id in self._subscribers
+
+    def publish(self, user_id: int, event: Event) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # Loop already closed (shutdown); the client is gone anyway.
+                self.unsubscribe(subscription)
+
+    def _resync_user(self, user_id: int) -> None:
+        self.publish(user_id, RESYNC)
+
+    def _resync_all(self) -> None:
+        with self._lock:
+            users = list(self._subscribers)
+        for user_id in users:
+            self.publish(user_id, RESYNC)
+
+    async def relay_changes(self, interval: float) -> None:
+        """
+        Every `interval` seconds, send `resync` to clients whose user another
+        process (worker, CLI command) changed since. Runs until cancelled.
+        """
+        self._elsewhere.track(None)
+        while True:
+            await asyncio.sleep(interval)
+            with self._lock:
+                users = list(self._subscribers)
+            for user_id in users:
+                self._elsewhere.catch_up(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            subscriptions = [s for subs in self._subscribers.values() for s in subs]
+            return {
+                "users": len(self._subscribers),
+                "subscribers": len(subscriptions),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": sum(s.dropped for s in subscriptions),
+            }
+
+
+_settings = get_settings()
+
+event_broker = EventBroker(max_pending=_settings.PUSH_QUEUE_SIZE, enabled=_settings.PUSH_ENABLED)
@@ -0,0 +1,141 @@
+"""
+Per-client token-bucket rate limiting.
+
+A client is the remote address of the connection. Requests are not
+authenticated, so the `X-User-Id` header is whatever the client sends and
+keying on it would let a client dodge the limit by rotating it. Behind a
+reverse proxy, run uvicorn/gunicorn with proxy headers from trusted
+addresses only (`--forwarded-allow-ips`) so the address is the real
+client's. Users sharing one address (a NAT, a proxy without forwarded
+headers) share its buckets; raise the limits or set
+`RATE_LIMIT_ENABLED=0` for such deployments.
+
+Each client has two buckets, one for reads (GET/HEAD) and one for writes,
+refilled continuously at `RATE_LIMIT_*_PER_SECOND` up to
+`RATE_LIMIT_*_BURST` tokens. Every request takes a token; with none left
+it is answered 429 with a `Retry-After` header before any route runs, so
+a herd of reloading tabs or a client stuck in a retry loop cannot tie up
+the DB pools.
+
+Runs on the event loop only (a pure ASGI middleware), so no locking. At
+most `RATE_LIMIT_MAX_CLIENTS` buckets are kept; the least recently seen
+client is forgotten first and simply starts again with a full bucket.
+
+Buckets live in each worker process and are not shared: with N workers a
+client may get up to N times the configured rate, depending on how
+connections are spread. Size the limits per worker accordingly.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+# Paths never limited: scrapes and API docs.
+EXEMPT_PATHS = frozenset({"/metrics", "/docs", "/redoc", "/openapi.json"})
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    per_second: float
+    burst: float
+
+
+class RateLimiter:
+    """Token buckets keyed by (kind, client), with allowed/limited counters per kind."""
+
+    def __init__(
+        self, read: BucketPolicy, write: BucketPolicy, max_clients: int, enabled: bool = True
+    ) -> None:
+        self.enabled = enabled
+        self.policies = {"read": read, "write": write}
+        self.max_clients = max_clients
+        # (kind, client) -> [tokens, last refill]
+        self._buckets: "OrderedDict[Tuple[str, Hashable], List[float]]" = OrderedDict()
+        self.allowed = {"read": 0, "write": 0}
+        self.limited = {"read": 0, "write": 0}
+        self.evictions = 0
+
+    def acquire(self, kind: str, client: Hashable) -> float:
+        """Take one token from `client`'s `kind` bucket; returns 0, or seconds until one refills."""
+        policy = self.policies[kind]
+        now = time.monotonic()
+        key = (kind, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [policy.burst, now]
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.per_second)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed[kind] += 1
+            return 0.0
+        self.limited[kind] += 1
+        return (1 - bucket[0]) / policy.per_second
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clients": len(self._buckets),
+            "read_allowed": self.allowed["read"],
+            "read_limited": self.limited["read"],
+            "write_allowed": self.allowed["write"],
+            "write_limited": self.limited["write"],
+            "evictions": self.evictions,
+        }
+
+
+def client_key(scope: Scope) -> str:
+    """Remote address of the request (never a client-supplied header)."""
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware answering 429 once a client's bucket is empty."""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.limiter.enabled
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+        kind = "read" if scope["method"] in READ_METHODS else "write"
+        wait = self.limiter.acquire(kind, client_key(scope))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": "Too many requests, please retry later."},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
+
+
+_settings = get_settings()
+
+rate_limiter = RateLimiter(
+    read=BucketPolicy(_settings.RATE_LIMIT_READ_PER_SECOND, _settings.RATE_LIMIT_READ_BURST),
+    write=BucketPolicy(_settings.RATE_LIMIT_WRITE_PER_SECOND, _settings.RATE_LIMIT_WRITE_BURST),
+    max_clients=_settings.RATE_LIMIT_MAX_CLIENTS,
+    enabled=_settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,42 @@
+"""
+JSON encoding of response payloads, with an opt-in fast path.
+
+Payloads are plain dicts/lists built straight from DB rows. By default they
+are validated through their Pydantic response model and serialized with
+`.json()`; with `FAST_JSON=1` they go directly to orjson, skipping the
+per-row model objects. Routes keep `response_model`, so OpenAPI is the same
+either way.
+"""
+import json
+from typing import Any, Dict, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# orjson is only imported in fast mode, so the default deployment does not
+# need it installed.
+orjson = None
+if settings.FAST_JSON:
+    import orjson
+
+
+def fast_json_enabled() -> bool:
+    return orjson is not None
+
+
+def encode(model: Type[BaseModel], payload: Dict[str, Any]) -> bytes:
+    """Serialize `payload` as `model` would, skipping the model in fast mode."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return model.parse_obj(payload).json().encode()
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a payload that has no response model (e.g. pushed events)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
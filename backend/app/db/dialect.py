@@ -0,0 +1,211 @@
+"""
+Dialect-specific SQL, in one place.
+
+Queries elsewhere are built from these helpers, so the same code runs on
+SQLite (the default) and Postgres (`DATABASE_URL=postgresql://...`):
+
+- date bucketing of a DATE column (Monday of the ISO week, ISO year and
+  week, first of the month) with native `date_trunc` / `extract(isoyear)`
+  on Postgres and `date()` / `strftime()` arithmetic on SQLite; both give
+  exactly what `date.isocalendar()` gives;
+- the UTC hour of a timestamp, its UTC epoch second and the day number
+  (days since 1970-01-01) of a DATE column;
+- `INSERT ... ON CONFLICT` and two-argument LEAST / GREATEST;
+- the `sessions` conflict target and id sequence, which differ on Postgres
+  because the table is partitioned by month there (`app.db.partitions`);
+- filters selecting a date range of every user (`all_users_dated`).
+
+Every helper takes the Session or Connection the query will run on.
+"""
+from datetime import date
+from typing import Any, Callable, List, Union
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Insert,
+    Integer,
+    Table,
+    cast,
+    extract,
+    func,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+Bind = Union[Session, Connection]
+
+
+def dialect_name(db: Bind) -> str:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name
+
+
+def is_postgres(db: Bind) -> bool:
+    return dialect_name(db) == "postgresql"
+
+
+def dialect_insert(db: Bind) -> Callable[[Table], Insert]:
+    """`insert()` construct with ON CONFLICT support for the bound dialect."""
+    name = dialect_name(db)
+    if name == "sqlite":
+        return sqlite_insert
+    if name == "postgresql":
+        return postgresql_insert
+    raise RuntimeError(f"Summary upserts are not supported on the {name!r} dialect.")
+
+
+def least(db: Bind, a: Any, b: Any) -> Any:
+    # SQLite's multi-argument min() is a scalar function; Postgres uses LEAST.
+    return func.least(a, b) if is_postgres(db) else func.min(a, b)
+
+
+def greatest(db: Bind, a: Any, b: Any) -> Any:
+    return func.greatest(a, b) if is_postgres(db) else func.max(a, b)
+
+
+# Date bucketing ------------------------------------------------------------
+
+
+def _sqlite_weekday(day: Any) -> Any:
+    # strftime('%w') counts from Sunday = 0; shift so Monday = 0.
+    return (cast(func.strftime("%w", day), Integer) + 6) % 7
+
+
+def _sqlite_thursday(day: Any) -> Any:
+    # The Thursday of an ISO week decides its ISO year (ISO 8601).
+    return func.date(day, func.printf("%+d days", 3 - _sqlite_weekday(day)))
+
+
+def week_start(db: Bind, day: Any) -> Any:
+    """Monday of the ISO week containing DATE `day`."""
+    if is_postgres(db):
+        return cast(func.date_trunc("week", cast(day, DateTime)), Date)
+    return func.date(day, func.printf("-%d days", _sqlite_weekday(day)))
+
+
+def iso_year(db: Bind, day: Any) -> Any:
+    if is_postgres(db):
+        return cast(extract("isoyear", day), Integer)
+    return cast(func.strftime("%Y", _sqlite_thursday(day)), Integer)
+
+
+def iso_week(db: Bind, day: Any) -> Any:
+    if is_postgres(db):
+        return cast(extract("week", day), Integer)
+    return (cast(func.strftime("%j", _sqlite_thursday(day)), Integer) - 1) // 7 + 1
+
+
+def month_start(db: Bind, day: Any) -> Any:
+    """First day of the month containing DATE `day`."""
+    if is_postgres(db):
+        return cast(func.date_trunc("month", cast(day, DateTime)), Date)
+    return func.date(day, "start of month")
+
+
+def year_of(db: Bind, day: Any) -> Any:
+    return cast(extract("year", day), Integer)
+
+
+def month_of(db: Bind, day: Any) -> Any:
+    return cast(extract("month", day), Integer)
+
+
+def utc_hour(db: Bind, timestamp: Any) -> Any:
+    """Hour (0-23) of a stored timestamp, in UTC."""
+    if is_postgres(db):
+        return cast(extract("hour", func.timezone("UTC", timestamp)), Integer)
+    # SQLite stores the UTC wall time as text.
+    return cast(extract("hour", timestamp), Integer)
+
+
+def epoch_seconds(db: Bind, timestamp: Any) -> Any:
+    """Whole UTC epoch seconds of a stored timestamp (fractions dropped)."""
+    if is_postgres(db):
+        return cast(func.floor(extract("epoch", timestamp)), BigInteger)
+    return cast(func.strftime("%s", timestamp), BigInteger)
+
+
+def epoch_day(db: Bind, day: Any) -> Any:
+    """Days from 1970-01-01 to a DATE column (`archive.day_number` in SQL)."""
+    if is_postgres(db):
+        return cast(day - literal(date(1970, 1, 1), Date), Integer)
+    # julianday() of 1970-01-01 is 2440587.5 (Julian days start at noon).
+    return cast(func.julianday(day) - 2440587.5, Integer)
+
+
+# sessions ------------------------------------------------------------------
+
+
+def all_users_dated(db: Bind, user_id: Any, day: Any, first: Any, last: Any) -> List[Any]:
+    """
+    WHERE conditions for the rows of every user with `day` in [first, last].
+
+    Per-user tables are indexed on (user_id, date), with no index led by the
+    date. SQLite would scan all of such an index; listing the users turns it
+    into one seek per user. Postgres prunes `sessions` partitions by date.
+    """
+    conditions = [day >= first, day <= last]
+    if dialect_name(db) == "sqlite":
+        conditions.append(user_id.in_(select(user_id).distinct().correlate(None).scalar_subquery()))
+    return conditions
+
+
+def session_key_columns(db: Bind) -> List[str]:
+    """
+    Columns of the `sessions` unique key, for ON CONFLICT targets.
+
+    A partitioned Postgres table can only enforce uniqueness on keys that
+    include the partition column, so there it is (id, date).
+    """
+    return ["id", "date"] if is_postgres(db) else ["id"]
+
+
+def session_id_high_water(db: Bind) -> int:
+    """
+    Highest session id ever assigned, including ids of archived rows.
+
+    `MAX(id)` alone drops once `archive-sessions` deletes old rows, and ids
+    handed out again would collide with archived ones. SQLite keeps the
+    mark in `sqlite_sequence` (the table is AUTOINCREMENT, migration v5),
+    Postgres in the id sequence.
+    """
+    max_id = db.execute(text("SELECT COALESCE(MAX(id), 0) FROM sessions")).scalar()
+    if is_postgres(db):
+        used = db.execute(
+            text(
+                "SELECT last_value FROM pg_sequences WHERE "
+                "format('%I.%I', schemaname, sequencename)::regclass = "
+                "pg_get_serial_sequence('sessions', 'id')::regclass"
+            )
+        ).scalar()
+    else:
+        used = db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'sessions'")).scalar()
+    return max(max_id, used or 0)
+
+
+def sync_session_ids(db: Bind) -> None:
+    """
+    Move the Postgres id sequence past ids assigned by the application.
+
+    The ingest queue and imports may insert explicit ids; SQLite's
+    AUTOINCREMENT counter follows them automatically, a Postgres sequence
+    does not. The sequence is never moved back, so ids of archived
+    (deleted) rows are not handed out again.
+    """
+    if is_postgres(db):
+        db.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('sessions', 'id'), "
+                "GREATEST(COALESCE((SELECT MAX(id) FROM sessions), 0), "
+                "COALESCE((SELECT last_value FROM pg_sequences WHERE "
+                "format('%I.%I', schemaname, sequencename)::regclass = "
+                "pg_get_serial_sequence('sessions', 'id')::regclass), 0)) + 1, false)"
+            )
+        )
@@ -0,0 +1,104 @@
+"""
+Versioned schema migrations.
+
+The applied version lives in the one-row `schema_version` table. Each
+migration is a module `vNNN_<name>.py` in this package exposing
+`upgrade(conn)`, listed in `MIGRATIONS`; never edit one that has shipped,
+add the next instead.
+
+`migrate()` applies everything pending in a single transaction while
+holding a database-wide write lock (SQLite `BEGIN IMMEDIATE`, a Postgres
+advisory lock), then re-reads the version under that lock. Workers that
+start together therefore queue up: the first migrates, the rest find the
+schema current and do nothing, so DDL never races.
+
+Databases created before versioning (by `create_all`) have tables but no
+`schema_version`; they are adopted by bringing them to the v1 baseline in
+place (`app.db.upgrade`) before the later migrations run.
+"""
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.db.migrations import (
+    v001_baseline,
+    v002_local_date_keys,
+    v003_partition_sessions,
+    v004_local_hours,
+    v005_session_id_autoincrement,
+)
+from app.db.upgrade import adopt_legacy_schema
+from app.services.summaries import ensure_rollups
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "baseline", v001_baseline.upgrade),
+    (2, "local_date_keys", v002_local_date_keys.upgrade),
+    (3, "partition_sessions", v003_partition_sessions.upgrade),
+    (4, "local_hours", v004_local_hours.upgrade),
+    (5, "session_id_autoincrement", v005_session_id_autoincrement.upgrade),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+# Arbitrary constant naming the Postgres advisory lock held while migrating.
+_PG_LOCK_KEY = 0x1D7A_C0DE
+
+
+def _lock(conn: Connection) -> None:
+    """Start the migration transaction holding a database-wide write lock."""
+    if conn.dialect.name == "sqlite":
+        # Taken at BEGIN rather than at the first write, so a second
+        # process blocks here (busy_timeout) instead of reading a stale version.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+
+
+def _read_version(conn: Connection) -> Optional[int]:
+    if not inspect(conn).has_table("schema_version"):
+        return None
+    return conn.execute(text("SELECT version FROM schema_version")).scalar()
+
+
+def current_version(engine: Engine) -> int:
+    """Applied schema version; 0 for an empty or pre-versioning database."""
+    with engine.connect() as conn:
+        return _read_version(conn) or 0
+
+
+def migrate(engine: Engine, target: int = HEAD) -> Tuple[int, int]:
+    """
+    Apply pending migrations up to `target`; returns (version before, after).
+
+    Safe to call from every process at startup.
+    """
+    adopted = False
+    with engine.connect() as conn:
+        _lock(conn)
+        version = _read_version(conn)
+        if version is None:
+            conn.execute(text("CREATE TABLE schema_version (version INTEGER NOT NULL)"))
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (0)"))
+            version = 0
+            if inspect(conn).has_table("sessions"):
+                adopt_legacy_schema(conn, v001_baseline.metadata)
+                version = 1
+                adopted = True
+        before = version
+
+        for number, _name, upgrade in MIGRATIONS:
+            if version < number <= target:
+                upgrade(conn)
+                version = number
+        conn.execute(text("UPDATE schema_version SET version = :v"), {"v": version})
+
+        if adopted:
+            # Rollups/streaks/breakdowns missing from old databases; runs on
+            # the migrated schema in the same transaction.
+            ensure_rollups(Session(bind=conn))
+        conn.commit()
+    return (0 if adopted else before), version
@@ -0,0 +1,134 @@
+"""
+v1: baseline schema.
+
+The tables as of the switch to versioned migrations, frozen here so later
+migrations always start from the same schema whatever the models become.
+"""
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=True),
+)
+
+Table(
+    "sessions",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("start_time", DateTime(timezone=True), nullable=False),
+    Column("end_time", DateTime(timezone=True), nullable=True),
+    Column("duration_minutes", Integer, nullable=True),
+    Column("reels_watched", Integer, nullable=True),
+    Column("mood", String, nullable=True),
+    Column("date", Date, nullable=False),
+    Index(
+        "ix_sessions_active",
+        "user_id",
+        "start_time",
+        sqlite_where=text("end_time IS NULL"),
+        postgresql_where=text("end_time IS NULL"),
+    ),
+    Index("ix_sessions_user_start_time_id", "user_id", "start_time", "id"),
+    Index("ix_sessions_user_date", "user_id", "date"),
+)
+
+Table(
+    "daily_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+    UniqueConstraint("user_id", "date", name="uq_daily_summary_user_date"),
+)
+
+Table(
+    "weekly_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("week_start", Date, nullable=False),
+    Column("iso_year", Integer, nullable=False),
+    Column("iso_week", Integer, nullable=False),
+    Column("first_date", Date, nullable=False),
+    Column("last_date", Date, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+    UniqueConstraint("user_id", "week_start", name="uq_weekly_summary_user_week_start"),
+)
+
+Table(
+    "monthly_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("month_start", Date, nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("month", Integer, nullable=False),
+    Column("first_date", Date, nullable=False),
+    Column("last_date", Date, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+    UniqueConstraint("user_id", "month_start", name="uq_monthly_summary_user_month_start"),
+)
+
+Table(
+    "streak_state",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False, unique=True),
+    Column("current_start", Date, nullable=True),
+    Column("current_end", Date, nullable=True),
+    Column("longest_streak", Integer, nullable=False),
+)
+
+Table(
+    "hourly_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("hour", Integer, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+    UniqueConstraint("user_id", "date", "hour", name="uq_hourly_summary_user_date_hour"),
+)
+
+Table(
+    "mood_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("mood", String, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+    UniqueConstraint("user_id", "date", "mood", name="uq_mood_summary_user_date_mood"),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn)
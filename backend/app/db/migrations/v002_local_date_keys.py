@@ -0,0 +1,71 @@
+"""
+v2: per-user time zone and precomputed week/month keys on sessions.
+
+Adds `users.timezone` and `sessions.iso_year` / `iso_week` / `month_key`
+with their per-user indexes. Existing sessions are backfilled from their
+(already local) `date`: the keys of each distinct day are computed in
+Python, exactly as `date_keys` does for new rows, into a temporary table,
+and one UPDATE ... FROM joins it against `sessions`, a single pass however
+many rows there are.
+"""
+from datetime import date
+
+from sqlalchemy import Column, Date, Index, Integer, MetaData, Table, insert, select, text, update
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("iso_year", Integer, nullable=True),
+    Column("iso_week", Integer, nullable=True),
+    Column("month_key", Integer, nullable=True),
+)
+
+indexes = [
+    Index("ix_sessions_user_iso_week", sessions.c.user_id, sessions.c.iso_year, sessions.c.iso_week),
+    Index("ix_sessions_user_month_key", sessions.c.user_id, sessions.c.month_key),
+]
+
+day_keys = Table(
+    "tmp_session_day_keys",
+    metadata,
+    Column("date", Date, primary_key=True),
+    Column("iso_year", Integer, nullable=False),
+    Column("iso_week", Integer, nullable=False),
+    Column("month_key", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _keys(day: date) -> dict:
+    iso_year, iso_week, _ = day.isocalendar()
+    return {"date": day, "iso_year": iso_year, "iso_week": iso_week, "month_key": day.year * 100 + day.month}
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE users ADD COLUMN timezone VARCHAR"))
+    for name in ("iso_year", "iso_week", "month_key"):
+        conn.execute(text(f"ALTER TABLE sessions ADD COLUMN {name} INTEGER"))
+
+    days = conn.execute(select(sessions.c.date).distinct()).scalars().all()
+    if days:
+        day_keys.create(conn)
+        conn.execute(insert(day_keys), [_keys(day) for day in days])
+        conn.execute(
+            update(sessions)
+            .where(sessions.c.date == day_keys.c.date)
+            .values(
+                iso_year=day_keys.c.iso_year,
+                iso_week=day_keys.c.iso_week,
+                month_key=day_keys.c.month_key,
+            )
+        )
+        day_keys.drop(conn)
+
+    for index in indexes:
+        index.create(conn)
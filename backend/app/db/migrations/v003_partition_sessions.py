@@ -0,0 +1,106 @@
+"""
+v3: partition `sessions` by month on Postgres (no-op on SQLite).
+
+Postgres cannot turn an existing table into a partitioned one, so the
+table is rebuilt: a new `sessions` partitioned by RANGE (date) with a
+partition for every month that has data (plus the current month and a
+DEFAULT partition; `maintain_partitions` adds the months ahead), the
+rows copied over, and the indexes recreated on the parent, which creates
+them on every partition. The id sequence is kept.
+
+A partitioned table can only enforce keys that include the partition
+column, so the primary key becomes (id, date); ids still come from the one
+sequence and stay unique. See `app.db.dialect.session_key_columns`.
+"""
+from datetime import date
+
+from sqlalchemy import Column, Date, DateTime, Index, Integer, MetaData, String, Table, text
+from sqlalchemy.engine import Connection
+
+from app.db.partitions import DEFAULT_PARTITION, create_month
+
+NEW_TABLE = "sessions_partitioned"
+
+_COLUMNS = (
+    "id, user_id, start_time, end_time, duration_minutes, reels_watched, mood, date, "
+    "iso_year, iso_week, month_key"
+)
+
+metadata = MetaData()
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("id", Integer, nullable=False),
+    Column("user_id", Integer, nullable=False),
+    Column("start_time", DateTime(timezone=True), nullable=False),
+    Column("end_time", DateTime(timezone=True), nullable=True),
+    Column("date", Date, nullable=False),
+    Column("iso_year", Integer, nullable=True),
+    Column("iso_week", Integer, nullable=True),
+    Column("month_key", Integer, nullable=True),
+    Column("mood", String, nullable=True),
+)
+
+indexes = [
+    Index(
+        "ix_sessions_active",
+        sessions.c.user_id,
+        sessions.c.start_time,
+        postgresql_where=text("end_time IS NULL"),
+    ),
+    Index("ix_sessions_user_start_time_id", sessions.c.user_id, sessions.c.start_time, sessions.c.id),
+    Index("ix_sessions_user_date", sessions.c.user_id, sessions.c.date),
+    Index("ix_sessions_user_iso_week", sessions.c.user_id, sessions.c.iso_year, sessions.c.iso_week),
+    Index("ix_sessions_user_month_key", sessions.c.user_id, sessions.c.month_key),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('sessions', 'id')")).scalar()
+
+    conn.execute(
+        text(
+            f"""
+            CREATE TABLE {NEW_TABLE} (
+                id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+                user_id INTEGER NOT NULL,
+                start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+                end_time TIMESTAMP WITH TIME ZONE,
+                duration_minutes INTEGER,
+                reels_watched INTEGER,
+                mood VARCHAR,
+                date DATE NOT NULL,
+                iso_year INTEGER,
+                iso_week INTEGER,
+                month_key INTEGER,
+                CONSTRAINT {NEW_TABLE}_pkey PRIMARY KEY (id, date)
+            ) PARTITION BY RANGE (date)
+            """
+        )
+    )
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {NEW_TABLE} DEFAULT"))
+    months = set(
+        conn.execute(
+            text("SELECT DISTINCT CAST(date_trunc('month', date) AS DATE) FROM sessions")
+        ).scalars()
+    )
+    months.add(date.today().replace(day=1))
+    for month in sorted(months):
+        create_month(conn, month, NEW_TABLE)
+
+    conn.execute(
+        text(
+            f"INSERT INTO {NEW_TABLE} ({_COLUMNS}) "
+            f"SELECT {_COLUMNS.replace('date,', 'COALESCE(date, CAST(start_time AS DATE)),', 1)} "
+            f"FROM sessions"
+        )
+    )
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {NEW_TABLE}.id"))
+    conn.execute(text("DROP TABLE sessions"))
+    conn.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO sessions"))
+    conn.execute(text(f"ALTER TABLE sessions RENAME CONSTRAINT {NEW_TABLE}_pkey TO sessions_pkey"))
+    for index in indexes:
+        index.create(conn)
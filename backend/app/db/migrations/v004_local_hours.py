@@ -0,0 +1,144 @@
+"""
+v4: hourly breakdowns keyed by the local start hour.
+
+`hourly_summaries` used to hold the UTC start hour under the user's local
+date. Users without a stored zone are unaffected (their local hour is the
+UTC hour); the rows of every user with `users.timezone` set are deleted and
+recomputed in Python from their finished sessions: the hot ones in
+`sessions` and the archived ones in the segment files, read directly (rows
+present in both, from an interrupted archive run, are counted once).
+"""
+from collections import defaultdict
+from datetime import date, datetime, tzinfo
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    insert,
+    select,
+)
+from sqlalchemy.engine import Connection
+
+from app.services.archive import day_from_number, session_archive
+from app.services.timezones import local_hour, stored_zone
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("timezone", String, nullable=True),
+)
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("id", Integer, nullable=False),
+    Column("user_id", Integer, nullable=False),
+    Column("start_time", DateTime(timezone=True), nullable=False),
+    Column("end_time", DateTime(timezone=True), nullable=True),
+    Column("duration_minutes", Integer, nullable=True),
+    Column("reels_watched", Integer, nullable=True),
+    Column("date", Date, nullable=False),
+)
+
+hourly_summaries = Table(
+    "hourly_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("hour", Integer, nullable=False),
+    Column("total_sessions", Integer, nullable=False),
+    Column("total_reels", Integer, nullable=False),
+    Column("total_minutes", Integer, nullable=False),
+)
+
+_ARCHIVED_COLUMNS = ("user_id", "start_us", "id", "day", "duration", "reels")
+
+
+def upgrade(conn: Connection) -> None:
+    zones: Dict[int, tzinfo] = {
+        user_id: stored_zone(name)
+        for user_id, name in conn.execute(
+            select(users.c.id, users.c.timezone).where(users.c.timezone.is_not(None))
+        )
+    }
+    if not zones:
+        return
+
+    totals: Dict[Tuple[int, date, int], List[int]] = defaultdict(lambda: [0, 0, 0])
+    frozen_before = session_archive.frozen_before()
+    # Hot rows of archived months: the archive may hold them too.
+    late_ids = set()
+    rows = conn.execute(
+        select(
+            sessions.c.id,
+            sessions.c.user_id,
+            sessions.c.date,
+            sessions.c.start_time,
+            sessions.c.reels_watched,
+            sessions.c.duration_minutes,
+        )
+        .join(users, users.c.id == sessions.c.user_id)
+        .where(users.c.timezone.is_not(None), sessions.c.end_time.is_not(None))
+        .execution_options(yield_per=10000)
+    )
+    for session_id, user_id, day, start_time, reels, minutes in rows:
+        if frozen_before is not None and day < frozen_before:
+            late_ids.add(session_id)
+        bucket = totals[(user_id, day, local_hour(start_time, zones[user_id]))]
+        bucket[0] += 1
+        bucket[1] += reels or 0
+        bucket[2] += minutes or 0
+
+    if frozen_before is not None:
+        zoned = np.array(sorted(zones), dtype=np.int64)
+        with session_archive.open_segments() as segments:
+            for segment in segments:
+                for arrays in segment.blocks_for(columns=_ARCHIVED_COLUMNS):
+                    mask = np.isin(arrays["user_id"], zoned)
+                    if not mask.any():
+                        continue
+                    picked = (arrays[name][mask].tolist() for name in _ARCHIVED_COLUMNS)
+                    for user_id, start_us, session_id, day, duration, reels in zip(*picked):
+                        if session_id in late_ids:
+                            continue
+                        zone = zones[user_id]
+                        hour = datetime.fromtimestamp(start_us // 1_000_000, zone).hour
+                        bucket = totals[(user_id, day_from_number(day), hour)]
+                        bucket[0] += 1
+                        bucket[1] += max(reels, 0)
+                        bucket[2] += max(duration, 0)
+
+    conn.execute(
+        delete(hourly_summaries).where(
+            hourly_summaries.c.user_id.in_(
+                select(users.c.id).where(users.c.timezone.is_not(None))
+            )
+        )
+    )
+    if totals:
+        conn.execute(
+            insert(hourly_summaries),
+            [
+                {
+                    "user_id": user_id,
+                    "date": day,
+                    "hour": hour,
+                    "total_sessions": count,
+                    "total_reels": reels,
+                    "total_minutes": minutes,
+                }
+                for (user_id, day, hour), (count, reels, minutes) in totals.items()
+            ],
+        )
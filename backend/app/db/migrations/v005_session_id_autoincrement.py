@@ -0,0 +1,90 @@
+"""
+v5: never hand out a session id twice.
+
+`archive-sessions` deletes archived rows from `sessions`. Without
+AUTOINCREMENT, SQLite then assigns the next row MAX(id) + 1, reusing the
+ids of archived sessions, and readers that dedupe by id (export, the
+consistency checker) drop one of the two. The table is rebuilt as
+AUTOINCREMENT so `sqlite_sequence` keeps the highest id ever used.
+
+Databases archived before this migration have already lost that mark, so
+it is raised to the highest id in the segment files, on SQLite and on
+Postgres (whose sequence an earlier `sync_session_ids` may have moved back
+to MAX(id) + 1).
+"""
+from sqlalchemy import Column, Date, DateTime, Index, Integer, MetaData, String, Table, text
+from sqlalchemy.engine import Connection
+
+from app.services.archive import session_archive
+
+LEGACY_TABLE = "sessions_legacy"
+
+_COLUMNS = (
+    "id, user_id, start_time, end_time, duration_minutes, reels_watched, mood, date, "
+    "iso_year, iso_week, month_key"
+)
+
+metadata = MetaData()
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, nullable=False),
+    Column("start_time", DateTime(timezone=True), nullable=False),
+    Column("end_time", DateTime(timezone=True), nullable=True),
+    Column("duration_minutes", Integer, nullable=True),
+    Column("reels_watched", Integer, nullable=True),
+    Column("mood", String, nullable=True),
+    Column("date", Date, nullable=False),
+    Column("iso_year", Integer, nullable=True),
+    Column("iso_week", Integer, nullable=True),
+    Column("month_key", Integer, nullable=True),
+    Index("ix_sessions_active", "user_id", "start_time", sqlite_where=text("end_time IS NULL")),
+    Index("ix_sessions_user_start_time_id", "user_id", "start_time", "id"),
+    Index("ix_sessions_user_date", "user_id", "date"),
+    Index("ix_sessions_user_iso_week", "user_id", "iso_year", "iso_week"),
+    Index("ix_sessions_user_month_key", "user_id", "month_key"),
+    sqlite_autoincrement=True,
+)
+
+
+def _rebuild_sqlite(conn: Connection) -> None:
+    names = conn.execute(
+        text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'sessions' AND sql IS NOT NULL"
+        )
+    ).scalars().all()
+    for name in names:
+        conn.execute(text(f'DROP INDEX "{name}"'))
+    conn.execute(text(f"ALTER TABLE sessions RENAME TO {LEGACY_TABLE}"))
+    sessions.create(conn)
+    conn.execute(
+        text(f"INSERT INTO sessions ({_COLUMNS}) SELECT {_COLUMNS} FROM {LEGACY_TABLE}")
+    )
+    conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+
+def upgrade(conn: Connection) -> None:
+    archived = session_archive.max_id()
+    if conn.dialect.name == "sqlite":
+        _rebuild_sqlite(conn)
+        # The copy set sqlite_sequence to MAX(id); archived ids may be higher.
+        highest = conn.execute(
+            text("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'sessions'")
+        ).scalar()
+        if archived > highest:
+            conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'sessions'"))
+            conn.execute(
+                text("INSERT INTO sqlite_sequence (name, seq) VALUES ('sessions', :seq)"),
+                {"seq": archived},
+            )
+    elif conn.dialect.name == "postgresql" and archived:
+        conn.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('sessions', 'id'), "
+                "GREATEST(:archived, (SELECT COALESCE(MAX(id), 0) FROM sessions)))"
+            ),
+            {"archived": archived},
+        )
@@ -0,0 +1,138 @@
+"""
+Monthly range partitions of `sessions` on Postgres.
+
+Migration v3 makes `sessions` a table partitioned by month of `date` (the
+session's local day): per-month scans touch one partition, and whole old
+months can be detached or dropped instead of deleted row by row. Each
+month is a partition named `sessions_yYYYYmMM`; rows outside every created
+month land in the DEFAULT partition `sessions_default`.
+
+Months are created ahead of time: `maintain_partitions` (run at startup
+and by `python -m app.cli migrate`) adds the previous, current and next
+`PARTITION_MONTHS_AHEAD` months. Creating a month whose rows already
+landed in the default partition moves them out first, so it is always safe.
+
+SQLite has no partitioning; everything here is a no-op there.
+"""
+from datetime import date
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+DEFAULT_PARTITION = "sessions_default"
+
+# Arbitrary constant naming the advisory lock held while creating partitions.
+_PG_LOCK_KEY = 0x1D7A_0A27
+
+
+def partition_name(month: date) -> str:
+    return f"sessions_y{month.year:04d}m{month.month:02d}"
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after (or before) the month of `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(conn: Connection, table: str = "sessions") -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+            ),
+            {"table": table},
+        ).first()
+    )
+
+
+def existing_partitions(conn: Connection, parent: str = "sessions") -> Set[str]:
+    return set(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent AND p.relnamespace = current_schema()::regnamespace"
+            ),
+            {"parent": parent},
+        ).scalars()
+    )
+
+
+def create_month(conn: Connection, month: date, parent: str = "sessions") -> str:
+    """Create the partition for `month`, moving its rows out of the default partition."""
+    name = partition_name(month)
+    bounds = {"lo": month, "hi": add_months(month, 1)}
+    bound_sql = f"FROM ('{bounds['lo']}') TO ('{bounds['hi']}')"
+    stranded = conn.execute(
+        text(f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE date >= :lo AND date < :hi LIMIT 1'),
+        bounds,
+    ).first()
+    if stranded is None:
+        conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{parent}" FOR VALUES {bound_sql}'))
+        return name
+
+    # The default partition may not hold rows of an attached range: build the
+    # month as a plain table, move the rows over, then attach it.
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{parent}" INCLUDING DEFAULTS)'))
+    conn.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f"WHERE date >= :lo AND date < :hi RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        bounds,
+    )
+    conn.execute(text(f'ALTER TABLE "{parent}" ATTACH PARTITION "{name}" FOR VALUES {bound_sql}'))
+    return name
+
+
+def ensure_partitions(
+    conn: Connection, first: date, last: date, parent: str = "sessions"
+) -> List[str]:
+    """Create every missing month partition from `first`'s month to `last`'s; returns new names."""
+    existing = existing_partitions(conn, parent)
+    created = []
+    month = first.replace(day=1)
+    while month <= last:
+        if partition_name(month) not in existing:
+            created.append(create_month(conn, month, parent))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_month_if_empty(conn: Connection, month: date, parent: str = "sessions") -> bool:
+    """Drop `month`'s partition if it exists and holds no rows (after archiving)."""
+    name = partition_name(month)
+    if not is_partitioned(conn, parent) or name not in existing_partitions(conn, parent):
+        return False
+    if conn.execute(text(f'SELECT 1 FROM "{name}" LIMIT 1')).first() is not None:
+        return False
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    return True
+
+
+def maintain_partitions(
+    engine: Engine, months_ahead: int, today: Optional[date] = None
+) -> List[str]:
+    """
+    Make sure the partitions around `today` exist; returns the ones created.
+
+    Safe to call from every process: creation runs under an advisory lock.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    month = (today or date.today()).replace(day=1)
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+        created = ensure_partitions(conn, add_months(month, -1), add_months(month, months_ahead))
+        conn.commit()
+    return created
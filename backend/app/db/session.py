@@ -1,19 +1,213 @@
-from sqlalchemy import create_engine
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, TypeVar, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
+
 from app.core.config import get_settings
 
 settings = get_settings()
 
-# For SQLite we need check_same_thread=False for use with FastAPI
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-)
+T = TypeVar("T")
+
+# Either flavour of session a router may receive from `db_dependency`.
+DBSession = Union[Session, AsyncSession]
+
+
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _engine_kwargs(
+    url: str, pool_size: int, max_overflow: int, is_async: bool = False
+) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if url.startswith("sqlite"):
+        # For SQLite we need check_same_thread=False for use with FastAPI
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if is_async and _is_sqlite_file(url):
+            # aiosqlite defaults to NullPool; keep connections (and pragmas) warm.
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+    elif url.startswith("postgresql"):
+        # Sessions run in UTC whatever the server default, so timestamps come
+        # back as UTC (like SQLite) and date/hour extraction is UTC-based.
+        if is_async:
+            kwargs["connect_args"] = {"server_settings": {"timezone": "UTC"}}
+        else:
+            kwargs["connect_args"] = {"options": "-c timezone=UTC"}
+    # In-memory SQLite uses a single-connection pool that takes no sizing.
+    if not url.startswith("sqlite") or _is_sqlite_file(url):
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return kwargs
+
+
+def _sqlite_pragmas(read_only: bool) -> List[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # journal_mode is persistent in the file; only writers need to set it.
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def _apply_sqlite_profile(sync_engine: Engine, read_only: bool = False) -> None:
+    """Run the configured SQLite pragmas on every new pooled connection."""
+    if not settings.SQLITE_TUNING or not _is_sqlite_file(str(sync_engine.url)):
+        return
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+# Engines are created on first use, not at import: importing the app (and
+# every worker fork) does no DB work, and tools that never touch a database
+# never build pools. Hooks (e.g. metrics instrumentation) registered with
+# `add_engine_hook` run on each engine as it is created.
+_engines: Dict[str, Any] = {}
+_engines_lock = threading.Lock()
+_engine_hooks: List[Callable[[Engine], None]] = []
+
+
+def _build_engine(read_only: bool) -> Engine:
+    url = settings.READ_DATABASE_URL if read_only else settings.DATABASE_URL
+    if read_only:
+        # Separate query-only pool for the summary endpoints, so dashboard
+        # reads never queue behind writers for a connection.
+        kwargs = _engine_kwargs(url, settings.READ_POOL_SIZE, settings.READ_MAX_OVERFLOW)
+    else:
+        kwargs = _engine_kwargs(url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    if read_only and url.startswith("postgresql"):
+        # Postgres counterpart of SQLite's query_only pragma.
+        kwargs["execution_options"] = {"postgresql_readonly": True}
+    return create_engine(url, **kwargs)
+
+
+def _build_async_engine(read_only: bool) -> AsyncEngine:
+    url = settings.ASYNC_READ_DATABASE_URL if read_only else settings.ASYNC_DATABASE_URL
+    if read_only:
+        kwargs = _engine_kwargs(
+            url, settings.READ_POOL_SIZE, settings.READ_MAX_OVERFLOW, is_async=True
+        )
+    else:
+        kwargs = _engine_kwargs(url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, is_async=True)
+    if read_only and url.startswith("postgresql"):
+        kwargs["execution_options"] = {"postgresql_readonly": True}
+    return create_async_engine(url, **kwargs)
+
+
+def _lazy_engine(name: str, build: Callable[[], Any], read_only: bool) -> Any:
+    db_engine = _engines.get(name)
+    if db_engine is None:
+        with _engines_lock:
+            db_engine = _engines.get(name)
+            if db_engine is None:
+                db_engine = build()
+                sync_engine = getattr(db_engine, "sync_engine", db_engine)
+                _apply_sqlite_profile(sync_engine, read_only=read_only)
+                for hook in _engine_hooks:
+                    hook(sync_engine)
+                _engines[name] = db_engine
+    return db_engine
+
+
+def get_engine() -> Engine:
+    """The read/write engine, created on first call."""
+    return _lazy_engine("engine", lambda: _build_engine(False), read_only=False)
+
+
+def get_read_engine() -> Engine:
+    """The query-only engine for summary reads, created on first call."""
+    return _lazy_engine("read_engine", lambda: _build_engine(True), read_only=True)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Async counterpart of `get_engine` (async mode only)."""
+    return _lazy_engine("async_engine", lambda: _build_async_engine(False), read_only=False)
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """Async counterpart of `get_read_engine` (async mode only)."""
+    return _lazy_engine("async_read_engine", lambda: _build_async_engine(True), read_only=True)
+
+
+def add_engine_hook(hook: Callable[[Engine], None]) -> None:
+    """Run `hook(sync_engine)` on every engine, including ones already created."""
+    with _engines_lock:
+        _engine_hooks.append(hook)
+        created = list(_engines.values())
+    for db_engine in created:
+        hook(getattr(db_engine, "sync_engine", db_engine))
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class _LazySessionmaker(sessionmaker):
+    """`sessionmaker` that binds to its engine when the first session is made."""
 
-def get_db() -> Session:
+    def __init__(self, get_bind: Callable[[], Engine], **kw: Any) -> None:
+        super().__init__(**kw)
+        self._get_bind = get_bind
+
+    def __call__(self, **local_kw: Any) -> Session:
+        local_kw.setdefault("bind", self._get_bind())
+        return super().__call__(**local_kw)
+
+
+class _LazyAsyncSessionmaker(async_sessionmaker):
+    """Async counterpart of `_LazySessionmaker`."""
+
+    def __init__(self, get_bind: Callable[[], AsyncEngine], **kw: Any) -> None:
+        super().__init__(**kw)
+        self._get_bind = get_bind
+
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        local_kw.setdefault("bind", self._get_bind())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(get_engine, autocommit=False, autoflush=False)
+ReadSessionLocal = _LazySessionmaker(get_read_engine, autocommit=False, autoflush=False)
+
+# Async session factories only exist when async mode is enabled, so the
+# default deployment does not need aiosqlite/asyncpg installed.
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if settings.DB_ASYNC:
+    AsyncSessionLocal = _LazyAsyncSessionmaker(
+        get_async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = _LazyAsyncSessionmaker(
+        get_async_read_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def get_db() -> Iterator[Session]:
     """FastAPI dependency that yields a DB session."""
     db = SessionLocal()
     try:
@@ -22,3 +216,73 @@ def get_db() -> Session:
         db.close()
 
 
+def get_read_db() -> Iterator[Session]:
+    """FastAPI dependency that yields a session from the read-only pool."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency that yields an async DB session (async mode only)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB mode is disabled; set DB_ASYNC=1 to enable it.")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of `get_read_db` (async mode only)."""
+    if AsyncReadSessionLocal is None:
+        raise RuntimeError("Async DB mode is disabled; set DB_ASYNC=1 to enable it.")
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+# Dependencies used by the routers; pick the session flavour once at import.
+db_dependency = get_async_db if settings.DB_ASYNC else get_db
+read_db_dependency = get_async_read_db if settings.DB_ASYNC else get_read_db
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a sync ORM function `fn(session, *args, **kwargs)` against `db`.
+
+    - AsyncSession: runs natively on the event loop via `run_sync`.
+    - Session: offloaded to the threadpool, as FastAPI does for sync routes.
+
+    This keeps a single implementation of each query for both modes.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def run_db_detached(
+    fn: Callable[..., T], *args: Any, read_only: bool = False, **kwargs: Any
+) -> T:
+    """
+    `run_db` on a session of its own, closed once `fn` returns.
+
+    For work that outlives the request that started it, such as a shared
+    single-flight query: the request's injected session is closed when that
+    request ends, even if other requests still wait on the result. Uses the
+    read-only factory if `read_only`, async sessions in async mode.
+    """
+    if settings.DB_ASYNC:
+        async_factory = AsyncReadSessionLocal if read_only else AsyncSessionLocal
+        async with async_factory() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    factory = ReadSessionLocal if read_only else SessionLocal
+
+    def call() -> T:
+        db = factory()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(call)
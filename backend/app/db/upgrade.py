@@ -0,0 +1,72 @@
+"""
+In-place upgrades for databases created before versioned migrations.
+
+Such databases were built with `create_all`, which only creates missing
+tables, so they may lack columns, constraints and indexes added to existing
+tables since. `adopt_legacy_schema` brings them to the v1 baseline, after
+which `app.db.migrations` takes over. Every step is idempotent.
+"""
+from sqlalchemy import MetaData, Table, inspect, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import get_settings
+
+# Summary tables that gained a per-user key. Their old unique constraints
+# (e.g. UNIQUE(date)) cannot be dropped in place on SQLite, so they are
+# rebuilt with rows assigned to the default user.
+_PER_USER_TABLES = ("daily_summaries", "weekly_summaries", "monthly_summaries", "streak_state")
+
+# Single-column session indexes superseded by the (user_id, ...) composites.
+_OBSOLETE_INDEXES = (
+    "ix_sessions_user_id",
+    "ix_sessions_start_time",
+    "ix_sessions_end_time",
+    "ix_sessions_date",
+    "ix_sessions_start_time_id",
+    # Replaced by the partial index on open sessions.
+    "ix_sessions_user_end_time",
+)
+
+
+def _rebuild_with_user_id(conn: Connection, table: Table, user_id: int) -> None:
+    legacy = f"{table.name}_legacy"
+    inspector = inspect(conn)
+    for index in inspector.get_indexes(table.name):
+        conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    legacy_columns = [c["name"] for c in inspector.get_columns(table.name)]
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy}"'))
+    table.create(conn)
+    columns = ", ".join(f'"{c}"' for c in legacy_columns)
+    conn.execute(
+        text(
+            f'INSERT INTO "{table.name}" ({columns}, user_id) '
+            f'SELECT {columns}, :user_id FROM "{legacy}"'
+        ),
+        {"user_id": user_id},
+    )
+    conn.execute(text(f'DROP TABLE "{legacy}"'))
+
+
+def adopt_legacy_schema(conn: Connection, metadata: MetaData) -> None:
+    """Bring a pre-versioning database up to the baseline tables in `metadata`."""
+    default_user_id = get_settings().DEFAULT_USER_ID
+    metadata.create_all(conn)
+    inspector = inspect(conn)
+    for name in _PER_USER_TABLES:
+        columns = {c["name"] for c in inspector.get_columns(name)}
+        if "user_id" not in columns:
+            _rebuild_with_user_id(conn, metadata.tables[name], default_user_id)
+
+    # Sessions created before multi-user support belong to the default user.
+    conn.execute(
+        text("UPDATE sessions SET user_id = :user_id WHERE user_id IS NULL"),
+        {"user_id": default_user_id},
+    )
+
+    for name in _OBSOLETE_INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+    # Composite indexes added after the tables were first created.
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
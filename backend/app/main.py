@@ -1,24 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from app.api import sessions, summaries
+from app.api import analytics, events, metrics, sessions, summaries, users
 from app.core.config import get_settings
-from app.db.base import Base
-from app.db.session import engine
+from app.core.changes import change_counters
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.pubsub import event_broker
+from app.core.ratelimit import RateLimitMiddleware, rate_limiter
+from app.db.migrations import migrate
+from app.db.partitions import maintain_partitions
+from app.db.session import SessionLocal, add_engine_hook, get_engine
+from app.services.ingest import ingest_queue
+from app.services.sweeper import session_sweeper
 
 
-def create_app() -> FastAPI:
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Schema first: everything below may touch the DB. Nothing DB-related
+    # happens at import, so workers fork cheaply and only this step waits.
     settings = get_settings()
+    if settings.DB_AUTO_MIGRATE:
+        await run_in_threadpool(migrate, get_engine())
+    await run_in_threadpool(maintain_partitions, get_engine(), settings.PARTITION_MONTHS_AHEAD)
+    # Ingestion mode: replay any events left by a previous run, then start
+    # the batch worker; on shutdown drain everything still pending.
+    if ingest_queue.enabled:
+        await run_in_threadpool(ingest_queue.open, SessionLocal)
+        ingest_queue.start()
+    # Close sessions left open past SESSION_MAX_MINUTES.
+    if session_sweeper.enabled:
+        session_sweeper.open(SessionLocal)
+        session_sweeper.start()
+    # Other workers' writes: clients connected here refetch.
+    relay = None
+    if event_broker.enabled and change_counters.enabled:
+        relay = asyncio.create_task(
+            event_broker.relay_changes(settings.PUSH_RELAY_INTERVAL_SECONDS)
+        )
+    try:
+        yield
+    finally:
+        if relay is not None:
+            relay.cancel()
+            with suppress(asyncio.CancelledError):
+                await relay
+        await session_sweeper.stop()
+        if ingest_queue.enabled:
+            await run_in_threadpool(ingest_queue.stop)
 
-    # Create DB tables on startup for MVP. In production we would
-    # prefer migrations (Alembic), but this keeps setup lightweight.
-    Base.metadata.create_all(bind=engine)
+
+def create_app() -> FastAPI:
+    settings = get_settings()
 
     app = FastAPI(
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
+        lifespan=lifespan,
     )
 
+    # Per-client token buckets; inside CORS so 429s carry its headers.
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
     # CORS - allow frontend (e.g., React dev server on localhost:3000)
     app.add_middleware(
         CORSMiddleware,
@@ -28,9 +75,18 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Instrumentation: per-route latency, DB and serialization timings.
+    if settings.METRICS_ENABLED:
+        add_engine_hook(instrument_engine)
+        app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
     # Routers
     app.include_router(sessions.router)
     app.include_router(summaries.router)
+    app.include_router(analytics.router)
+    app.include_router(users.router)
+    app.include_router(events.router)
+    app.include_router(metrics.router)
 
     return app
 
@@ -11,11 +11,13 @@ class DailySummary(Base):
     __tablename__ = "daily_summaries"
 
     id = Column(Integer, primary_key=True, index=True)
-    summary_date = Column("date", Date, nullable=False, unique=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    summary_date = Column("date", Date, nullable=False)
     total_sessions = Column(Integer, nullable=False, default=0)
     total_reels = Column(Integer, nullable=False, default=0)
     total_minutes = Column(Integer, nullable=False, default=0)
 
-    __table_args__ = (UniqueConstraint("date", name="uq_daily_summary_date"),)
+    # One row per user and day; also serves per-user date range reads.
+    __table_args__ = (UniqueConstraint("user_id", "date", name="uq_daily_summary_user_date"),)
 
 
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, UniqueConstraint
+
+from app.db.base import Base
+
+
+class HourlySummary(Base):
+    """Per-day x start-hour breakdown of finished sessions, maintained incrementally."""
+
+    __tablename__ = "hourly_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    summary_date = Column("date", Date, nullable=False)
+    # Hour of day (0-23) the session started, in the user's zone (UTC if unset).
+    hour = Column(Integer, nullable=False)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_reels = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "hour", name="uq_hourly_summary_user_date_hour"),
+    )
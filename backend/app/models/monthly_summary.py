@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Date, UniqueConstraint
+
+from app.db.base import Base
+
+
+class MonthlySummary(Base):
+    """Per-calendar-month rollup of `DailySummary`, maintained incrementally."""
+
+    __tablename__ = "monthly_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    # First day of the month; range reads use the (user_id, ...) unique index.
+    month_start = Column(Date, nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    # First/last day within the month that actually has data.
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_reels = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "month_start", name="uq_monthly_summary_user_month_start"),
+    )
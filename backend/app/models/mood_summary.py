@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Date, String, UniqueConstraint
+
+from app.db.base import Base
+
+# Stored for sessions without a mood: NULL would never collide in the unique
+# key, so ON CONFLICT upserts could not find the row.
+NO_MOOD = ""
+
+
+class MoodSummary(Base):
+    """Per-day x mood breakdown of finished sessions, maintained incrementally."""
+
+    __tablename__ = "mood_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    summary_date = Column("date", Date, nullable=False)
+    mood = Column(String, nullable=False, default=NO_MOOD)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_reels = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "mood", name="uq_mood_summary_user_date_mood"),
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime, date
 
-from sqlalchemy import Column, Integer, String, DateTime, Date
+from sqlalchemy import Column, Integer, String, DateTime, Date, Index, text
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -11,15 +11,46 @@ class Session(Base):
 
     __tablename__ = "sessions"
 
+    # On Postgres the table is partitioned by month of `date` and the primary
+    # key is (id, date) there (migration v3, `app.db.partitions`). On SQLite
+    # it is AUTOINCREMENT (v5), so archived ids are not handed out again.
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=True, index=True)  # reserved for multi-user future
+    # Owner of the session; every query is scoped by it (see composite indexes).
+    user_id = Column(Integer, nullable=False)
     # Store as timezone-aware UTC datetimes. SQLite won't enforce timezone, but
     # Pydantic serialization will include an offset when tzinfo is present.
-    start_time = Column(DateTime(timezone=True), nullable=False, index=True)
-    end_time = Column(DateTime(timezone=True), nullable=True, index=True)
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=True)
     duration_minutes = Column(Integer, nullable=True)
     reels_watched = Column(Integer, nullable=True)
     mood = Column(String, nullable=True)
-    date = Column(Date, nullable=False, index=True)
-
-
+    # Client-local calendar day of the start, fixed when the session starts.
+    date = Column(Date, nullable=False)
+    # Precomputed from `date` on write (see `date_keys`), so week/month
+    # filters are indexed equality lookups; month_key is year * 100 + month.
+    iso_year = Column(Integer, nullable=True)
+    iso_week = Column(Integer, nullable=True)
+    month_key = Column(Integer, nullable=True)
+
+    # Per-user composite indexes so each request only touches one user's rows:
+    # - active-session lookups: partial (user_id, start_time) over open
+    #   sessions only, so it stays tiny however many finished rows exist;
+    #   the stale-session sweeper scans it too
+    # - keyset pagination newest-first: (user_id, start_time, id)
+    # - date-filtered listing: (user_id, date)
+    # - week / month listing: (user_id, iso_year, iso_week), (user_id, month_key)
+    __table_args__ = (
+        Index(
+            "ix_sessions_active",
+            "user_id",
+            "start_time",
+            sqlite_where=text("end_time IS NULL"),
+            postgresql_where=text("end_time IS NULL"),
+        ),
+        Index("ix_sessions_user_start_time_id", "user_id", "start_time", "id"),
+        Index("ix_sessions_user_date", "user_id", "date"),
+        Index("ix_sessions_user_iso_week", "user_id", "iso_year", "iso_week"),
+        Index("ix_sessions_user_month_key", "user_id", "month_key"),
+        # Ids of archived (deleted) rows are never reused (migration v5).
+        {"sqlite_autoincrement": True},
+    )
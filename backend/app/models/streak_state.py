@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date
+
+from app.db.base import Base
+
+
+class StreakState(Base):
+    """
+    Persisted streak bookkeeping so streaks can be answered in O(1).
+
+    One row per user. Tracks the most recent run of consecutive days
+    with at least one session and the longest run seen so far.
+    """
+
+    __tablename__ = "streak_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, unique=True)
+    current_start = Column(Date, nullable=True)
+    current_end = Column(Date, nullable=True)
+    longest_streak = Column(Integer, nullable=False, default=0)
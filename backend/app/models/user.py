@@ -10,5 +10,8 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=True)
+    # IANA zone name (e.g. "Europe/Berlin") used for the user's local days;
+    # NULL = UTC. Set through PUT /user/timezone.
+    timezone = Column(String, nullable=True)
 
 
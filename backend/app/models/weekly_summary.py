@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Date, UniqueConstraint
+
+from app.db.base import Base
+
+
+class WeeklySummary(Base):
+    """Per-ISO-week rollup of `DailySummary`, maintained incrementally."""
+
+    __tablename__ = "weekly_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    # Monday of the ISO week; range reads use the (user_id, ...) unique index.
+    week_start = Column(Date, nullable=False)
+    iso_year = Column(Integer, nullable=False)
+    iso_week = Column(Integer, nullable=False)
+    # First/last day within the week that actually has data.
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    total_reels = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "week_start", name="uq_weekly_summary_user_week_start"),
+    )
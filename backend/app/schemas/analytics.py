@@ -0,0 +1,49 @@
+from datetime import date
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class RollingPoint(BaseModel):
+    date: date
+    value: float
+    rolling_mean: float
+
+
+class RollingResponse(BaseModel):
+    metric: Literal["sessions", "minutes", "reels"]
+    window: int
+    start_date: date
+    end_date: date
+    points: List[RollingPoint]
+
+
+class HistogramResponse(BaseModel):
+    field: Literal["duration", "reels"]
+    start_date: date
+    end_date: date
+    # `counts[i]` sessions fall in [bin_edges[i], bin_edges[i + 1]).
+    bin_edges: List[float]
+    counts: List[int]
+
+
+class HeatmapResponse(BaseModel):
+    start_date: date
+    end_date: date
+    # 7 rows (Monday first) x 24 columns (hour of day, UTC).
+    sessions: List[List[int]]
+    minutes: List[List[int]]
+
+
+class MoodBreakdownItem(BaseModel):
+    mood: Optional[str]
+    sessions: int
+    total_minutes: int
+    total_reels: int
+    avg_minutes: float
+
+
+class MoodBreakdownResponse(BaseModel):
+    start_date: date
+    end_date: date
+    items: List[MoodBreakdownItem]
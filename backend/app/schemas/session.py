@@ -18,7 +18,8 @@ class SessionStartRequest(BaseModel):
     """Payload for starting a new session. For now no inputs are required."""
 
     # Minutes east of UTC (e.g. IST = +330). Sent by the client so we can
-    # compute the user's local date while still storing timestamps in UTC.
+    # compute the user's local date while still storing timestamps in UTC;
+    # without it the user's stored time zone (PUT /user/timezone) is used.
     tz_offset_minutes: Optional[conint(ge=-840, le=840)] = Field(
         default=None,
         description="Minutes east of UTC for the client timezone (e.g. IST=330).",
@@ -44,5 +45,14 @@ class SessionResponse(SessionBase):
 
 class SessionListResponse(BaseModel):
     sessions: List[SessionResponse]
+    # Opaque keyset cursor for the next page; null when there are no more rows.
+    next_cursor: Optional[str] = None
+    # Sessions with local date before this day have been archived and are
+    # not listed (see GET /sessions/export); null when nothing is archived.
+    archived_before: Optional[date] = None
 
 
+class SessionImportResponse(BaseModel):
+    imported: int
+    first_date: Optional[date]
+    last_date: Optional[date]
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -50,28 +50,31 @@ class StreaksResponse(BaseModel):
     current_streak: int
     longest_streak: int
 
-from datetime import date
-from typing import List
 
-from pydantic import BaseModel
+class DashboardResponse(BaseModel):
+    daily: List[DailySummaryResponse]
+    weekly: List[WeeklySummaryItem]
+    monthly: List[MonthlySummaryItem]
+    streaks: StreaksResponse
 
 
-class DailySummaryResponse(BaseModel):
-    date: date
+class HourlySummaryItem(BaseModel):
+    hour: int
     total_sessions: int
     total_reels: int
     total_minutes: int
 
-    class Config:
-        orm_mode = True
 
+class HourlySummaryListResponse(BaseModel):
+    items: List[HourlySummaryItem]
 
-class DailySummaryListResponse(BaseModel):
-    items: List[DailySummaryResponse]
 
-
-class StreaksResponse(BaseModel):
-    current_streak: int
-    longest_streak: int
+class MoodSummaryItem(BaseModel):
+    mood: Optional[str]
+    total_sessions: int
+    total_reels: int
+    total_minutes: int
 
 
+class MoodSummaryListResponse(BaseModel):
+    items: List[MoodSummaryItem]
@@ -0,0 +1,18 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class TimezoneRequest(BaseModel):
+    timezone: Optional[str] = Field(
+        ...,
+        description="IANA time zone name, e.g. Europe/Berlin; null resets to UTC.",
+    )
+
+
+class TimezoneResponse(BaseModel):
+    # Null = UTC (no zone stored).
+    timezone: Optional[str]
+    # The user's current local day in that zone.
+    today: date
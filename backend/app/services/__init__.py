@@ -0,0 +1,5 @@
+"""
+Domain services shared by the routers and the CLI.
+
+Keeps DB write logic (summary maintenance, rebuilds) out of the web layer.
+"""
@@ -0,0 +1,285 @@
+"""
+Columnar in-memory analytics over finished sessions.
+
+Each user's finished sessions (archived months included, read from the
+segment files) are loaded once into NumPy arrays (start timestamp, local
+day and start hour in the user's zone, duration, reels, mood code) and
+kept in a bounded LRU store; writes invalidate the user's columns like the
+summary cache, in every process.
+Rolling windows, histograms and group-bys are then single vectorized
+passes, so years of per-session history stay cheap to analyze.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import UserVersions
+from app.core.changes import change_counters
+from app.core.config import get_settings
+from app.db.dialect import epoch_day, epoch_seconds
+from app.models.session import Session as SessionModel
+from app.services.archive import EPOCH, day_number, session_archive
+from app.services.timezones import local_hours, user_zones
+
+# 1970-01-01 was a Thursday; shifts day numbers so Monday == 0.
+_WEEKDAY_SHIFT = EPOCH.weekday()
+
+METRICS = ("sessions", "minutes", "reels")
+HISTOGRAM_FIELDS = ("duration", "reels")
+
+
+@dataclass(frozen=True)
+class SessionColumns:
+    """One user's finished sessions as parallel arrays, ordered by start time."""
+
+    start_ts: np.ndarray  # int64 UTC epoch seconds
+    day: np.ndarray  # int32 local calendar day, days since 1970-01-01
+    hour: np.ndarray  # int8 local start hour, in the user's zone
+    duration: np.ndarray  # int32 minutes
+    reels: np.ndarray  # int32, -1 where not recorded
+    mood: np.ndarray  # int16 index into `moods`; 0 = no mood
+    moods: Tuple[Optional[str], ...]
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes for a in (self.start_ts, self.day, self.hour, self.duration, self.reels, self.mood)
+        )
+
+    def between(self, start: date, end: date) -> np.ndarray:
+        """Boolean mask of sessions whose local day is in [start, end]."""
+        return (self.day >= day_number(start)) & (self.day <= day_number(end))
+
+
+def _mood_codes(moods: np.ndarray) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Code `moods` (object array, None = no mood) 1.. in order of first appearance."""
+    codes = np.zeros(len(moods), np.int16)
+    named = ~np.equal(moods, None)
+    names, first_seen, inverse = np.unique(
+        moods[named].astype(str), return_index=True, return_inverse=True
+    )
+    ranked = np.argsort(first_seen)
+    rank = np.empty(len(names), np.int16)
+    rank[ranked] = np.arange(1, len(names) + 1, dtype=np.int16)
+    codes[named] = rank[inverse]
+    return codes, [None] + [str(names[i]) for i in ranked]
+
+
+def load_columns(db: Session, user_id: int) -> SessionColumns:
+    rows = db.execute(
+        select(
+            epoch_seconds(db, SessionModel.start_time),
+            epoch_day(db, SessionModel.date),
+            func.coalesce(SessionModel.duration_minutes, 0),
+            func.coalesce(SessionModel.reels_watched, -1),
+            SessionModel.mood,
+        )
+        .where(SessionModel.user_id == user_id, SessionModel.end_time.is_not(None))
+        .order_by(SessionModel.start_time.asc())
+    ).all()
+    fetched = list(zip(*rows)) or [()] * 5
+    mood, names = _mood_codes(np.array(fetched[4], dtype=object))
+    codes: Dict[Optional[str], int] = {name: code for code, name in enumerate(names)}
+    parts = [
+        (
+            np.array(fetched[0], np.int64),
+            np.array(fetched[1], np.int32),
+            np.array(fetched[2], np.int32),
+            np.array(fetched[3], np.int32),
+            mood,
+        )
+    ]
+    zone = user_zones.get(db, user_id)
+    archived = session_archive.user_arrays(user_id)
+    if not archived:
+        start_ts, day, duration, reels, mood = parts[0]
+        return SessionColumns(
+            start_ts=start_ts,
+            day=day,
+            hour=local_hours(start_ts, zone),
+            duration=duration,
+            reels=reels,
+            mood=mood,
+            moods=tuple(codes),
+        )
+
+    for moods, arrays in archived:
+        recode = np.array([codes.setdefault(m, len(codes)) for m in moods], np.int16)
+        parts.append(
+            (
+                arrays["start_us"] // 1_000_000,
+                arrays["day"],
+                np.clip(arrays["duration"], 0, None),
+                arrays["reels"],
+                recode[arrays["mood"]],
+            )
+        )
+    start_ts, day, duration, reels, mood = (np.concatenate(column) for column in zip(*parts))
+    order = np.argsort(start_ts, kind="stable")
+    mood = mood[order]
+    # Renumber moods by first appearance (no mood stays 0), as when every
+    # row comes from `sessions`: breakdowns list moods in that order.
+    present, first_seen = np.unique(mood, return_index=True)
+    ranked = [0] + [int(code) for code in present[np.argsort(first_seen)] if code != 0]
+    recode = np.zeros(len(codes), np.int16)
+    recode[ranked] = np.arange(len(ranked), dtype=np.int16)
+    names = list(codes)
+    start_ts = start_ts[order]
+    return SessionColumns(
+        start_ts=start_ts,
+        day=day[order],
+        hour=local_hours(start_ts, zone),
+        duration=duration[order],
+        reels=reels[order],
+        mood=recode[mood],
+        moods=tuple(names[code] for code in ranked),
+    )
+
+
+class ColumnStore:
+    """
+    Bounded LRU of per-user `SessionColumns`.
+
+    Per-user versions keep a load that raced with an invalidation of the
+    same user from being stored (same scheme as `SummaryCache`).
+    """
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._columns: "OrderedDict[int, SessionColumns]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = UserVersions(max_users)
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, db: Session, user_id: int) -> SessionColumns:
+        with self._lock:
+            columns = self._columns.get(user_id)
+            if columns is not None:
+                self._columns.move_to_end(user_id)
+                self.hits += 1
+                return columns
+        change_counters.track(user_id)
+        with self._lock:
+            version = self._versions.of(user_id)
+        columns = load_columns(db, user_id)
+        with self._lock:
+            self.loads += 1
+            if version == self._versions.of(user_id):
+                self._columns[user_id] = columns
+                while len(self._columns) > self.max_users:
+                    self._columns.popitem(last=False)
+        return columns
+
+    def invalidate(self, user_id: int) -> None:
+        self.forget(user_id)
+        change_counters.bump(user_id)
+
+    def forget(self, user_id: int) -> None:
+        """Drop `user_id`'s columns in this process only (see `app.core.changes`)."""
+        with self._lock:
+            self._versions.bump(user_id)
+            self._columns.pop(user_id, None)
+
+    def forget_all(self) -> None:
+        with self._lock:
+            self._versions.bump_all()
+            self._columns.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._columns),
+                "max_users": self.max_users,
+                "bytes": sum(c.nbytes for c in self._columns.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+def _metric_values(columns: SessionColumns, metric: str) -> Optional[np.ndarray]:
+    if metric == "minutes":
+        return columns.duration
+    if metric == "reels":
+        return np.clip(columns.reels, 0, None)
+    return None  # sessions: plain counts
+
+
+def daily_series(columns: SessionColumns, metric: str, start: date, end: date) -> np.ndarray:
+    """Per-day totals of `metric` for every day in [start, end] (zeros included)."""
+    mask = columns.between(start, end)
+    values = _metric_values(columns, metric)
+    return np.bincount(
+        columns.day[mask] - day_number(start),
+        weights=None if values is None else values[mask],
+        minlength=(end - start).days + 1,
+    ).astype(np.float64)
+
+
+def rolling_mean(series: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` days; the first days average what exists."""
+    csum = np.concatenate(([0.0], np.cumsum(series)))
+    idx = np.arange(len(series))
+    lo = np.maximum(idx - window + 1, 0)
+    return (csum[idx + 1] - csum[lo]) / (idx + 1 - lo)
+
+
+def histogram(
+    columns: SessionColumns, field: str, start: date, end: date, bins: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    mask = columns.between(start, end)
+    if field == "reels":
+        mask &= columns.reels >= 0
+        values = columns.reels[mask]
+    else:
+        values = columns.duration[mask]
+    if len(values) == 0:
+        return np.zeros(bins, dtype=np.int64), np.zeros(bins + 1)
+    return np.histogram(values, bins=bins)
+
+
+def weekday_hour_heatmap(
+    columns: SessionColumns, start: date, end: date
+) -> Tuple[np.ndarray, np.ndarray]:
+    """7x24 session counts and minutes: local weekday (Mon=0) x local start hour."""
+    mask = columns.between(start, end)
+    weekday = (columns.day[mask] + _WEEKDAY_SHIFT) % 7
+    cell = weekday * 24 + columns.hour[mask].astype(np.int32)
+    sessions = np.bincount(cell, minlength=168).reshape(7, 24)
+    minutes = np.bincount(cell, weights=columns.duration[mask], minlength=168).reshape(7, 24)
+    return sessions, minutes.astype(np.int64)
+
+
+def mood_breakdown(columns: SessionColumns, start: date, end: date) -> List[Dict]:
+    mask = columns.between(start, end)
+    codes = columns.mood[mask]
+    size = len(columns.moods)
+    sessions = np.bincount(codes, minlength=size)
+    minutes = np.bincount(codes, weights=columns.duration[mask], minlength=size)
+    reels = np.bincount(codes, weights=np.clip(columns.reels[mask], 0, None), minlength=size)
+    return [
+        {
+            "mood": mood,
+            "sessions": int(sessions[code]),
+            "total_minutes": int(minutes[code]),
+            "total_reels": int(reels[code]),
+            "avg_minutes": float(minutes[code] / sessions[code]),
+        }
+        for code, mood in enumerate(columns.moods)
+        if sessions[code]
+    ]
+
+
+_settings = get_settings()
+
+column_store = ColumnStore(max_users=_settings.ANALYTICS_MAX_USERS)
+change_counters.register(column_store)
@@ -0,0 +1,473 @@
+"""
+Archive of cold session history in compressed columnar segment files.
+
+`sessions` only needs recent rows: summaries come from the summary tables
+(`DailySummary` stays authoritative for totals) and only open or recent
+sessions are ever updated. `python -m app.cli archive-sessions` therefore
+moves finished sessions of whole months older than `ARCHIVE_AFTER_DAYS`
+out of the table into one segment file per month under `ARCHIVE_DIR`
+(`sessions-YYYY-MM.seg`), then deletes them from `sessions` (on Postgres
+the emptied month partition is dropped).
+
+Segment layout: blocks of up to `ARCHIVE_BLOCK_ROWS` rows sorted by
+(user_id, start time, id), each column of a block stored as a separate
+zlib stream (user_id and start time delta-encoded, so they nearly vanish),
+followed by a JSON footer indexing every block's byte ranges and its
+user/day bounds, then the footer length and a magic trailer. Readers
+memory-map the file and decompress only the columns of blocks whose
+bounds match, so exporting one user's year touches a few blocks and
+never loads a whole segment.
+
+Days before the end of the newest archived month are frozen: summary
+rebuilds from `sessions` skip them (`frozen_before`) and late rows for
+them (imports, sessions closed after archiving) are folded into the
+summaries incrementally and merged into the segment by the next run.
+
+Archiving works a month at a time (the month's rows are sorted in NumPy,
+so memory grows with the busiest month, not the history). Writes are
+crash-safe: a segment is written to a temporary file, fsynced and renamed
+before its rows are deleted. A crash in between leaves rows in
+both places; readers drop such duplicates (same id) and the next run
+removes them from `sessions`.
+"""
+import heapq
+import json
+import mmap
+import os
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.dialect import month_of, year_of
+from app.db.partitions import add_months, drop_month_if_empty
+from app.models.session import Session as SessionModel
+from app.services.timezones import as_utc
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run one archiver at a time.
+    fcntl = None
+
+MAGIC = b"TRKSEG01"
+_TRAILER = len(MAGIC) + 8
+
+EPOCH = date(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+_EPOCH_DT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Column name -> (dtype, delta-encoded). Rows are tuples in this order;
+# "mood" holds an index into the segment's mood table (0 = no mood) and -1
+# marks a missing duration / reels count.
+COLUMNS: Dict[str, Tuple[str, bool]] = {
+    "user_id": ("<i4", True),
+    "start_us": ("<i8", True),
+    "id": ("<i8", False),
+    "length_us": ("<i8", False),
+    "day": ("<i4", False),
+    "duration": ("<i4", False),
+    "reels": ("<i4", False),
+    "mood": ("<i2", False),
+}
+
+# Rows read from / deleted in `sessions` per round-trip while archiving.
+ARCHIVE_BATCH_SIZE = 10000
+
+
+class ArchiveError(RuntimeError):
+    """A segment file is missing, truncated or not a segment."""
+
+
+def day_number(day: date) -> int:
+    return day.toordinal() - _EPOCH_ORDINAL
+
+
+def day_from_number(n: int) -> date:
+    return EPOCH + timedelta(days=int(n))
+
+
+def _micros(dt: datetime) -> int:
+    delta = as_utc(dt) - _EPOCH_DT
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(us: int) -> datetime:
+    return _EPOCH_DT + timedelta(microseconds=int(us))
+
+
+@dataclass(frozen=True)
+class ArchivedSession:
+    """One archived session; the `SessionResponse` fields plus its owner."""
+
+    id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_minutes: Optional[int]
+    reels_watched: Optional[int]
+    mood: Optional[str]
+    date: date
+
+
+def write_segment(
+    path: str,
+    month: date,
+    columns: Dict[str, np.ndarray],
+    moods: List[Optional[str]],
+    block_rows: int,
+) -> None:
+    """
+    Write rows sorted by (user_id, start_us, id) as a segment file at `path`.
+
+    Written to `<path>.tmp`, fsynced and renamed over `path`, so readers
+    see either the old segment or the complete new one.
+    """
+    rows = len(columns["id"])
+    blocks = []
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        for start in range(0, rows, block_rows):
+            block = {name: values[start:start + block_rows] for name, values in columns.items()}
+            ranges = {}
+            for name, (dtype, delta) in COLUMNS.items():
+                values = block[name].astype(dtype)
+                if delta:
+                    values = np.diff(values, prepend=values.dtype.type(0))
+                data = zlib.compress(values.tobytes(), 6)
+                ranges[name] = [fh.tell(), len(data)]
+                fh.write(data)
+            blocks.append(
+                {
+                    "rows": len(block["id"]),
+                    "user_min": int(block["user_id"][0]),
+                    "user_max": int(block["user_id"][-1]),
+                    "day_min": int(block["day"].min()),
+                    "day_max": int(block["day"].max()),
+                    "columns": ranges,
+                }
+            )
+        footer = json.dumps(
+            {"month": month.isoformat(), "rows": rows, "moods": moods, "blocks": blocks}
+        ).encode()
+        fh.write(footer)
+        fh.write(len(footer).to_bytes(8, "little"))
+        fh.write(MAGIC)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """A memory-mapped segment file; blocks are decompressed on demand."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _TRAILER or self._map[-len(MAGIC):] != MAGIC:
+            self._map.close()
+            raise ArchiveError(f"{path} is not a session archive segment.")
+        size = int.from_bytes(self._map[-_TRAILER:-len(MAGIC)], "little")
+        footer = json.loads(self._map[-_TRAILER - size:-_TRAILER])
+        self.month = date.fromisoformat(footer["month"])
+        self.rows: int = footer["rows"]
+        self.moods: List[Optional[str]] = footer["moods"]
+        self.blocks: List[Dict[str, Any]] = footer["blocks"]
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _column(self, block: Dict[str, Any], name: str) -> np.ndarray:
+        offset, length = block["columns"][name]
+        dtype, delta = COLUMNS[name]
+        values = np.frombuffer(zlib.decompress(self._map[offset:offset + length]), dtype=dtype)
+        return np.cumsum(values, dtype=values.dtype) if delta else values
+
+    def blocks_for(
+        self,
+        user_id: Optional[int] = None,
+        first_day: Optional[int] = None,
+        last_day: Optional[int] = None,
+        columns: Iterable[str] = COLUMNS,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Column arrays of the matching rows, one dict per block that has any."""
+        columns = list(columns)
+        for block in self.blocks:
+            if user_id is not None and not block["user_min"] <= user_id <= block["user_max"]:
+                continue
+            if first_day is not None and block["day_max"] < first_day:
+                continue
+            if last_day is not None and block["day_min"] > last_day:
+                continue
+            arrays = {name: self._column(block, name) for name in columns}
+            mask = np.ones(block["rows"], dtype=bool)
+            if user_id is not None:
+                mask &= self._cached(arrays, block, "user_id") == user_id
+            if first_day is not None:
+                mask &= self._cached(arrays, block, "day") >= first_day
+            if last_day is not None:
+                mask &= self._cached(arrays, block, "day") <= last_day
+            if not mask.all():
+                if not mask.any():
+                    continue
+                arrays = {name: arrays[name][mask] for name in columns}
+            yield arrays
+
+    def _cached(self, arrays: Dict[str, np.ndarray], block: Dict[str, Any], name: str) -> np.ndarray:
+        if name not in arrays:
+            arrays[name] = self._column(block, name)
+        return arrays[name]
+
+    def rows_for(
+        self, user_id: Optional[int] = None, first_day: Optional[int] = None, last_day: Optional[int] = None
+    ) -> Iterator[Tuple[int, ...]]:
+        """Row tuples in `COLUMNS` order (mood as this segment's code), sorted."""
+        for arrays in self.blocks_for(user_id, first_day, last_day):
+            yield from zip(*(arrays[name].tolist() for name in COLUMNS))
+
+    def sessions_for(self, user_id: int, first_day: int, last_day: int) -> Iterator[ArchivedSession]:
+        """`user_id`'s sessions with local day in [first_day, last_day], by start time."""
+        for row in self.rows_for(user_id, first_day, last_day):
+            user, start_us, session_id, length_us, day, duration, reels, mood = row
+            yield ArchivedSession(
+                id=session_id,
+                user_id=user,
+                start_time=_from_micros(start_us),
+                end_time=_from_micros(start_us + length_us),
+                duration_minutes=None if duration < 0 else duration,
+                reels_watched=None if reels < 0 else reels,
+                mood=self.moods[mood],
+                date=day_from_number(day),
+            )
+
+
+def _dedupe(sessions: Iterator[Any]) -> Iterator[Any]:
+    """Drop rows repeating the previous row's id (the crash window of `archive_month`)."""
+    last_id = None
+    for session in sessions:
+        if session.id != last_id:
+            yield session
+        last_id = session.id
+
+
+class SessionArchive:
+    """The directory of monthly segment files."""
+
+    def __init__(self, directory: str, after_days: int, block_rows: int) -> None:
+        self.directory = directory
+        self.after_days = after_days
+        self.block_rows = block_rows
+        self.archived_rows = 0
+
+    def path_for(self, month: date) -> str:
+        return os.path.join(self.directory, f"sessions-{month.year:04d}-{month.month:02d}.seg")
+
+    def months(self) -> List[date]:
+        """First days of the archived months, ascending."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        months = []
+        for name in names:
+            if name.startswith("sessions-") and name.endswith(".seg"):
+                year, month = name[len("sessions-"):-len(".seg")].split("-")
+                months.append(date(int(year), int(month), 1))
+        return sorted(months)
+
+    def frozen_before(self) -> Optional[date]:
+        """Day after the newest archived month; summaries before it are not rebuilt."""
+        months = self.months()
+        return add_months(months[-1], 1) if months else None
+
+    @contextmanager
+    def open_segments(self, first: Optional[date] = None, last: Optional[date] = None) -> Iterator[List[Segment]]:
+        """The segments of months overlapping [first, last], memory-mapped."""
+        segments = []
+        try:
+            for month in self.months():
+                if (first is None or add_months(month, 1) > first) and (last is None or month <= last):
+                    segments.append(Segment(self.path_for(month)))
+            yield segments
+        finally:
+            for segment in segments:
+                segment.close()
+
+    # Reading ---------------------------------------------------------------
+
+    def user_arrays(self, user_id: int) -> List[Tuple[List[Optional[str]], Dict[str, np.ndarray]]]:
+        """`user_id`'s archived rows as (mood table, column arrays) per block, for analytics."""
+        out = []
+        with self.open_segments() as segments:
+            for segment in segments:
+                for arrays in segment.blocks_for(user_id):
+                    # Copies: the arrays must outlive the mapping.
+                    out.append((segment.moods, {k: np.array(v) for k, v in arrays.items()}))
+        return out
+
+    def export(
+        self, db: Session, user_id: int, first: Optional[date], last: Optional[date]
+    ) -> Iterator[Any]:
+        """
+        `user_id`'s sessions with local day in [first, last] from the archive
+        and the hot table, merged by (start time, id).
+
+        Hot rows are ORM objects, archived ones `ArchivedSession`; both carry
+        the `SessionResponse` fields. Memory stays bounded: segments are read
+        block by block and `sessions` through a server-side cursor.
+        """
+        stmt = (
+            select(SessionModel)
+            .where(SessionModel.user_id == user_id)
+            .order_by(SessionModel.start_time.asc(), SessionModel.id.asc())
+        )
+        if first is not None:
+            stmt = stmt.where(SessionModel.date >= first)
+        if last is not None:
+            stmt = stmt.where(SessionModel.date <= last)
+        hot = db.execute(stmt, execution_options={"yield_per": ARCHIVE_BATCH_SIZE}).scalars()
+        first_day = day_number(first) if first is not None else None
+        last_day = day_number(last) if last is not None else None
+        with self.open_segments(first, last) as segments:
+            sources = [segment.sessions_for(user_id, first_day, last_day) for segment in segments]
+            merged = heapq.merge(
+                *sources, hot, key=lambda s: (_micros(s.start_time), s.id)
+            )
+            yield from _dedupe(merged)
+
+    def max_id(self) -> int:
+        """Highest session id in any segment (0 with an empty archive)."""
+        highest = 0
+        with self.open_segments() as segments:
+            for segment in segments:
+                for arrays in segment.blocks_for(columns=("id",)):
+                    highest = max(highest, int(arrays["id"].max()))
+        return highest
+
+    # Archiving -------------------------------------------------------------
+
+    def cutoff(self, today: Optional[date] = None) -> date:
+        """First day of the newest month that stays hot."""
+        today = today or datetime.now(timezone.utc).date()
+        return (today - timedelta(days=self.after_days)).replace(day=1)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the archive's lock: no segment is written or rows moved meanwhile."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            yield
+
+    def archive(self, db: Session, cutoff: Optional[date] = None) -> List[Tuple[date, int]]:
+        """
+        Archive every finished session dated before `cutoff` (default `cutoff()`).
+
+        Returns (month, rows moved out of `sessions`) per archived month.
+        """
+        cutoff = cutoff or self.cutoff()
+        done = []
+        # Rows written before the date keys existed may lack month_key.
+        month_key = func.coalesce(
+            SessionModel.month_key,
+            year_of(db, SessionModel.date) * 100 + month_of(db, SessionModel.date),
+        )
+        with self.locked():
+            month_keys = db.execute(
+                select(month_key)
+                .where(SessionModel.date < cutoff, SessionModel.end_time.is_not(None))
+                .distinct()
+            ).scalars().all()
+            for key in sorted(month_keys):
+                month = date(key // 100, key % 100, 1)
+                done.append((month, self.archive_month(db, month)))
+        return done
+
+    def archive_month(self, db: Session, month: date) -> int:
+        """Merge `month`'s finished sessions into its segment and delete them; returns rows moved."""
+        next_month = add_months(month, 1)
+        in_month = [SessionModel.date >= month, SessionModel.date < next_month]
+        # Unordered: one month of every user is sorted in NumPy instead.
+        rows = db.execute(
+            select(
+                SessionModel.user_id,
+                SessionModel.start_time,
+                SessionModel.id,
+                SessionModel.end_time,
+                SessionModel.date,
+                SessionModel.duration_minutes,
+                SessionModel.reels_watched,
+                SessionModel.mood,
+            ).where(*in_month, SessionModel.end_time.is_not(None))
+        ).all()
+        db.rollback()  # end the read; rows closed meanwhile stay for the next run
+        count = len(rows)
+        moods: Dict[Optional[str], int] = {None: 0}
+        start_us = np.fromiter((_micros(r[1]) for r in rows), np.int64, count)
+        parts = [
+            {
+                "user_id": np.fromiter((r[0] for r in rows), np.int64, count),
+                "start_us": start_us,
+                "id": np.fromiter((r[2] for r in rows), np.int64, count),
+                "length_us": np.fromiter((_micros(r[3]) for r in rows), np.int64, count) - start_us,
+                "day": np.fromiter((day_number(r[4]) for r in rows), np.int64, count),
+                "duration": np.fromiter((-1 if r[5] is None else r[5] for r in rows), np.int64, count),
+                "reels": np.fromiter((-1 if r[6] is None else r[6] for r in rows), np.int64, count),
+                "mood": np.fromiter((moods.setdefault(r[7], len(moods)) for r in rows), np.int64, count),
+            }
+        ]
+        moved = parts[0]["id"]
+        del rows
+
+        path = self.path_for(month)
+        if os.path.exists(path):
+            existing = Segment(path)
+            try:
+                recode = np.array([moods.setdefault(m, len(moods)) for m in existing.moods], np.int64)
+                for arrays in existing.blocks_for():
+                    arrays = {name: values.astype(np.int64) for name, values in arrays.items()}
+                    arrays["mood"] = recode[arrays["mood"]]
+                    parts.append(arrays)
+            finally:
+                existing.close()
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+        order = np.lexsort((columns["id"], columns["start_us"], columns["user_id"]))
+        columns = {name: values[order] for name, values in columns.items()}
+        # Rows already archived by a run that crashed before its delete.
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = columns["id"][1:] != columns["id"][:-1]
+        if not keep.all():
+            columns = {name: values[keep] for name, values in columns.items()}
+        write_segment(path, month, columns, list(moods), self.block_rows)
+
+        ids = moved.tolist()
+        for start in range(0, len(ids), ARCHIVE_BATCH_SIZE):
+            chunk = ids[start:start + ARCHIVE_BATCH_SIZE]
+            db.execute(delete(SessionModel).where(*in_month, SessionModel.id.in_(chunk)))
+        drop_month_if_empty(db.connection(), month)
+        db.commit()
+        self.archived_rows += len(ids)
+        return len(ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "months": len(self.months()),
+            "after_days": self.after_days,
+            "archived_rows": self.archived_rows,
+        }
+
+
+_settings = get_settings()
+
+session_archive = SessionArchive(
+    directory=_settings.ARCHIVE_DIR,
+    after_days=_settings.ARCHIVE_AFTER_DAYS,
+    block_rows=_settings.ARCHIVE_BLOCK_ROWS,
+)
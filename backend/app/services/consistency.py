@@ -0,0 +1,344 @@
+"""
+Consistency check and repair of `daily_summaries` against `sessions`.
+
+`DailySummary` is only ever updated incrementally (`record_session_totals`),
+so a crash outside a transaction, a manual edit or a buggy bulk path can
+leave it disagreeing with the sessions it summarizes. `check_daily_summaries`
+(`python -m app.cli check-summaries`) recomputes every day from the
+sessions themselves and reports, or with `repair` fixes, the rows that differ.
+
+The days holding any data are split into chunks spanning at most
+`CHECK_CHUNK_DAYS` days, checked in parallel worker processes. Each chunk
+is one statement: the per-day session aggregate and the stored rows are
+UNIONed and grouped by (user, day), so the database returns only the days
+that differ, both sides read from the same snapshot. Days before
+`session_archive.frozen_before()` are checked against the archive segments
+plus any of their rows still in `sessions` (deduplicated by id, as readers
+of the archive do).
+
+Repairs are applied in the parent in transactions of `CHECK_BATCH_SIZE`
+rows, as deltas (expected - stored as seen by the check) added with the
+same atomic upsert as `record_session_totals`. A session ended while the
+check runs is therefore neither lost nor counted twice. Rows left with no
+sessions are deleted. The affected users' weekly/monthly rollups and
+streaks are then recomputed for the corrected span; past `CHECK_BATCH_SIZE`
+users, in one set-based pass over every user instead.
+
+The archive lock is held throughout, so months cannot move into the archive
+while their chunk is in flight.
+"""
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, literal, null, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.core.cache import summary_cache
+from app.db.dialect import all_users_dated, dialect_insert
+from app.db.partitions import add_months
+from app.db.session import ReadSessionLocal
+from app.models.daily_summary import DailySummary
+from app.models.session import Session as SessionModel
+from app.services.archive import day_from_number, day_number, session_archive
+from app.services.summaries import rebuild_rollups, refresh_user_streaks, repair_streaks
+
+Totals = Tuple[int, int, int]  # (sessions, reels, minutes)
+
+_NONE: Totals = (0, 0, 0)
+
+_TOTAL_COLUMNS = ("total_sessions", "total_reels", "total_minutes")
+
+# Bits of a (user_id, day number) key packed into one int64 for NumPy grouping.
+_DAY_BITS = 20
+
+
+@dataclass(frozen=True)
+class DayCorrection:
+    """One (user, day) whose stored totals differ from its sessions."""
+
+    user_id: int
+    day: date
+    stored: Totals
+    expected: Totals
+
+    @property
+    def kind(self) -> str:
+        if self.stored == _NONE:
+            return "missing"
+        if self.expected == _NONE:
+            return "orphaned"
+        return "wrong"
+
+    @property
+    def delta(self) -> Totals:
+        return tuple(e - s for e, s in zip(self.expected, self.stored))  # type: ignore[return-value]
+
+
+@dataclass
+class CheckResult:
+    start: Optional[date]
+    end: Optional[date]
+    chunks: int = 0
+    missing: int = 0
+    orphaned: int = 0
+    wrong: int = 0
+    repaired: int = 0
+    users: int = 0
+    samples: List[DayCorrection] = field(default_factory=list)
+
+    @property
+    def mismatches(self) -> int:
+        return self.missing + self.orphaned + self.wrong
+
+
+def date_chunks(
+    days: List[date], span: int, split_at: Optional[date] = None
+) -> List[Tuple[date, date]]:
+    """
+    Inclusive ranges covering the sorted `days`, each at most `span` days long.
+
+    Gaps between days are skipped, so a stray row years before the rest does
+    not add a run of empty chunks. No range straddles `split_at`.
+    """
+    chunks: List[Tuple[date, date]] = []
+    for day in days:
+        if chunks:
+            lo, hi = chunks[-1]
+            crosses = split_at is not None and lo < split_at <= day
+            if (day - lo).days < span and not crosses:
+                chunks[-1] = (lo, day)
+                continue
+        chunks.append((day, day))
+    return chunks
+
+
+def _hot_chunk(db: Session, lo: date, hi: date) -> List[DayCorrection]:
+    """Days in [lo, hi] where `daily_summaries` disagrees with finished `sessions`."""
+    s, d = SessionModel, DailySummary
+    zero = literal(0)
+    sides = union_all(
+        select(
+            s.user_id.label("user_id"),
+            s.date.label("day"),
+            func.count().label("e_sessions"),
+            func.coalesce(func.sum(s.reels_watched), 0).label("e_reels"),
+            func.coalesce(func.sum(s.duration_minutes), 0).label("e_minutes"),
+            zero.label("s_sessions"),
+            zero.label("s_reels"),
+            zero.label("s_minutes"),
+        )
+        .where(*all_users_dated(db, s.user_id, s.date, lo, hi), s.end_time.is_not(None))
+        .group_by(s.user_id, s.date),
+        select(
+            d.user_id, d.summary_date, zero, zero, zero,
+            d.total_sessions, d.total_reels, d.total_minutes,
+        ).where(*all_users_dated(db, d.user_id, d.summary_date, lo, hi)),
+    ).subquery()
+    totals = [func.sum(column) for column in list(sides.c)[2:]]
+    stmt = (
+        select(sides.c.user_id, sides.c.day, *totals)
+        .group_by(sides.c.user_id, sides.c.day)
+        .having(or_(totals[0] != totals[3], totals[1] != totals[4], totals[2] != totals[5]))
+    )
+    return [
+        DayCorrection(user_id, day, (ss, sr, sm), (es, er, em))
+        for user_id, day, es, er, em, ss, sr, sm in db.execute(stmt)
+    ]
+
+
+def _frozen_chunk(db: Session, lo: date, hi: date) -> List[DayCorrection]:
+    """Like `_hot_chunk` for archived days: expected totals come from the segments."""
+    s, d = SessionModel, DailySummary
+    # Hot rows (late or not yet deleted) and stored rows from one snapshot.
+    rows = db.execute(
+        union_all(
+            select(
+                s.id, s.user_id, s.date, literal(1),
+                func.coalesce(s.reels_watched, 0), func.coalesce(s.duration_minutes, 0),
+            ).where(*all_users_dated(db, s.user_id, s.date, lo, hi), s.end_time.is_not(None)),
+            select(
+                null(), d.user_id, d.summary_date,
+                d.total_sessions, d.total_reels, d.total_minutes,
+            ).where(*all_users_dated(db, d.user_id, d.summary_date, lo, hi)),
+        )
+    ).all()
+    stored: Dict[Tuple[int, date], Totals] = {}
+    hot = []
+    for row_id, user_id, day, count, reels, minutes in rows:
+        if row_id is None:
+            stored[(user_id, day)] = (count, reels, minutes)
+        else:
+            hot.append((row_id, user_id, day_number(day), reels, minutes))
+
+    parts = []
+    with session_archive.open_segments(lo, hi) as segments:
+        for segment in segments:
+            for arrays in segment.blocks_for(
+                first_day=day_number(lo),
+                last_day=day_number(hi),
+                columns=("user_id", "id", "day", "reels", "duration"),
+            ):
+                parts.append({name: np.array(values, np.int64) for name, values in arrays.items()})
+    archived_ids = np.concatenate([p["id"] for p in parts]) if parts else np.empty(0, np.int64)
+    if hot:
+        ids, users, days, reels, minutes = (np.array(c, np.int64) for c in zip(*hot))
+        fresh = ~np.isin(ids, archived_ids)
+        parts.append(
+            {"user_id": users[fresh], "day": days[fresh], "reels": reels[fresh], "duration": minutes[fresh]}
+        )
+
+    expected: Dict[Tuple[int, date], Totals] = {}
+    if parts:
+        keys = np.concatenate([(p["user_id"] << _DAY_BITS) | p["day"] for p in parts])
+        groups, inverse = np.unique(keys, return_inverse=True)
+        # -1 marks a missing count in segments; it sums as 0 like NULL does.
+        sums = [
+            np.bincount(inverse, minlength=len(groups)),
+            np.bincount(inverse, np.concatenate([np.maximum(p["reels"], 0) for p in parts]), len(groups)),
+            np.bincount(inverse, np.concatenate([np.maximum(p["duration"], 0) for p in parts]), len(groups)),
+        ]
+        for key, count, reels, minutes in zip(groups.tolist(), *(a.tolist() for a in sums)):
+            day = day_from_number(key & ((1 << _DAY_BITS) - 1))
+            expected[(key >> _DAY_BITS, day)] = (int(count), int(reels), int(minutes))
+
+    return [
+        DayCorrection(user_id, day, stored.get((user_id, day), _NONE), expected.get((user_id, day), _NONE))
+        for user_id, day in sorted(stored.keys() | expected.keys())
+        if stored.get((user_id, day), _NONE) != expected.get((user_id, day), _NONE)
+    ]
+
+
+def check_chunk(lo: date, hi: date, frozen: bool) -> List[DayCorrection]:
+    """Check one chunk in its own read-only session (the worker process entry point)."""
+    db = ReadSessionLocal()
+    try:
+        return (_frozen_chunk if frozen else _hot_chunk)(db, lo, hi)
+    finally:
+        db.close()
+
+
+def apply_corrections(db: Session, corrections: List[DayCorrection]) -> None:
+    """Add each correction's delta to its daily row and drop emptied rows; one transaction."""
+    daily = DailySummary.__table__
+    stmt = dialect_insert(db)(daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[daily.c.user_id, daily.c.date],
+        set_={name: daily.c[name] + stmt.excluded[name] for name in _TOTAL_COLUMNS},
+    )
+    db.execute(
+        stmt,
+        [
+            dict(zip(_TOTAL_COLUMNS, c.delta), user_id=c.user_id, date=c.day)
+            for c in corrections
+        ],
+    )
+    orphaned = [(c.user_id, c.day) for c in corrections if c.expected == _NONE]
+    if orphaned:
+        db.execute(
+            delete(daily).where(
+                tuple_(daily.c.user_id, daily.c.date).in_(orphaned), daily.c.total_sessions <= 0
+            )
+        )
+    db.commit()
+
+
+def _data_days(db: Session, start: Optional[date], end: Optional[date]) -> List[date]:
+    """Sorted days in [start, end] with sessions, stored summaries or archived sessions."""
+    days = set()
+    for day in (SessionModel.date, DailySummary.summary_date):
+        stmt = select(day).distinct()
+        if start is not None:
+            stmt = stmt.where(day >= start)
+        if end is not None:
+            stmt = stmt.where(day <= end)
+        days.update(db.execute(stmt).scalars())
+    for month in session_archive.months():
+        day, next_month = month, add_months(month, 1)
+        while day < next_month:
+            if (start is None or day >= start) and (end is None or day <= end):
+                days.add(day)
+            day += timedelta(days=1)
+    return sorted(days)
+
+
+def _completed(
+    chunks: List[Tuple[date, date]], frozen_before: Optional[date], workers: int
+) -> Iterator[List[DayCorrection]]:
+    """Each chunk's corrections, in completion order."""
+    frozen = [frozen_before is not None and hi < frozen_before for _, hi in chunks]
+    if workers <= 1 or len(chunks) <= 1:
+        for (lo, hi), is_frozen in zip(chunks, frozen):
+            yield check_chunk(lo, hi, is_frozen)
+        return
+    # Spawned, not forked: children must not inherit the parent's connections.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(min(workers, len(chunks)), mp_context=context) as pool:
+        futures = [
+            pool.submit(check_chunk, lo, hi, is_frozen)
+            for (lo, hi), is_frozen in zip(chunks, frozen)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def check_daily_summaries(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    chunk_days: int = 31,
+    workers: int = 0,
+    repair: bool = False,
+    batch_size: int = 1000,
+    samples: int = 10,
+) -> CheckResult:
+    """
+    Compare `daily_summaries` over [start, end] (default: all data) with the sessions.
+
+    With `repair`, corrections are applied as chunks complete; otherwise
+    nothing is written. `workers` 0 means one process per CPU.
+    """
+    workers = workers or os.cpu_count() or 1
+    with session_archive.locked():
+        days = _data_days(db, start, end)
+        result = CheckResult(start=days[0] if days else None, end=days[-1] if days else None)
+        if not days:
+            return result
+        frozen_before = session_archive.frozen_before()
+        chunks = date_chunks(days, chunk_days, frozen_before)
+        result.chunks = len(chunks)
+        db.rollback()  # no snapshot held while the workers run
+
+        touched: Dict[int, List[date]] = defaultdict(list)
+        for corrections in _completed(chunks, frozen_before, workers):
+            for c in corrections:
+                setattr(result, c.kind, getattr(result, c.kind) + 1)
+                touched[c.user_id].append(c.day)
+            result.samples.extend(corrections[: max(0, samples - len(result.samples))])
+            if repair:
+                for i in range(0, len(corrections), batch_size):
+                    apply_corrections(db, corrections[i:i + batch_size])
+                result.repaired += len(corrections)
+
+        result.users = len(touched)
+        if repair and len(touched) > batch_size:
+            # Many users: one set-based pass beats a transaction per user.
+            rebuild_rollups(
+                db,
+                start=min(min(days) for days in touched.values()),
+                end=max(max(days) for days in touched.values()),
+            )
+            repair_streaks(db)
+            summary_cache.clear()
+        elif repair:
+            for user_id, days in touched.items():
+                rebuild_rollups(db, user_id, min(days), max(days), commit=False)
+                refresh_user_streaks(db, user_id)
+                db.commit()
+                summary_cache.invalidate_user(user_id)
+    return result
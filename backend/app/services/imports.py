@@ -0,0 +1,219 @@
+"""
+Bulk import of finished historical sessions.
+
+Rows are inserted with chunked `executemany` INSERTs, then the affected
+summaries are recomputed set-based: one INSERT ... SELECT ... GROUP BY over
+`sessions` for the imported date range instead of a per-row upsert.
+"""
+import csv
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timezone, tzinfo
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.dialect import sync_session_ids
+from app.models.daily_summary import DailySummary
+from app.models.session import Session as SessionModel
+from app.services.archive import session_archive
+from app.services.summaries import (
+    date_keys,
+    fold_sessions,
+    rebuild_breakdowns,
+    rebuild_rollups,
+    refresh_user_streaks,
+)
+from app.services.timezones import local_date, user_zones
+
+# Rows per executemany round-trip.
+INSERT_CHUNK_SIZE = 10000
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class SessionImportError(ValueError):
+    """A row in an import batch could not be parsed."""
+
+
+@dataclass
+class ImportResult:
+    imported: int
+    first_date: Optional[date]
+    last_date: Optional[date]
+
+
+def _parse_datetime(value: Any, field: str, record_no: int) -> datetime:
+    try:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise SessionImportError(f"Record {record_no}: invalid {field} {value!r}.")
+    # Naive timestamps are taken as UTC, like the rest of the API.
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _parse_optional_int(value: Any, field: str, record_no: int) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise SessionImportError(f"Record {record_no}: invalid {field} {value!r}.")
+    if number < 0:
+        raise SessionImportError(f"Record {record_no}: {field} must be >= 0.")
+    return number
+
+
+def _parse_row(
+    raw: Dict[str, Any], user_id: int, record_no: int, zone: tzinfo
+) -> Dict[str, Any]:
+    """
+    Validate one raw record into a `sessions` row.
+
+    Fields: `start_time`, `end_time` (ISO 8601), optional `reels_watched`,
+    `mood` and `date` (client-local day; defaults to the start date in
+    `zone`, the user's time zone).
+    """
+    if not raw.get("start_time") or not raw.get("end_time"):
+        raise SessionImportError(f"Record {record_no}: start_time and end_time are required.")
+    start = _parse_datetime(raw["start_time"], "start_time", record_no)
+    end = _parse_datetime(raw["end_time"], "end_time", record_no)
+    if end < start:
+        raise SessionImportError(f"Record {record_no}: end_time is before start_time.")
+
+    raw_day = raw.get("date")
+    try:
+        day = date.fromisoformat(str(raw_day).strip()) if raw_day else local_date(start, zone)
+    except ValueError:
+        raise SessionImportError(f"Record {record_no}: invalid date {raw_day!r}.")
+
+    return {
+        "user_id": user_id,
+        "start_time": start,
+        "end_time": end,
+        "duration_minutes": int((end - start).total_seconds() // 60),
+        "reels_watched": _parse_optional_int(raw.get("reels_watched"), "reels_watched", record_no),
+        "mood": raw.get("mood") or None,
+        "date": day,
+        **date_keys(day),
+    }
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw records from CSV (with header) or NDJSON text lines."""
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                raise SessionImportError(f"Line {line_no}: invalid JSON.")
+    else:
+        raise SessionImportError(f"Unsupported import format {fmt!r}; use one of {IMPORT_FORMATS}.")
+
+
+def _recompute_daily_summaries(db: Session, user_id: int, first: date, last: date) -> None:
+    """Replace `user_id`'s daily summaries in [first, last] with one aggregate."""
+    db.query(DailySummary).filter(
+        DailySummary.user_id == user_id,
+        DailySummary.summary_date >= first,
+        DailySummary.summary_date <= last,
+    ).delete(synchronize_session=False)
+    aggregate = (
+        select(
+            SessionModel.user_id,
+            SessionModel.date,
+            func.count(),
+            func.coalesce(func.sum(SessionModel.reels_watched), 0),
+            func.coalesce(func.sum(SessionModel.duration_minutes), 0),
+        )
+        .where(
+            SessionModel.user_id == user_id,
+            SessionModel.date >= first,
+            SessionModel.date <= last,
+            SessionModel.end_time.is_not(None),
+        )
+        .group_by(SessionModel.user_id, SessionModel.date)
+    )
+    db.execute(
+        insert(DailySummary.__table__).from_select(
+            ["user_id", "date", "total_sessions", "total_reels", "total_minutes"], aggregate
+        )
+    )
+
+
+def import_sessions(
+    db: Session,
+    user_id: int,
+    records: Iterable[Dict[str, Any]],
+    id_source: Optional[Callable[[], int]] = None,
+) -> ImportResult:
+    """
+    Insert finished sessions for `user_id` and bring all summaries up to date.
+
+    Everything happens in one transaction: a bad row rolls the batch back.
+    Rows are not de-duplicated against existing sessions. `id_source`, when
+    given, assigns session ids (the ingest queue owns allocation while enabled).
+
+    Daily summaries of archived months (`session_archive.frozen_before()`)
+    cannot be recomputed from `sessions`, so rows for those days are folded
+    into them incrementally instead; the next archive run moves the rows.
+    """
+    table = SessionModel.__table__
+    imported = 0
+    first: Optional[date] = None
+    last: Optional[date] = None
+    # Range of the rows whose daily summaries are recomputed from `sessions`.
+    hot_first: Optional[date] = None
+    hot_last: Optional[date] = None
+    frozen_before = session_archive.frozen_before()
+    chunk: List[Dict[str, Any]] = []
+    zone = user_zones.get(db, user_id)
+
+    def flush() -> None:
+        db.execute(insert(table), chunk)
+        frozen = [row for row in chunk if frozen_before and row["date"] < frozen_before]
+        if frozen:
+            fold_sessions(db, frozen)
+
+    try:
+        for record_no, raw in enumerate(records, start=1):
+            row = _parse_row(raw, user_id, record_no, zone)
+            if id_source is not None:
+                row["id"] = id_source()
+            day = row["date"]
+            first = day if first is None else min(first, day)
+            last = day if last is None else max(last, day)
+            if frozen_before is None or day >= frozen_before:
+                hot_first = day if hot_first is None else min(hot_first, day)
+                hot_last = day if hot_last is None else max(hot_last, day)
+            chunk.append(row)
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                flush()
+                imported += len(chunk)
+                chunk = []
+        if chunk:
+            flush()
+            imported += len(chunk)
+        if imported and id_source is not None:
+            sync_session_ids(db)
+
+        if imported:
+            if hot_first is not None:
+                _recompute_daily_summaries(db, user_id, hot_first, hot_last)
+            db.flush()
+            rebuild_rollups(db, user_id=user_id, start=first, end=last, commit=False)
+            rebuild_breakdowns(db, user_id=user_id, start=first, end=last, commit=False)
+            refresh_user_streaks(db, user_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return ImportResult(imported=imported, first_date=first, last_date=last)
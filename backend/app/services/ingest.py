@@ -0,0 +1,477 @@
+"""
+Write-behind ingestion of session start/end events.
+
+In ingestion mode `start_session`/`end_session` no longer commit: they
+append one JSON event to an append-only log file and return immediately.
+A background worker group-commits everything pending in one transaction:
+one executemany INSERT for starts, one conditional UPDATE per end, and
+one summary upsert per (user, day) with the batch's aggregated totals.
+
+Until a batch is committed its sessions live in an in-memory overlay, so
+`GET /session/active` (and start/end validation) read their own writes.
+
+Applying a batch is idempotent (starts carry their id and insert with
+ON CONFLICT DO NOTHING; ends only claim still-open rows), so after a crash
+the log is simply replayed on the next startup. An end whose row was closed
+meanwhile by someone else (the stale-session sweeper, or a direct end) is
+not applied or counted in the summaries; it is logged and counted in
+`lost_ends` instead.
+
+The queue owns session id allocation while enabled; run one server process
+per database and stop it before using `python -m app.cli import-sessions`.
+"""
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.cache import summary_cache
+from app.core.config import get_settings
+from app.db.dialect import (
+    dialect_insert,
+    is_postgres,
+    session_id_high_water,
+    session_key_columns,
+    sync_session_ids,
+)
+from app.models.session import Session as SessionModel
+from app.services.analytics import column_store
+from app.services.push import publish_summary_changes
+from app.services.summaries import date_keys, fold_sessions
+from app.services.timezones import as_utc
+
+logger = logging.getLogger(__name__)
+
+_DATETIME_FIELDS = ("start_time", "end_time")
+
+
+class StaleView(Exception):
+    """A batch for this user was committed after the caller's `view()`; retry."""
+
+
+@dataclass(frozen=True)
+class IngestView:
+    """One user's uncommitted sessions, as of `version`."""
+
+    version: int
+    rows: Dict[int, Dict[str, Any]]
+    active_id: Optional[int]
+    ended: FrozenSet[int]
+
+    def session(self, session_id: int) -> Optional[SessionModel]:
+        row = self.rows.get(session_id)
+        return SessionModel(**row) if row is not None else None
+
+    @property
+    def active(self) -> Optional[SessionModel]:
+        return self.session(self.active_id) if self.active_id is not None else None
+
+
+def _encode_event(event: Dict[str, Any]) -> str:
+    return json.dumps(event, default=lambda v: v.isoformat(), separators=(",", ":"))
+
+
+def _decode_event(line: str) -> Dict[str, Any]:
+    event = json.loads(line)
+    for field in _DATETIME_FIELDS:
+        if event.get(field) is not None:
+            event[field] = datetime.fromisoformat(event[field])
+    event["date"] = date.fromisoformat(event["date"])
+    return event
+
+
+def _read_log(path: str) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                events.append(_decode_event(line))
+            except (ValueError, KeyError):
+                # A torn final write from a crash; everything before it is intact.
+                logger.warning("Skipping unreadable ingest log line %s:%d", path, line_no)
+    return events
+
+
+def _session_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": event["id"],
+        "user_id": event["user_id"],
+        "start_time": event["start_time"],
+        "end_time": None,
+        "duration_minutes": None,
+        "reels_watched": None,
+        "mood": None,
+        "date": event["date"],
+        **date_keys(event["date"]),
+    }
+
+
+@dataclass(frozen=True)
+class AppliedBatch:
+    """Outcome of `apply_events`."""
+
+    # (user_id, day, new_day) for every summary day that changed.
+    changed: List[Tuple[int, date, bool]]
+    # Ends not applied because their session was already closed.
+    lost_ends: List[int]
+
+
+def apply_events(db: Session, events: Iterable[Dict[str, Any]]) -> AppliedBatch:
+    """
+    Apply a batch of start/end events in the caller's session and commit.
+
+    Each end claims its row with `UPDATE ... WHERE end_time IS NULL`, like
+    `end_session` and the sweeper, and only rows it actually changed are
+    folded into the summaries: a session closed by another writer between
+    the event and this batch is never counted twice.
+    """
+    table = SessionModel.__table__
+    starts: List[Dict[str, Any]] = []
+    ends: Dict[int, Dict[str, Any]] = {}
+    for event in events:
+        if event["type"] == "start":
+            starts.append(_session_row(event))
+        else:
+            ends.setdefault(event["id"], event)
+
+    if starts:
+        insert = dialect_insert(db)
+        db.execute(
+            insert(table).on_conflict_do_nothing(index_elements=session_key_columns(db)), starts
+        )
+        sync_session_ids(db)
+
+    claimed: List[Dict[str, Any]] = []
+    lost: List[int] = []
+    for session_id, e in ends.items():
+        rows = db.execute(
+            update(table)
+            .where(table.c.id == session_id, table.c.end_time.is_(None))
+            .values(
+                end_time=e["end_time"],
+                duration_minutes=e["duration_minutes"],
+                reels_watched=e["reels_watched"],
+                mood=e["mood"],
+            )
+        ).rowcount
+        if rows:
+            claimed.append(e)
+        else:
+            lost.append(session_id)
+
+    changed = fold_sessions(db, claimed) if claimed else []
+    db.commit()
+    return AppliedBatch(changed=changed, lost_ends=lost)
+
+
+class IngestQueue:
+    """
+    Append-only event log plus the in-memory overlay of uncommitted sessions.
+
+    Appends rotate into `<log>.applying` when the worker takes a batch; that
+    file is deleted once the batch commits, so at most two files exist.
+    """
+
+    def __init__(
+        self,
+        log_path: str,
+        batch_size: int,
+        flush_interval: float,
+        fsync: bool = False,
+        enabled: bool = True,
+    ) -> None:
+        self.log_path = log_path
+        self.applying_path = log_path + ".applying"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Serializes batch application (worker vs. explicit `flush()`).
+        self._flush_lock = threading.Lock()
+        self._session_factory: Optional[Callable[[], Session]] = None
+        # SQLite hands timestamps back naive; the overlay must answer the same.
+        self._naive_times = True
+        self._log = None
+        self._next_id = 1
+        self._events: List[Dict[str, Any]] = []
+        self._inflight: List[Dict[str, Any]] = []
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._refs: Dict[int, int] = defaultdict(int)
+        self._active: Dict[int, int] = {}
+        self._ended: Dict[int, int] = {}
+        self._versions: Dict[int, int] = defaultdict(int)
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.appended = 0
+        self.applied = 0
+        self.batches = 0
+        self.lost_ends = 0
+
+    # Lifecycle -------------------------------------------------------------
+
+    def open(self, session_factory: Callable[[], Session]) -> int:
+        """Replay any log left by a previous run, then start accepting events."""
+        self._session_factory = session_factory
+        replayed = 0
+        for path in (self.applying_path, self.log_path):
+            if not os.path.exists(path):
+                continue
+            events = _read_log(path)
+            if events:
+                # Ends applied before the crash are found closed again here:
+                # expected, so not reported as lost.
+                self._apply(events)
+                replayed += len(events)
+            os.remove(path)
+
+        db = session_factory()
+        try:
+            # Not MAX(id): archived rows are gone from `sessions` but keep their ids.
+            high_water = session_id_high_water(db)
+            self._naive_times = not is_postgres(db)
+        finally:
+            db.close()
+        self._next_id = high_water + 1
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        return replayed
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the worker after draining everything still pending."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            with self._wakeup:
+                self._wakeup.wait_for(
+                    lambda: len(self._events) >= self.batch_size or self._stopping.is_set(),
+                    timeout=self.flush_interval,
+                )
+            try:
+                self.flush()
+            except Exception:
+                # Keep the batch (and its log file) and retry on the next tick.
+                logger.exception("Ingest batch failed; will retry")
+                self._stopping.wait(self.flush_interval)
+
+    # Producers -------------------------------------------------------------
+
+    def allocate_id(self) -> int:
+        with self._lock:
+            session_id = self._next_id
+            self._next_id += 1
+            return session_id
+
+    def view(self, user_id: int) -> IngestView:
+        with self._lock:
+            rows = {
+                session_id: dict(row)
+                for session_id, row in self._rows.items()
+                if row["user_id"] == user_id
+            }
+            return IngestView(
+                version=self._versions[user_id],
+                rows=rows,
+                active_id=self._active.get(user_id),
+                ended=frozenset(rows.keys() & self._ended.keys()),
+            )
+
+    def start_session(
+        self, view: IngestView, user_id: int, start_time: datetime, local_date: date
+    ) -> Optional[SessionModel]:
+        """
+        Queue a session start. Returns None if `user_id` meanwhile started
+        another session; raises `StaleView` if `view` is out of date.
+        """
+        with self._lock:
+            if self._versions[user_id] != view.version:
+                raise StaleView()
+            if user_id in self._active:
+                return None
+            session_id = self._next_id
+            self._next_id += 1
+            event = {
+                "type": "start",
+                "id": session_id,
+                "user_id": user_id,
+                "start_time": start_time,
+                "date": local_date,
+            }
+            self._append(event)
+            self._rows[session_id] = _session_row(dict(event, start_time=self._stored(start_time)))
+            self._active[user_id] = session_id
+            return SessionModel(**self._rows[session_id])
+
+    def end_session(
+        self,
+        view: IngestView,
+        session: SessionModel,
+        end_time: datetime,
+        duration_minutes: int,
+        reels_watched: Optional[int],
+        mood: Optional[str],
+    ) -> Optional[SessionModel]:
+        """
+        Queue a session end. Returns None if the session was meanwhile ended;
+        raises `StaleView` if `view` is out of date.
+        """
+        with self._lock:
+            if self._versions[session.user_id] != view.version:
+                raise StaleView()
+            if session.id in self._ended:
+                return None
+            event = {
+                "type": "end",
+                "id": session.id,
+                "user_id": session.user_id,
+                "start_time": session.start_time,
+                "end_time": end_time,
+                "duration_minutes": duration_minutes,
+                "reels_watched": reels_watched,
+                "mood": mood,
+                "date": session.date,
+            }
+            self._append(event)
+            row = self._rows.get(session.id) or {
+                "id": session.id,
+                "user_id": session.user_id,
+                "start_time": self._stored(session.start_time),
+                "date": session.date,
+            }
+            row.update(
+                end_time=self._stored(end_time),
+                duration_minutes=duration_minutes,
+                reels_watched=reels_watched,
+                mood=mood,
+            )
+            self._rows[session.id] = row
+            self._ended[session.id] = session.user_id
+            if self._active.get(session.user_id) == session.id:
+                del self._active[session.user_id]
+            return SessionModel(**row)
+
+    def _stored(self, moment: datetime) -> datetime:
+        """`moment` as the database reads it back, so both modes answer alike."""
+        moment = as_utc(moment)
+        return moment.replace(tzinfo=None) if self._naive_times else moment
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        # Caller holds the lock: log order matches overlay order.
+        self._log.write(_encode_event(event) + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._events.append(event)
+        self._refs[event["id"]] += 1
+        self.appended += 1
+        if len(self._events) >= self.batch_size:
+            self._wakeup.notify()
+
+    # Consumer --------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Commit everything pending now; returns the number of events applied."""
+        with self._flush_lock:
+            if not self._inflight:
+                with self._lock:
+                    if not self._events:
+                        return 0
+                    self._inflight, self._events = self._events, []
+                    # Rotate so new appends never mix with the batch being applied.
+                    self._log.close()
+                    os.replace(self.log_path, self.applying_path)
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+
+            events = self._inflight
+            batch = self._apply(events)
+            changed = batch.changed
+            os.remove(self.applying_path)
+            self._inflight = []
+            self._release(events)
+            for user_id, day, new_day in changed:
+                summary_cache.invalidate_day(user_id, day, streaks=new_day)
+                column_store.invalidate(user_id)
+            self.batches += 1
+            self.applied += len(events)
+            if batch.lost_ends:
+                self.lost_ends += len(batch.lost_ends)
+                logger.warning(
+                    "Queued end of session(s) %s not applied: already closed "
+                    "(stale-session sweeper or a direct end)",
+                    batch.lost_ends,
+                )
+            try:
+                publish_summary_changes(self._session_factory, changed)
+            except Exception:
+                # The batch is committed; clients just miss this update.
+                logger.exception("Publishing summary changes failed")
+            return len(events)
+
+    def _apply(self, events: List[Dict[str, Any]]) -> AppliedBatch:
+        db = self._session_factory()
+        try:
+            return apply_events(db, events)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _release(self, events: List[Dict[str, Any]]) -> None:
+        """Drop committed sessions from the overlay; readers now see them in the DB."""
+        with self._lock:
+            for event in events:
+                session_id, user_id = event["id"], event["user_id"]
+                self._versions[user_id] += 1
+                self._refs[session_id] -= 1
+                if self._refs[session_id]:
+                    continue
+                del self._refs[session_id]
+                self._rows.pop(session_id, None)
+                self._ended.pop(session_id, None)
+                if self._active.get(user_id) == session_id:
+                    del self._active[user_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._events) + len(self._inflight),
+                "appended": self.appended,
+                "applied": self.applied,
+                "batches": self.batches,
+                "lost_ends": self.lost_ends,
+            }
+
+
+_settings = get_settings()
+ingest_queue = IngestQueue(
+    log_path=_settings.INGEST_LOG_PATH,
+    batch_size=_settings.INGEST_BATCH_SIZE,
+    flush_interval=_settings.INGEST_FLUSH_INTERVAL_MS / 1000.0,
+    fsync=_settings.INGEST_FSYNC,
+    enabled=_settings.INGEST_QUEUE_ENABLED,
+)
@@ -0,0 +1,114 @@
+"""
+Session and summary update events for the push channel (`/events`).
+
+Session events carry the session as `SessionResponse` fields. After a
+summary write commits, the summary rows it touched (the day, its ISO week
+and its month, plus streaks when a new day started) are re-read and
+published whole. Clients upsert them by key, so an event is idempotent and
+can safely be applied on top of a snapshot that already includes it.
+Nothing is read unless the user has a connected client.
+"""
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.pubsub import Event, event_broker
+from app.models.daily_summary import DailySummary
+from app.models.monthly_summary import MonthlySummary
+from app.models.weekly_summary import WeeklySummary
+from app.services.summaries import current_streaks, month_start_of, week_start_of
+from app.services.timezones import user_zones
+
+
+def session_payload(row: Any) -> Dict[str, Any]:
+    """`SessionResponse` fields of an ORM object or a plain row, in schema order."""
+    return {
+        "reels_watched": row.reels_watched,
+        "mood": row.mood,
+        "id": row.id,
+        "start_time": row.start_time,
+        "end_time": row.end_time,
+        "duration_minutes": row.duration_minutes,
+        "date": row.date,
+    }
+
+
+def publish_session(event_type: str, session: Any) -> None:
+    """Publish `session.started` / `session.ended` if the owner has a connected client."""
+    if event_broker.has_subscribers(session.user_id):
+        event_broker.publish(
+            session.user_id, {"type": event_type, "session": session_payload(session)}
+        )
+
+
+def _row(db: Session, stmt: Any) -> Optional[Dict[str, Any]]:
+    row = db.execute(stmt).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def summary_event(db: Session, user_id: int, day: date, new_day: bool) -> Event:
+    """`summary.changed` event with the current daily, weekly and monthly rows of `day`."""
+    event: Event = {
+        "type": "summary.changed",
+        "date": day,
+        # Same fields as the /summary/daily, /weekly and /monthly items.
+        "daily": _row(
+            db,
+            select(
+                DailySummary.summary_date.label("date"),
+                DailySummary.total_sessions,
+                DailySummary.total_reels,
+                DailySummary.total_minutes,
+            ).where(DailySummary.user_id == user_id, DailySummary.summary_date == day),
+        ),
+        "weekly": _row(
+            db,
+            select(
+                WeeklySummary.iso_year.label("year"),
+                WeeklySummary.iso_week.label("week"),
+                WeeklySummary.first_date.label("start_date"),
+                WeeklySummary.last_date.label("end_date"),
+                WeeklySummary.total_sessions,
+                WeeklySummary.total_reels,
+                WeeklySummary.total_minutes,
+            ).where(
+                WeeklySummary.user_id == user_id,
+                WeeklySummary.week_start == week_start_of(day),
+            ),
+        ),
+        "monthly": _row(
+            db,
+            select(
+                MonthlySummary.year,
+                MonthlySummary.month,
+                MonthlySummary.first_date.label("start_date"),
+                MonthlySummary.last_date.label("end_date"),
+                MonthlySummary.total_sessions,
+                MonthlySummary.total_reels,
+                MonthlySummary.total_minutes,
+            ).where(
+                MonthlySummary.user_id == user_id,
+                MonthlySummary.month_start == month_start_of(day),
+            ),
+        ),
+    }
+    if new_day:
+        event["streaks"] = current_streaks(db, user_id, user_zones.today(db, user_id))
+    return event
+
+
+def publish_summary_changes(
+    session_factory: Callable[[], Session], changed: Iterable[Tuple[int, date, bool]]
+) -> None:
+    """Publish `summary.changed` for each (user_id, day, new_day) someone is listening to."""
+    wanted = [change for change in changed if event_broker.has_subscribers(change[0])]
+    if not wanted:
+        return
+    db = session_factory()
+    try:
+        for user_id, day, new_day in wanted:
+            event_broker.publish(user_id, summary_event(db, user_id, day, new_day))
+    finally:
+        db.close()
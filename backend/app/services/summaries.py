@@ -0,0 +1,572 @@
+from collections import defaultdict
+from datetime import date, timedelta, tzinfo
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import ColumnElement, Insert, Table, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect
+from app.db.dialect import dialect_insert, greatest, least
+
+from app.models.daily_summary import DailySummary
+from app.models.hourly_summary import HourlySummary
+from app.models.monthly_summary import MonthlySummary
+from app.models.mood_summary import NO_MOOD, MoodSummary
+from app.models.session import Session as SessionModel
+from app.models.streak_state import StreakState
+from app.models.user import User
+from app.models.weekly_summary import WeeklySummary
+from app.services.archive import session_archive
+from app.services.timezones import local_hour, stored_zone, user_zones
+
+
+def week_start_of(day: date) -> date:
+    """Monday of the ISO week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start_of(day: date) -> date:
+    """First day of the calendar month containing `day`."""
+    return day.replace(day=1)
+
+
+def month_key_of(day: date) -> int:
+    """`year * 100 + month` of `day`, e.g. 202403."""
+    return day.year * 100 + day.month
+
+
+def date_keys(day: date) -> Dict[str, int]:
+    """The precomputed `sessions` week/month columns for a session on local `day`."""
+    iso_year, iso_week, _ = day.isocalendar()
+    return {"iso_year": iso_year, "iso_week": iso_week, "month_key": month_key_of(day)}
+
+
+def _totals_set(table: Table, stmt: Insert) -> Dict[str, Any]:
+    """SET clause adding the excluded (new) row's totals to the stored ones."""
+    return {
+        name: table.c[name] + stmt.excluded[name]
+        for name in ("total_sessions", "total_reels", "total_minutes")
+    }
+
+
+def record_session_totals(
+    db: Session,
+    user_id: int,
+    summary_date: date,
+    reels_delta: int,
+    minutes_delta: int,
+    sessions_delta: int = 1,
+) -> bool:
+    """
+    Fold finished session(s) into `user_id`'s daily, weekly and monthly summaries.
+
+    `sessions_delta` lets batch writers apply several sessions of one day at once.
+
+    Each summary is a single atomic `INSERT ... ON CONFLICT DO UPDATE`
+    (SQLite and Postgres), so concurrent writers for the same new day can
+    neither lose increments nor trip the unique constraint.
+
+    Runs inside the caller's transaction; the caller commits. Returns True
+    when this was the first session of `summary_date` (streaks may change).
+    """
+    insert = dialect_insert(db)
+    totals = {
+        "total_sessions": sessions_delta,
+        "total_reels": reels_delta,
+        "total_minutes": minutes_delta,
+    }
+
+    daily = DailySummary.__table__
+    stmt = insert(daily).values(user_id=user_id, date=summary_date, **totals)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[daily.c.user_id, daily.c.date], set_=_totals_set(daily, stmt)
+    ).returning(daily.c.total_sessions)
+    new_day = db.execute(stmt).scalar_one() == sessions_delta
+
+    weekly = WeeklySummary.__table__
+    iso_year, iso_week, _ = summary_date.isocalendar()
+    stmt = insert(weekly).values(
+        user_id=user_id,
+        week_start=week_start_of(summary_date),
+        iso_year=iso_year,
+        iso_week=iso_week,
+        first_date=summary_date,
+        last_date=summary_date,
+        **totals,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[weekly.c.user_id, weekly.c.week_start],
+        set_=dict(
+            _totals_set(weekly, stmt),
+            first_date=least(db, weekly.c.first_date, stmt.excluded.first_date),
+            last_date=greatest(db, weekly.c.last_date, stmt.excluded.last_date),
+        ),
+    )
+    db.execute(stmt)
+
+    monthly = MonthlySummary.__table__
+    stmt = insert(monthly).values(
+        user_id=user_id,
+        month_start=month_start_of(summary_date),
+        year=summary_date.year,
+        month=summary_date.month,
+        first_date=summary_date,
+        last_date=summary_date,
+        **totals,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[monthly.c.user_id, monthly.c.month_start],
+        set_=dict(
+            _totals_set(monthly, stmt),
+            first_date=least(db, monthly.c.first_date, stmt.excluded.first_date),
+            last_date=greatest(db, monthly.c.last_date, stmt.excluded.last_date),
+        ),
+    )
+    db.execute(stmt)
+
+    if new_day:
+        # First session of this day: the only time streaks can change.
+        _extend_streak(db, user_id, summary_date)
+    return new_day
+
+
+def _upsert_totals(
+    db: Session, table: Table, keys: Dict[str, Any], totals: Dict[str, int]
+) -> None:
+    stmt = dialect_insert(db)(table).values(**keys, **totals)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys], set_=_totals_set(table, stmt)
+        )
+    )
+
+
+def record_hour_totals(
+    db: Session,
+    user_id: int,
+    summary_date: date,
+    hour: int,
+    reels_delta: int,
+    minutes_delta: int,
+    sessions_delta: int = 1,
+) -> None:
+    """Fold finished session(s) into the (day, local start hour) breakdown; caller commits."""
+    _upsert_totals(
+        db,
+        HourlySummary.__table__,
+        {"user_id": user_id, "date": summary_date, "hour": hour},
+        {"total_sessions": sessions_delta, "total_reels": reels_delta, "total_minutes": minutes_delta},
+    )
+
+
+def record_mood_totals(
+    db: Session,
+    user_id: int,
+    summary_date: date,
+    mood: Optional[str],
+    reels_delta: int,
+    minutes_delta: int,
+    sessions_delta: int = 1,
+) -> None:
+    """Fold finished session(s) into the (day, mood) breakdown; caller commits."""
+    _upsert_totals(
+        db,
+        MoodSummary.__table__,
+        {"user_id": user_id, "date": summary_date, "mood": mood or NO_MOOD},
+        {"total_sessions": sessions_delta, "total_reels": reels_delta, "total_minutes": minutes_delta},
+    )
+
+
+def fold_sessions(db: Session, sessions: Iterable[Mapping[str, Any]]) -> List[Tuple[int, date, bool]]:
+    """
+    Fold a batch of just-ended sessions into every summary table.
+
+    `sessions` are mappings with user_id, date, start_time, reels_watched,
+    duration_minutes and mood. One upsert per (user, day), (user, day, hour)
+    and (user, day, mood) with the batch's summed totals, the hour being the
+    start hour in the user's zone; days are applied in date order so streaks
+    extend. Runs in the caller's transaction.
+
+    Returns (user_id, day, new_day) for every summary day that changed.
+    """
+    totals: Dict[Tuple[int, date], List[int]] = defaultdict(lambda: [0, 0, 0])
+    hours: Dict[Tuple[int, date, int], List[int]] = defaultdict(lambda: [0, 0, 0])
+    moods: Dict[Tuple[int, date, Optional[str]], List[int]] = defaultdict(lambda: [0, 0, 0])
+    for s in sessions:
+        hour = local_hour(s["start_time"], user_zones.get(db, s["user_id"]))
+        for bucket in (
+            totals[(s["user_id"], s["date"])],
+            hours[(s["user_id"], s["date"], hour)],
+            moods[(s["user_id"], s["date"], s["mood"])],
+        ):
+            bucket[0] += 1
+            bucket[1] += s["reels_watched"] or 0
+            bucket[2] += s["duration_minutes"] or 0
+
+    changed: List[Tuple[int, date, bool]] = []
+    for (user_id, day), (count, reels, minutes) in sorted(totals.items()):
+        new_day = record_session_totals(
+            db, user_id, day, reels_delta=reels, minutes_delta=minutes, sessions_delta=count
+        )
+        changed.append((user_id, day, new_day))
+    for (user_id, day, hour), (count, reels, minutes) in hours.items():
+        record_hour_totals(
+            db, user_id, day, hour, reels_delta=reels, minutes_delta=minutes, sessions_delta=count
+        )
+    for (user_id, day, mood), (count, reels, minutes) in moods.items():
+        record_mood_totals(
+            db, user_id, day, mood, reels_delta=reels, minutes_delta=minutes, sessions_delta=count
+        )
+    return changed
+
+
+def _insert_grouped(
+    db: Session,
+    model: Any,
+    key_column: str,
+    key: Any,
+    where: List[ColumnElement],
+    join_users: bool = False,
+) -> int:
+    """
+    INSERT ... SELECT the per (user, day, key) totals of the sessions matching
+    `where` (which may filter on `users` columns if `join_users`).
+    """
+    aggregate = select(
+        SessionModel.user_id,
+        SessionModel.date,
+        key,
+        func.count(),
+        func.coalesce(func.sum(SessionModel.reels_watched), 0),
+        func.coalesce(func.sum(SessionModel.duration_minutes), 0),
+    )
+    if join_users:
+        aggregate = aggregate.outerjoin(User, User.id == SessionModel.user_id)
+    result = db.execute(
+        insert(model.__table__).from_select(
+            ["user_id", "date", key_column, "total_sessions", "total_reels", "total_minutes"],
+            aggregate.where(*where).group_by(SessionModel.user_id, SessionModel.date, key),
+        )
+    )
+    return result.rowcount
+
+
+def _insert_local_hours(db: Session, where: List[ColumnElement]) -> int:
+    """Hourly breakdown rows of the sessions matching `where` whose users have a stored zone."""
+    zones: Dict[str, tzinfo] = {}
+    totals: Dict[Tuple[int, date, int], List[int]] = defaultdict(lambda: [0, 0, 0])
+    rows = db.execute(
+        select(
+            SessionModel.user_id,
+            SessionModel.date,
+            SessionModel.start_time,
+            SessionModel.reels_watched,
+            SessionModel.duration_minutes,
+            User.timezone,
+        )
+        .join(User, User.id == SessionModel.user_id)
+        .where(*where, User.timezone.is_not(None)),
+        execution_options={"yield_per": 10000},
+    )
+    for user_id, day, start_time, reels, minutes, name in rows:
+        zone = zones.get(name)
+        if zone is None:
+            zone = zones[name] = stored_zone(name)
+        bucket = totals[(user_id, day, local_hour(start_time, zone))]
+        bucket[0] += 1
+        bucket[1] += reels or 0
+        bucket[2] += minutes or 0
+    if totals:
+        db.execute(
+            insert(HourlySummary.__table__),
+            [
+                {
+                    "user_id": user_id,
+                    "date": day,
+                    "hour": hour,
+                    "total_sessions": count,
+                    "total_reels": reels,
+                    "total_minutes": minutes,
+                }
+                for (user_id, day, hour), (count, reels, minutes) in totals.items()
+            ],
+        )
+    return len(totals)
+
+
+def rebuild_breakdowns(
+    db: Session,
+    user_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    commit: bool = True,
+) -> Tuple[int, int]:
+    """
+    Recompute the hourly and mood breakdowns from finished `sessions`.
+
+    Set-based: the affected rows are deleted and re-inserted with one
+    INSERT ... SELECT ... GROUP BY per table. Hours are local to each user's
+    stored zone: SQL has no time zone rules on SQLite, so the sessions of
+    users with a zone are streamed and grouped in Python instead (users
+    without one keep the SQL path, their local hour being the UTC hour).
+    Scoped like `rebuild_rollups`, but never before
+    `session_archive.frozen_before()`: archived sessions are no longer in
+    `sessions`, so their breakdowns are kept as they are.
+    Returns (hourly rows, mood rows) written.
+    """
+    frozen_before = session_archive.frozen_before()
+    if frozen_before is not None and (start is None or start < frozen_before):
+        start = frozen_before
+    if end is not None and start is not None and start > end:
+        return 0, 0
+    finished = [SessionModel.end_time.is_not(None)]
+    if user_id is not None:
+        finished.append(SessionModel.user_id == user_id)
+    if start:
+        finished.append(SessionModel.date >= start)
+    if end:
+        finished.append(SessionModel.date <= end)
+
+    for model in (HourlySummary, MoodSummary):
+        stale = db.query(model)
+        if user_id is not None:
+            stale = stale.filter(model.user_id == user_id)
+        if start:
+            stale = stale.filter(model.summary_date >= start)
+        if end:
+            stale = stale.filter(model.summary_date <= end)
+        stale.delete(synchronize_session=False)
+
+    hours = _insert_grouped(
+        db,
+        HourlySummary,
+        "hour",
+        dialect.utc_hour(db, SessionModel.start_time),
+        finished + [User.timezone.is_(None)],
+        join_users=True,
+    )
+    hours += _insert_local_hours(db, finished)
+    moods = _insert_grouped(
+        db, MoodSummary, "mood", func.coalesce(SessionModel.mood, NO_MOOD), finished
+    )
+    if commit:
+        db.commit()
+    return hours, moods
+
+
+def _extend_streak(db: Session, user_id: int, day: date) -> None:
+    """
+    Fold a newly active `day` into `user_id`'s streak state in O(1).
+
+    Days arriving in order (the normal case) only extend or restart the
+    current run. An older day may merge past runs, so it falls back to a
+    full recompute from `daily_summaries` (which already holds `day`).
+    """
+    # Create the row race-free, then lock it for the read-modify-write.
+    db.execute(
+        dialect_insert(db)(StreakState.__table__)
+        .values(user_id=user_id, longest_streak=0)
+        .on_conflict_do_nothing(index_elements=[StreakState.__table__.c.user_id])
+    )
+    state: StreakState = (
+        db.query(StreakState).filter(StreakState.user_id == user_id).with_for_update().one()
+    )
+    if state.current_end is None:
+        state.current_start = state.current_end = day
+    elif day == state.current_end + timedelta(days=1):
+        state.current_end = day
+    elif day > state.current_end:
+        state.current_start = state.current_end = day
+    else:
+        _recompute_streaks(db, state)
+        return
+
+    length = (state.current_end - state.current_start).days + 1
+    state.longest_streak = max(state.longest_streak or 0, length)
+
+
+def _streak_runs(db: Session, user_id: Optional[int] = None) -> Dict[int, Tuple[date, date, int]]:
+    """
+    Compute (current_start, current_end, longest) per user from `daily_summaries`.
+
+    A single ordered scan over (user_id, date); restricted to one user if given.
+    """
+    result: Dict[int, Tuple[date, date, int]] = {}
+    query = db.query(DailySummary.user_id, DailySummary.summary_date).filter(
+        DailySummary.total_sessions > 0
+    )
+    if user_id is not None:
+        query = query.filter(DailySummary.user_id == user_id)
+    rows = query.order_by(
+        DailySummary.user_id.asc(), DailySummary.summary_date.asc()
+    ).yield_per(1000)
+
+    for uid, day in rows:
+        prev = result.get(uid)
+        if prev is not None and day == prev[1] + timedelta(days=1):
+            run_start, longest = prev[0], prev[2]
+        else:
+            run_start, longest = day, prev[2] if prev else 0
+        result[uid] = (run_start, day, max(longest, (day - run_start).days + 1))
+    return result
+
+
+def _recompute_streaks(db: Session, state: StreakState) -> None:
+    """Recompute one user's `state` from `daily_summaries`."""
+    run = _streak_runs(db, state.user_id).get(state.user_id)
+    state.current_start, state.current_end, state.longest_streak = run or (None, None, 0)
+
+
+def refresh_user_streaks(db: Session, user_id: int) -> None:
+    """Recompute one user's streak state in the caller's transaction."""
+    state: Optional[StreakState] = (
+        db.query(StreakState).filter(StreakState.user_id == user_id).with_for_update().first()
+    )
+    if state is None:
+        state = StreakState(user_id=user_id, longest_streak=0)
+        db.add(state)
+    _recompute_streaks(db, state)
+
+
+def current_streaks(db: Session, user_id: int, today: date) -> Dict[str, int]:
+    """
+    Current and longest streak (days) from the persisted streak state.
+
+    `today` is the user's local day (see `app.services.timezones`).
+    """
+    state: Optional[StreakState] = (
+        db.query(StreakState).filter(StreakState.user_id == user_id).first()
+    )
+    if state is None or state.current_end is None:
+        return {"current_streak": 0, "longest_streak": 0}
+
+    # Current streak is the length of the run ending today, if any.
+    current = 0
+    if state.current_end == today:
+        current = (state.current_end - state.current_start).days + 1
+
+    return {"current_streak": current, "longest_streak": state.longest_streak}
+
+
+def repair_streaks(db: Session) -> int:
+    """
+    Recompute every user's persisted streak state from `daily_summaries`.
+
+    Replaces the `streak_state` table in one transaction; returns users written.
+    """
+    runs = _streak_runs(db)
+    db.query(StreakState).delete(synchronize_session=False)
+    if runs:
+        db.bulk_insert_mappings(
+            StreakState,
+            [
+                dict(user_id=uid, current_start=start, current_end=end, longest_streak=longest)
+                for uid, (start, end, longest) in runs.items()
+            ],
+        )
+    db.commit()
+    return len(runs)
+
+
+def rebuild_rollups(
+    db: Session,
+    user_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    commit: bool = True,
+) -> Tuple[int, int]:
+    """
+    Recompute weekly and monthly rollups from `daily_summaries`.
+
+    Used for backfilling existing databases and repairing drift. Set-based
+    like `rebuild_breakdowns`: the affected rollup rows are deleted and
+    re-inserted with one INSERT ... SELECT ... GROUP BY per table, days being
+    bucketed by the database (`date_trunc` / `extract(isoyear)` on Postgres,
+    see `app.db.dialect`). With `user_id`/`start`/`end` only that user's
+    weeks and months touching [start, end] are rebuilt (e.g. after a bulk
+    import). Returns (weeks, months) written.
+    """
+    day = DailySummary.summary_date
+    # Whole weeks/months overlapping [start, end] are recomputed.
+    periods = (
+        (
+            WeeklySummary,
+            "week_start",
+            dialect.week_start(db, day),
+            {"iso_year": dialect.iso_year(db, day), "iso_week": dialect.iso_week(db, day)},
+            week_start_of(start) if start else None,
+            week_start_of(end) + timedelta(days=6) if end else None,
+        ),
+        (
+            MonthlySummary,
+            "month_start",
+            dialect.month_start(db, day),
+            {"year": dialect.year_of(db, day), "month": dialect.month_of(db, day)},
+            month_start_of(start) if start else None,
+            (month_start_of(end) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            if end
+            else None,
+        ),
+    )
+
+    written = []
+    for model, bucket_column, bucket, keys, first_day, last_day in periods:
+        stale = db.query(model)
+        scope = []
+        if user_id is not None:
+            stale = stale.filter(model.user_id == user_id)
+            scope.append(DailySummary.user_id == user_id)
+        if first_day:
+            stale = stale.filter(getattr(model, bucket_column) >= first_day)
+            scope.append(day >= first_day)
+        if last_day:
+            stale = stale.filter(getattr(model, bucket_column) <= last_day)
+            scope.append(day <= last_day)
+        stale.delete(synchronize_session=False)
+
+        aggregate = (
+            select(
+                DailySummary.user_id,
+                bucket,
+                *keys.values(),
+                func.min(day),
+                func.max(day),
+                func.sum(DailySummary.total_sessions),
+                func.sum(DailySummary.total_reels),
+                func.sum(DailySummary.total_minutes),
+            )
+            .where(*scope)
+            .group_by(DailySummary.user_id, bucket, *keys.values())
+        )
+        result = db.execute(
+            insert(model.__table__).from_select(
+                [
+                    "user_id",
+                    bucket_column,
+                    *keys,
+                    "first_date",
+                    "last_date",
+                    "total_sessions",
+                    "total_reels",
+                    "total_minutes",
+                ],
+                aggregate,
+            )
+        )
+        written.append(result.rowcount)
+    if commit:
+        db.commit()
+    return written[0], written[1]
+
+
+def ensure_rollups(db: Session) -> None:
+    """Backfill rollups, streak state and breakdowns once for databases created before them."""
+    has_daily = db.query(DailySummary.id).first() is not None
+    if not has_daily:
+        return
+    if db.query(WeeklySummary.id).first() is None:
+        rebuild_rollups(db)
+    if db.query(StreakState.id).first() is None:
+        repair_streaks(db)
+    if db.query(HourlySummary.id).first() is None:
+        rebuild_breakdowns(db)
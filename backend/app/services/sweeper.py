@@ -0,0 +1,155 @@
+"""
+Background sweeper for stale (forgotten) active sessions.
+
+A session left open blocks `POST /session/start` for its user. Every
+`SWEEP_INTERVAL_SECONDS` the sweeper closes sessions open longer than
+`SESSION_MAX_MINUTES`: the end time is capped at start + max duration,
+reels and mood stay unrecorded, and each batch of `SWEEP_BATCH_SIZE`
+sessions is folded into the summaries in one transaction. Stale sessions
+are found through the partial index on open sessions, so a sweep costs
+nothing when there are none.
+
+Each close is a conditional UPDATE (`end_time IS NULL`), the same claim as
+`end_session` and the ingest worker, so a session ended concurrently is
+never folded twice.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import summary_cache
+from app.core.config import get_settings
+from app.models.session import Session as SessionModel
+from app.services.analytics import column_store
+from app.services.push import publish_session, publish_summary_changes
+from app.services.summaries import fold_sessions
+from app.services.timezones import as_utc
+
+logger = logging.getLogger(__name__)
+
+
+def close_stale_sessions(
+    db: Session, max_minutes: int, now: datetime, limit: int
+) -> Tuple[int, List[Dict[str, Any]], List[Tuple[int, date, bool]]]:
+    """
+    Close up to `limit` sessions started more than `max_minutes` before `now`.
+
+    Commits. Returns (stale sessions found, sessions closed, changed summary
+    days as (user_id, day, new_day)).
+    """
+    cutoff = now - timedelta(minutes=max_minutes)
+    stale = db.execute(
+        select(SessionModel.id, SessionModel.user_id, SessionModel.start_time, SessionModel.date)
+        .where(SessionModel.end_time.is_(None), SessionModel.start_time < cutoff)
+        .order_by(SessionModel.start_time.asc())
+        .limit(limit)
+    ).all()
+
+    closed: List[Dict[str, Any]] = []
+    for session_id, user_id, start_time, day in stale:
+        values = {
+            "end_time": as_utc(start_time) + timedelta(minutes=max_minutes),
+            "duration_minutes": max_minutes,
+            "reels_watched": None,
+            "mood": None,
+            "date": day or as_utc(start_time).date(),
+        }
+        claimed = db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id, SessionModel.end_time.is_(None))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            closed.append(dict(values, id=session_id, user_id=user_id, start_time=start_time))
+
+    changed = fold_sessions(db, closed)
+    db.commit()
+    return len(stale), closed, changed
+
+
+class SessionSweeper:
+    """Periodic asyncio task running `close_stale_sessions` in the threadpool."""
+
+    def __init__(self, max_minutes: int, interval: float, batch_size: int) -> None:
+        self.max_minutes = max_minutes
+        self.interval = interval
+        self.batch_size = batch_size
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.sweeps = 0
+        self.closed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_minutes > 0
+
+    def open(self, session_factory: Callable[[], Session]) -> None:
+        self._session_factory = session_factory
+
+    def start(self) -> None:
+        """Start the periodic sweep on the running event loop (first sweep runs now)."""
+        self._task = asyncio.create_task(self._run(), name="session-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.sweep)
+            except Exception:
+                logger.exception("Stale-session sweep failed; will retry")
+            await asyncio.sleep(self.interval)
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """Close every stale session in batches; returns how many were closed."""
+        now = now or datetime.now(timezone.utc)
+        total = 0
+        while True:
+            db = self._session_factory()
+            try:
+                found, closed, changed = close_stale_sessions(
+                    db, self.max_minutes, now, self.batch_size
+                )
+            finally:
+                db.close()
+            for user_id, day, new_day in changed:
+                summary_cache.invalidate_day(user_id, day, streaks=new_day)
+                column_store.invalidate(user_id)
+            for row in closed:
+                publish_session("session.ended", SimpleNamespace(**row))
+            publish_summary_changes(self._session_factory, changed)
+            total += len(closed)
+            if found < self.batch_size:
+                break
+        self.sweeps += 1
+        self.closed += total
+        if total:
+            logger.info("Closed %d stale session(s)", total)
+        return total
+
+    def stats(self) -> Dict[str, int]:
+        return {"max_minutes": self.max_minutes, "sweeps": self.sweeps, "closed": self.closed}
+
+
+_settings = get_settings()
+
+session_sweeper = SessionSweeper(
+    max_minutes=_settings.SESSION_MAX_MINUTES,
+    interval=_settings.SWEEP_INTERVAL_SECONDS,
+    batch_size=_settings.SWEEP_BATCH_SIZE,
+)
@@ -0,0 +1,213 @@
+"""
+Per-user time zones and local days.
+
+A user's IANA zone is stored once (`users.timezone`, `PUT /user/timezone`)
+and decides which calendar day "today" is for summary defaults and streaks,
+and which day a session belongs to when the client sends no UTC offset.
+Local days come from `zoneinfo`, so they follow DST transitions; ISO weeks
+and months are derived from the local day (`date_keys`), never from the UTC
+timestamp, so a week spanning New Year lands in the right ISO year. Hour of
+day breakdowns (`/summary/hourly`, the analytics heatmap) use the local
+start hour in the same zone.
+
+Zones are cached per user in-process (bounded LRU with the same version
+guard as the column store, dropped in every process on change), so cached
+summary reads stay DB-free.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone, tzinfo
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import UserVersions
+from app.core.changes import change_counters
+from app.core.config import get_settings
+from app.db.dialect import dialect_insert
+from app.models.user import User
+
+
+class InvalidTimezone(ValueError):
+    """Not a known IANA time zone name."""
+
+
+def parse_zone(name: str) -> tzinfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise InvalidTimezone(f"Unknown time zone {name!r}; use an IANA name like 'Europe/Berlin'.")
+
+
+def stored_zone(name: Optional[str]) -> tzinfo:
+    """The zone in effect for a `users.timezone` value (UTC when unset)."""
+    try:
+        return parse_zone(name) if name else timezone.utc
+    except InvalidTimezone:
+        # Zone removed from the tz database since it was stored.
+        return timezone.utc
+
+
+def as_utc(moment: datetime) -> datetime:
+    """
+    `moment` as a UTC-aware datetime.
+
+    Timestamps are stored as UTC, but SQLite hands them back naive.
+    """
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def local_date(moment: datetime, zone: tzinfo) -> date:
+    """Calendar day of `moment` in `zone` (naive datetimes are UTC, as stored)."""
+    return as_utc(moment).astimezone(zone).date()
+
+
+def local_hour(moment: datetime, zone: tzinfo) -> int:
+    """Hour of day (0-23) of `moment` in `zone` (naive datetimes are UTC, as stored)."""
+    return as_utc(moment).astimezone(zone).hour
+
+
+# Offsets are probed this far apart; no zone changes its offset twice within it.
+_PROBE_SECONDS = 86400
+
+
+def _offset_seconds(zone: tzinfo, epoch_second: int) -> int:
+    return int(datetime.fromtimestamp(epoch_second, zone).utcoffset().total_seconds())
+
+
+def utc_offsets(zone: tzinfo, first: int, last: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `zone`'s UTC offset over epoch seconds [first, last] as (bounds, offsets):
+    offsets[i] (seconds) applies from bounds[i - 1] up to bounds[i], so
+    `offsets[np.searchsorted(bounds, ts, side="right")]` is the offset at ts.
+
+    The offset is probed once a day and every change is pinned to the second
+    by bisection, so a decade costs a few thousand lookups, not one per row.
+    """
+    offsets = [_offset_seconds(zone, first)]
+    bounds: List[int] = []
+    for low in range(first, last, _PROBE_SECONDS):
+        high = min(low + _PROBE_SECONDS, last)
+        after = _offset_seconds(zone, high)
+        if after == offsets[-1]:
+            continue
+        while high - low > 1:
+            middle = (low + high) // 2
+            if _offset_seconds(zone, middle) == offsets[-1]:
+                low = middle
+            else:
+                high = middle
+        bounds.append(high)
+        offsets.append(after)
+    return np.array(bounds, np.int64), np.array(offsets, np.int64)
+
+
+def local_hours(epoch_seconds: np.ndarray, zone: tzinfo) -> np.ndarray:
+    """`local_hour` of every UTC epoch second in `epoch_seconds`, as int8."""
+    if zone is timezone.utc or not len(epoch_seconds):
+        return (epoch_seconds // 3600 % 24).astype(np.int8)
+    # The UTC offset depends on the instant (DST): look it up per transition.
+    bounds, offsets = utc_offsets(zone, int(epoch_seconds.min()), int(epoch_seconds.max()))
+    shifted = epoch_seconds + offsets[np.searchsorted(bounds, epoch_seconds, side="right")]
+    return (shifted // 3600 % 24).astype(np.int8)
+
+
+class UserZones:
+    """Bounded LRU of user_id -> tzinfo (UTC for users without a stored zone)."""
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._zones: "OrderedDict[int, tzinfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = UserVersions(max_users)
+        self.hits = 0
+        self.loads = 0
+
+    def cached(self, user_id: int) -> Optional[tzinfo]:
+        """The user's zone if cached, else None (no DB access)."""
+        with self._lock:
+            zone = self._zones.get(user_id)
+            if zone is not None:
+                self._zones.move_to_end(user_id)
+                self.hits += 1
+            return zone
+
+    def get(self, db: Session, user_id: int) -> tzinfo:
+        zone = self.cached(user_id)
+        if zone is not None:
+            return zone
+        change_counters.track(user_id)
+        with self._lock:
+            version = self._versions.of(user_id)
+        name = db.execute(select(User.timezone).where(User.id == user_id)).scalar()
+        zone = stored_zone(name)
+        with self._lock:
+            self.loads += 1
+            if version == self._versions.of(user_id):
+                self._zones[user_id] = zone
+                while len(self._zones) > self.max_users:
+                    self._zones.popitem(last=False)
+        return zone
+
+    def today(self, db: Session, user_id: int) -> date:
+        return datetime.now(self.get(db, user_id)).date()
+
+    def invalidate(self, user_id: int) -> None:
+        self.forget(user_id)
+        change_counters.bump(user_id)
+
+    def forget(self, user_id: int) -> None:
+        """Drop `user_id`'s zone in this process only (see `app.core.changes`)."""
+        with self._lock:
+            self._versions.bump(user_id)
+            self._zones.pop(user_id, None)
+
+    def forget_all(self) -> None:
+        with self._lock:
+            self._versions.bump_all()
+            self._zones.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._zones),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+def store_timezone(db: Session, user_id: int, name: Optional[str]) -> tzinfo:
+    """
+    Set (or with None clear) `user_id`'s zone and commit; returns the zone now in effect.
+
+    Only days from now on are affected: stored session dates and hour
+    breakdowns are not moved.
+    """
+    zone = parse_zone(name) if name else timezone.utc
+    users = User.__table__
+    stmt = dialect_insert(db)(users).values(id=user_id, timezone=name)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[users.c.id], set_={"timezone": stmt.excluded.timezone}
+        )
+    )
+    db.commit()
+    user_zones.invalidate(user_id)
+    return zone
+
+
+def zone_name(zone: tzinfo) -> Optional[str]:
+    """IANA name of a zone from `UserZones`; None for the UTC default."""
+    return zone.key if isinstance(zone, ZoneInfo) else None
+
+
+_settings = get_settings()
+
+user_zones = UserZones(max_users=_settings.TIMEZONE_CACHE_MAX_USERS)
+change_counters.register(user_zones)
@@ -0,0 +1,7 @@
+"""
+Benchmarks and load tests for the backend.
+
+Run from the `backend/` directory, e.g.:
+
+    python -m benchmarks.async_vs_sync --clients 500
+"""
@@ -0,0 +1,151 @@
+"""
+Load benchmark: sync (threadpool) vs async (AsyncSession) DB mode.
+
+For each mode a uvicorn server is started against a fresh SQLite file,
+seeded with a few finished sessions, and then hammered by N concurrent
+HTTP clients over the read endpoints for a fixed duration. Reports
+requests/sec and p50/p99 latency per mode.
+
+    python -m benchmarks.async_vs_sync --clients 500 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+READ_PATHS = [
+    "/session/active",
+    "/sessions",
+    "/summary/daily",
+    "/summary/weekly",
+    "/summary/monthly",
+    "/summary/streaks",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _wait_ready(base_url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/session/active")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def _seed(base_url: str, sessions: int) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(sessions):
+            started = (await client.post("/session/start", json={})).json()
+            await client.post(
+                "/session/end",
+                json={"session_id": started["id"], "reels_watched": 10, "mood": "Bored"},
+            )
+
+
+async def _drive(base_url: str, clients: int, duration: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker(offset: int) -> None:
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                path = READ_PATHS[i % len(READ_PATHS)]
+                i += 1
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(path)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def _run_mode(async_mode: bool, args: argparse.Namespace) -> Dict[str, float]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env["CACHE_SYNC_PATH"] = os.path.join(tmp, "bench.changes")
+        env["DB_ASYNC"] = "1" if async_mode else "0"
+        # One load generator is one client: measure the server, not the rate limiter.
+        env["RATE_LIMIT_ENABLED"] = "0"
+        env.pop("ASYNC_DATABASE_URL", None)
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            env=env,
+        )
+        try:
+            asyncio.run(_wait_ready(base_url))
+            asyncio.run(_seed(base_url, args.seed_sessions))
+            return asyncio.run(_drive(base_url, args.clients, args.duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--seed-sessions", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for async_mode in (False, True):
+        r = _run_mode(async_mode, args)
+        label = "async" if async_mode else "sync"
+        print(
+            f"{label:<6} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+            f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
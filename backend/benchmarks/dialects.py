@@ -0,0 +1,342 @@
+"""
+SQLite vs Postgres: same answers, and concurrent-writer throughput.
+
+For each backend a fresh database is served by uvicorn (migrations run in
+the lifespan) and driven over HTTP:
+
+- a fixed history is imported for three users (UTC, America/New_York,
+  Asia/Kolkata) spanning an ISO-year boundary (2024-W52 .. 2025-W02, where
+  2024-12-30 is in 2025-W01), both 2025 US DST switches, and the last few
+  weeks so the weekly/monthly windows have data; then the summary,
+  /sessions?week=&month= and analytics endpoints are queried and every
+  summary table is dumped,
+- rebuild vs incremental: the rollup and breakdown tables are rebuilt with
+  the CLI and must equal what the write path maintained,
+- writers: N threads, each a different user, start and end sessions as
+  fast as they can for `--seconds`; reported as sessions/s.
+
+The responses and table dumps must be identical across backends. Postgres
+comes from `--postgres-url`, else an embedded server started with the
+optional `pgserver` package (`pip install pgserver`, nothing to set up),
+else only SQLite runs.
+
+    python -m benchmarks.dialects --writers 1,4,16 --seconds 5
+    python -m benchmarks.dialects --postgres-url postgresql://user:pw@localhost/tracker_bench
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+USER_ZONES = {1: None, 2: "America/New_York", 3: "Asia/Kolkata"}
+
+# ISO-year boundary and the 2025 US DST switches (Mar 9, Nov 2).
+FIXED_SPANS = [
+    (date(2024, 12, 26), date(2025, 1, 12)),
+    (date(2025, 3, 6), date(2025, 3, 12)),
+    (date(2025, 10, 30), date(2025, 11, 5)),
+]
+RECENT_DAYS = 45
+MOODS = ["happy", "bored", "tired", None]
+
+SUMMARY_TABLES = {
+    "daily_summaries": "user_id, date",
+    "weekly_summaries": "user_id, week_start",
+    "monthly_summaries": "user_id, month_start",
+    "hourly_summaries": "user_id, date, hour",
+    "mood_summaries": "user_id, date, mood",
+    "streak_state": "user_id",
+}
+REBUILT_TABLES = ["weekly_summaries", "monthly_summaries", "hourly_summaries", "mood_summaries"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _history(user_id: int) -> List[Dict[str, Any]]:
+    """Deterministic finished sessions: a few per day, around late-evening UTC too."""
+    days: List[date] = []
+    for first, last in FIXED_SPANS:
+        days += [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    today = date.today()
+    days += [today - timedelta(days=n) for n in range(RECENT_DAYS, 1, -1)]
+    records = []
+    for i, day in enumerate(days):
+        # 02:30 and 23:15 UTC fall on another local day for users 2 and 3.
+        for n, (hour, minute) in enumerate([(2, 30), (13, 0), (23, 15)][: 1 + (i + user_id) % 3]):
+            start = datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+            length = 5 + (i * 7 + n * 11 + user_id) % 50
+            records.append(
+                {
+                    "start_time": start.isoformat(),
+                    "end_time": (start + timedelta(minutes=length)).isoformat(),
+                    "reels_watched": (i * 13 + n * 5 + user_id) % 90,
+                    "mood": MOODS[(i + n + user_id) % len(MOODS)],
+                }
+            )
+    return records
+
+
+def _queries() -> List[Tuple[str, Dict[str, Any]]]:
+    span = {"start_date": "2024-12-20", "end_date": "2025-11-10"}
+    return [
+        ("/summary/daily", {"start_date": "2024-12-26", "end_date": "2025-01-12"}),
+        ("/summary/daily", {"start_date": "2025-03-06", "end_date": "2025-03-12"}),
+        ("/summary/weekly", {}),
+        ("/summary/monthly", {}),
+        ("/summary/streaks", {}),
+        ("/summary/hourly", span),
+        ("/summary/moods", span),
+        ("/sessions", {"week": "2025-W01"}),
+        ("/sessions", {"week": "2024-W52"}),
+        ("/sessions", {"month": "2025-03"}),
+        ("/sessions", {"date_filter": "2025-11-02"}),
+        ("/analytics/rolling", {"start_date": "2024-12-20", "end_date": "2025-01-20", "window": 7}),
+        ("/analytics/histogram", span),
+        ("/analytics/heatmap", span),
+        ("/analytics/moods", span),
+    ]
+
+
+@contextmanager
+def _server(url: str, workers: int) -> Iterator[str]:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    # One load generator is one client: measure the server, not the rate limiter.
+    env = dict(
+        os.environ, DATABASE_URL=url, READ_DATABASE_URL=url, DB_AUTO_MIGRATE="1",
+        RATE_LIMIT_ENABLED="0",
+    )
+    for name in ("ASYNC_DATABASE_URL", "ASYNC_READ_DATABASE_URL"):
+        env.pop(name, None)
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.perf_counter() + 60
+        while True:
+            if proc.poll() is not None or time.perf_counter() > deadline:
+                raise RuntimeError(f"server for {url} did not start")
+            try:
+                if httpx.get(f"{base}/session/active", timeout=1.0).is_success:
+                    break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        yield base
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _dump_tables(url: str) -> Dict[str, List[List[str]]]:
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(url)
+    dump = {}
+    with engine.connect() as conn:
+        for table, order in SUMMARY_TABLES.items():
+            rows = conn.execute(text(f"SELECT * FROM {table} ORDER BY {order}")).mappings().all()
+            # Column order differs between a created and a migrated schema;
+            # surrogate ids depend on the backend's id reuse after deletes.
+            dump[table] = [[f"{k}={row[k]}" for k in sorted(row) if k != "id"] for row in rows]
+    engine.dispose()
+    return dump
+
+
+def _normalized(value: Any) -> Any:
+    """JSON with timestamps as UTC instants: SQLite returns them naive, Postgres with +00:00."""
+    if isinstance(value, dict):
+        return {k: _normalized(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalized(v) for v in value]
+    if isinstance(value, str) and len(value) > 10 and value[10:11] == "T":
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+
+def _cli(url: str, *args: str) -> None:
+    env = dict(os.environ, DATABASE_URL=url, READ_DATABASE_URL=url)
+    subprocess.run([sys.executable, "-m", "app.cli", *args], env=env, check=True, capture_output=True)
+
+
+def _correctness(url: str) -> Dict[str, Any]:
+    responses: Dict[str, Any] = {}
+    with _server(url, workers=1) as base, httpx.Client(base_url=base, timeout=60) as client:
+        for user_id, zone in USER_ZONES.items():
+            headers = {"X-User-Id": str(user_id)}
+            if zone:
+                client.put("/user/timezone", json={"timezone": zone}, headers=headers).raise_for_status()
+            body = "\n".join(json.dumps(r) for r in _history(user_id))
+            client.post("/sessions/import", content=body, headers=headers).raise_for_status()
+        for user_id in USER_ZONES:
+            headers = {"X-User-Id": str(user_id)}
+            for path, params in _queries():
+                response = client.get(path, params=params, headers=headers)
+                response.raise_for_status()
+                key = f"user {user_id} {path}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
+                responses[key] = _normalized(response.json())
+    maintained = _dump_tables(url)
+    _cli(url, "rebuild-rollups")
+    _cli(url, "rebuild-breakdowns")
+    rebuilt = _dump_tables(url)
+    drift = [t for t in REBUILT_TABLES if maintained[t] != rebuilt[t]]
+    return {"responses": responses, "tables": maintained, "rebuild_drift": drift}
+
+
+def _writers(url: str, threads: int, seconds: float, server_workers: int) -> float:
+    """Sessions started and ended per second by `threads` concurrent users."""
+    done = [0] * threads
+    errors: List[str] = []
+    with _server(url, server_workers) as base:
+        stop = time.perf_counter() + seconds
+
+        def write(slot: int) -> None:
+            headers = {"X-User-Id": str(1000 + slot)}
+            with httpx.Client(base_url=base, timeout=60, headers=headers) as client:
+                while time.perf_counter() < stop:
+                    started = client.post("/session/start", json={})
+                    if started.status_code != 201:
+                        errors.append(f"start {started.status_code}: {started.text[:200]}")
+                        return
+                    ended = client.post(
+                        "/session/end",
+                        json={"session_id": started.json()["id"], "reels_watched": 3, "mood": "bored"},
+                    )
+                    if not ended.is_success:
+                        errors.append(f"end {ended.status_code}: {ended.text[:200]}")
+                        return
+                    done[slot] += 1
+
+        began = time.perf_counter()
+        pool = [threading.Thread(target=write, args=(slot,)) for slot in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - began
+    if errors:
+        raise RuntimeError(f"{len(errors)} writer error(s), first: {errors[0]}")
+    return sum(done) / elapsed
+
+
+@contextmanager
+def _scratch_database(url: str) -> Iterator[str]:
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    name = f"tracker_bench_{os.getpid()}"
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name}"))
+        conn.execute(text(f"CREATE DATABASE {name}"))
+    try:
+        yield make_url(url).set(database=name).render_as_string(hide_password=False)
+    finally:
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+        admin.dispose()
+
+
+@contextmanager
+def _postgres(url: Optional[str]) -> Iterator[Optional[str]]:
+    """A DSN for an empty scratch Postgres database, or None if there is none."""
+    if url is not None:
+        with _scratch_database(url) as scratch:
+            yield scratch
+        return
+    try:
+        import pgserver
+    except ImportError:
+        yield None
+        return
+    with tempfile.TemporaryDirectory(prefix="tracker-pg-") as data_dir:
+        server = pgserver.get_server(data_dir, cleanup_mode="stop")
+        with _scratch_database(server.get_uri()) as scratch:
+            yield scratch
+
+
+def _diff(a: Any, b: Any, path: str = "") -> List[str]:
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = []
+        for key in sorted(set(a) | set(b), key=str):
+            out += _diff(a.get(key), b.get(key), f"{path}/{key}")
+        return out
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        return [d for i, (x, y) in enumerate(zip(a, b)) for d in _diff(x, y, f"{path}[{i}]")]
+    return [] if a == b else [f"{path}: {str(a)[:120]} != {str(b)[:120]}"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--postgres-url", help="Server to create a scratch database on.")
+    parser.add_argument("--writers", default="1,4,16", help="Comma-separated writer thread counts.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each writer run.")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn --workers.")
+    args = parser.parse_args()
+    writer_counts = [int(n) for n in args.writers.split(",")]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    throughput: Dict[str, Dict[int, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp, _postgres(args.postgres_url) as pg_url:
+        backends = {"sqlite": f"sqlite:///{os.path.join(tmp, 'bench.db')}"}
+        # Inherited by the servers and CLI runs below: scratch change counters.
+        os.environ["CACHE_SYNC_PATH"] = os.path.join(tmp, "bench.changes")
+        if pg_url is None:
+            print("No Postgres (pass --postgres-url or `pip install pgserver`): SQLite only.")
+        else:
+            backends["postgresql"] = pg_url
+
+        for name, url in backends.items():
+            started = time.perf_counter()
+            results[name] = _correctness(url)
+            drift = results[name]["rebuild_drift"]
+            print(
+                f"{name:<10} {len(results[name]['responses'])} responses in "
+                f"{time.perf_counter() - started:.1f}s; rebuild vs incremental: "
+                + (f"DRIFT in {', '.join(drift)}" if drift else "identical")
+            )
+            # Writers are other users, so they run against the same database.
+            throughput[name] = {
+                threads: _writers(url, threads, args.seconds, args.server_workers)
+                for threads in writer_counts
+            }
+
+    diffs: List[str] = []
+    if len(results) == 2:
+        diffs = _diff(
+            {k: results["sqlite"][k] for k in ("responses", "tables")},
+            {k: results["postgresql"][k] for k in ("responses", "tables")},
+        )
+        print(f"\nsqlite vs postgresql: {'identical' if not diffs else f'{len(diffs)} difference(s)'}")
+        for line in diffs[:20]:
+            print(f"  {line}")
+
+    print(f"\nwriters (start+end per second, uvicorn --workers {args.server_workers}):")
+    print(f"{'threads':>8}" + "".join(f"{name:>14}" for name in throughput))
+    for threads in writer_counts:
+        print(f"{threads:>8}" + "".join(f"{throughput[name][threads]:>14.1f}" for name in throughput))
+
+    failed = any(r["rebuild_drift"] for r in results.values()) or bool(diffs)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Write throughput: synchronous commits vs the write-behind ingestion queue.
+
+For each mode a uvicorn server is started against a fresh SQLite file and
+N writer clients (one user each) loop start/end for a fixed duration.
+Reports acknowledged writes/sec and p50/p99 latency, then waits for the
+queue to drain and checks that the daily summaries count every session.
+Both modes must also answer start / active / end with the same JSON shape
+(same fields, same timestamp format); the run fails if they do not.
+
+    python -m benchmarks.ingest_queue --writers 64 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.async_vs_sync import _free_port, _percentile, _wait_ready
+
+
+def _shape(value: Any) -> Any:
+    """`value` with every digit masked: ids and times differ, formats must not."""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, str):
+        return re.sub(r"\d", "0", value)
+    return type(value).__name__
+
+
+async def _response_shapes(client: httpx.AsyncClient, user_id: int) -> Dict[str, Any]:
+    headers = {"X-User-Id": str(user_id)}
+    started = await client.post("/session/start", json={}, headers=headers)
+    active = await client.get("/session/active", headers=headers)
+    ended = await client.post(
+        "/session/end",
+        json={"session_id": started.json()["id"], "reels_watched": 5, "mood": "bored"},
+        headers=headers,
+    )
+    return {
+        "start": _shape(started.json()),
+        "active": _shape(active.json()),
+        "end": _shape(ended.json()),
+    }
+
+
+async def _write(base_url: str, writers: int, duration: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    sessions = 0
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=writers)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        shapes = await _response_shapes(client, writers + 1)
+
+        async def writer(user_id: int) -> None:
+            nonlocal sessions, errors
+            headers = {"X-User-Id": str(user_id)}
+            while time.monotonic() < deadline:
+                t0 = time.perf_counter()
+                started = await client.post("/session/start", json={}, headers=headers)
+                latencies.append(time.perf_counter() - t0)
+                if started.status_code != 201:
+                    errors += 1
+                    continue
+                t0 = time.perf_counter()
+                ended = await client.post(
+                    "/session/end",
+                    json={"session_id": started.json()["id"], "reels_watched": 5},
+                    headers=headers,
+                )
+                latencies.append(time.perf_counter() - t0)
+                if ended.status_code == 200:
+                    sessions += 1
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(writer(n) for n in range(1, writers + 1)))
+        elapsed = time.perf_counter() - started
+
+        # Let the worker drain, then check nothing was lost or double counted.
+        while (await client.get("/session/ingest/stats")).json()["pending"]:
+            await asyncio.sleep(0.05)
+        counted = 0
+        for user_id in range(1, writers + 1):
+            resp = await client.get("/summary/daily", headers={"X-User-Id": str(user_id)})
+            counted += sum(item["total_sessions"] for item in resp.json()["items"])
+
+    return {
+        "writes": len(latencies),
+        "errors": errors,
+        "wps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "consistent": counted == sessions,
+        "shapes": shapes,
+    }
+
+
+def _run_mode(queued: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env["INGEST_QUEUE_ENABLED"] = "1" if queued else "0"
+        env["INGEST_LOG_PATH"] = os.path.join(tmp, "ingest.log")
+        env["CACHE_SYNC_PATH"] = os.path.join(tmp, "bench.changes")
+        # One load generator is one client: measure the server, not the rate limiter.
+        env["RATE_LIMIT_ENABLED"] = "0"
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            env=env,
+        )
+        try:
+            asyncio.run(_wait_ready(base_url))
+            return asyncio.run(_write(base_url, args.writers, args.duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<7} {'writes':>8} {'errors':>7} {'writes/s':>9} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'consistent':>11}"
+    )
+    shapes = []
+    for queued in (False, True):
+        r = _run_mode(queued, args)
+        label = "queued" if queued else "direct"
+        print(
+            f"{label:<7} {r['writes']:>8} {r['errors']:>7} {r['wps']:>9.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {str(r['consistent']):>11}"
+        )
+        shapes.append(r["shapes"])
+
+    direct, queued = shapes
+    for name in direct:
+        if direct[name] != queued[name]:
+            print(f"{name} responses differ:\n  direct {direct[name]}\n  queued {queued[name]}")
+    if direct != queued:
+        sys.exit(1)
+    print("start / active / end JSON identical in both modes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Multi-user scaling benchmark.
+
+Grows one SQLite database in stages (default 1k -> 10k -> 100k synthetic
+users, each with a few weeks of sessions) and after each stage measures
+in-process latency of the user-scoped endpoints for random users. With
+per-user composite indexes the latency should stay flat as the total
+table size grows by two orders of magnitude.
+
+    python -m benchmarks.multi_user --stages 1000,10000,100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+ENDPOINTS = ["/session/active", "/sessions", "/summary/daily", "/summary/streaks"]
+
+
+def _seed_users(engine, first_user: int, last_user: int, sessions_per_user: int) -> None:
+    from sqlalchemy import insert, text
+
+    from app.models.session import Session as SessionModel
+    from app.services.summaries import date_keys
+
+    today = date.today()
+    rows: List[Dict] = []
+    table = SessionModel.__table__
+    with engine.begin() as conn:
+        for user_id in range(first_user, last_user + 1):
+            for n in range(sessions_per_user):
+                day = today - timedelta(days=n)
+                start = datetime(day.year, day.month, day.day, 20, tzinfo=timezone.utc)
+                minutes = random.randint(1, 60)
+                rows.append(
+                    dict(
+                        user_id=user_id,
+                        start_time=start,
+                        end_time=start + timedelta(minutes=minutes),
+                        duration_minutes=minutes,
+                        reels_watched=random.randint(0, 200),
+                        mood=None,
+                        date=day,
+                        **date_keys(day),
+                    )
+                )
+            if len(rows) >= 20000:
+                conn.execute(insert(table), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(table), rows)
+        conn.execute(
+            text(
+                "INSERT INTO daily_summaries "
+                "(user_id, date, total_sessions, total_reels, total_minutes) "
+                "SELECT user_id, date, COUNT(*), SUM(reels_watched), SUM(duration_minutes) "
+                "FROM sessions WHERE user_id BETWEEN :lo AND :hi GROUP BY user_id, date"
+            ),
+            {"lo": first_user, "hi": last_user},
+        )
+
+
+def _measure(client, users: int, requests: int) -> Dict[str, float]:
+    results = {}
+    for path in ENDPOINTS:
+        samples = []
+        for _ in range(requests):
+            headers = {"X-User-Id": str(random.randint(1, users))}
+            t0 = time.perf_counter()
+            resp = client.get(path, headers=headers)
+            samples.append(time.perf_counter() - t0)
+            assert resp.status_code == 200, resp.text
+        results[path] = statistics.mean(samples) * 1000
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stages", default="1000,10000,100000")
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    stages = [int(s) for s in args.stages.split(",")]
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'multi_user.db')}"
+    os.environ["CACHE_SYNC_PATH"] = os.path.join(tmp, "multi_user.changes")
+    os.environ["SUMMARY_CACHE_ENABLED"] = "0"
+    os.environ["RATE_LIMIT_ENABLED"] = "0"
+    sys.path.insert(0, os.getcwd())
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal, get_engine
+    from app.main import app
+    from app.services.summaries import rebuild_rollups, repair_streaks
+
+    engine = get_engine()
+    migrate(engine)
+    client = TestClient(app)
+    seeded = 0
+    print(f"{'users':>8} {'sessions':>10} " + " ".join(f"{p:>18}" for p in ENDPOINTS))
+    for users in stages:
+        _seed_users(engine, seeded + 1, users, args.sessions_per_user)
+        seeded = users
+        db = SessionLocal()
+        try:
+            rebuild_rollups(db)
+            repair_streaks(db)
+        finally:
+            db.close()
+        with engine.connect() as conn:
+            total = conn.execute(text("SELECT COUNT(*) FROM sessions")).scalar()
+        timings = _measure(client, users, args.requests)
+        print(
+            f"{users:>8} {total:>10} "
+            + " ".join(f"{timings[p]:>15.2f} ms" for p in ENDPOINTS)
+        )
+
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM sessions "
+                "WHERE user_id = 1 AND end_time IS NULL ORDER BY start_time DESC LIMIT 1"
+            )
+        ).fetchall()
+    print("active-session plan:", "; ".join(row[-1] for row in plan))
+
+
+if __name__ == "__main__":
+    main()
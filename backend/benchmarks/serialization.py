@@ -0,0 +1,120 @@
+"""
+Per-row serialization cost: Pydantic response models vs the FAST_JSON path.
+
+Times how long it takes to turn N rows into the response body of
+`GET /sessions` and `GET /summary/daily`:
+
+- pydantic: what the default routes do, i.e. build the response model from
+  ORM rows, then let FastAPI validate it again through `response_model`,
+  `jsonable_encoder` it and render JSON,
+- fast: build plain dicts from column rows and encode them with orjson.
+
+Reports microseconds per row for several page sizes and checks that both
+paths produce the same JSON document.
+
+    python -m benchmarks.serialization --rows 100,1000,10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+
+def _best_of(fn: Callable[[], bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.path.insert(0, os.getcwd())
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+
+    from app.models.session import Session as SessionModel
+    from app.schemas.session import SessionListResponse
+    from app.schemas.summary import DailySummaryListResponse, DailySummaryResponse
+    from app.services.push import session_payload
+
+    def render(content: Any) -> bytes:
+        # starlette.responses.JSONResponse.render
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    print(f"{'payload':<16} {'rows':>7} {'pydantic µs/row':>16} {'fast µs/row':>12} {'speedup':>8}")
+    for count in (int(n) for n in args.rows.split(",")):
+        start = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+        orm_rows: List[SessionModel] = []
+        for n in range(count):
+            started = start + timedelta(hours=n)
+            orm_rows.append(
+                SessionModel(
+                    id=n + 1,
+                    user_id=1,
+                    start_time=started,
+                    end_time=started + timedelta(minutes=20),
+                    duration_minutes=20,
+                    reels_watched=n % 50,
+                    mood="Bored" if n % 2 else None,
+                    date=started.date(),
+                )
+            )
+        # Column rows as the fast path gets them from `.all()` (attribute access).
+        columns = list(SessionModel.__table__.c.keys())
+        ColumnRow = namedtuple("ColumnRow", columns)
+        plain_rows = [ColumnRow(*(getattr(r, c) for c in columns)) for r in orm_rows]
+
+        def sessions_pydantic() -> bytes:
+            model = SessionListResponse(sessions=orm_rows, next_cursor=None)
+            validated = SessionListResponse.validate(model)
+            return render(jsonable_encoder(validated))
+
+        def sessions_fast() -> bytes:
+            return orjson.dumps(
+                {"sessions": [session_payload(r) for r in plain_rows], "next_cursor": None}
+            )
+
+        daily_payload: List[Dict[str, Any]] = [
+            {
+                "date": date(2000, 1, 1) + timedelta(days=n),
+                "total_sessions": 3,
+                "total_reels": n % 90,
+                "total_minutes": n % 120,
+            }
+            for n in range(count)
+        ]
+
+        def daily_pydantic() -> bytes:
+            # Pre-FAST_JSON summary route: one model per row, then `.json()`.
+            items = [DailySummaryResponse(**row) for row in daily_payload]
+            return DailySummaryListResponse(items=items).json().encode()
+
+        def daily_fast() -> bytes:
+            return orjson.dumps({"items": daily_payload})
+
+        for label, slow, fast in (
+            ("/sessions", sessions_pydantic, sessions_fast),
+            ("/summary/daily", daily_pydantic, daily_fast),
+        ):
+            assert json.loads(slow()) == json.loads(fast()), label
+            slow_s = _best_of(slow, args.repeat)
+            fast_s = _best_of(fast, args.repeat)
+            print(
+                f"{label:<16} {count:>7} {slow_s / count * 1e6:>16.2f} "
+                f"{fast_s / count * 1e6:>12.2f} {slow_s / fast_s:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Mixed read/write benchmark: default SQLite settings vs the tuning profile.
+
+For each profile a uvicorn server is started against a fresh SQLite file
+(summary cache disabled, so reads hit the DB). Writer clients loop
+start/end sessions while reader clients poll the summary endpoints;
+reports write and read throughput and read p99 latency, which shows
+whether dashboard reads stall behind `end_session` commits.
+
+    python -m benchmarks.sqlite_profile --writers 8 --readers 64 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.async_vs_sync import _free_port, _percentile, _wait_ready
+
+READ_PATHS = ["/summary/daily", "/summary/weekly", "/summary/streaks"]
+
+
+async def _mixed(base_url: str, writers: int, readers: int, duration: float) -> Dict[str, float]:
+    writes = 0
+    read_latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=writers + readers)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def writer(user_id: int) -> None:
+            nonlocal writes, errors
+            headers = {"X-User-Id": str(user_id)}
+            while time.monotonic() < deadline:
+                started = await client.post("/session/start", json={}, headers=headers)
+                if started.status_code != 201:
+                    errors += 1
+                    continue
+                ended = await client.post(
+                    "/session/end",
+                    json={"session_id": started.json()["id"], "reels_watched": 5},
+                    headers=headers,
+                )
+                if ended.status_code == 200:
+                    writes += 1
+                else:
+                    errors += 1
+
+        async def reader(offset: int) -> None:
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                headers = {"X-User-Id": str(1 + i % max(writers, 1))}
+                path = READ_PATHS[i % len(READ_PATHS)]
+                i += 1
+                t0 = time.perf_counter()
+                resp = await client.get(path, headers=headers)
+                read_latencies.append(time.perf_counter() - t0)
+                if resp.status_code != 200:
+                    errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(writer(n + 1) for n in range(writers)), *(reader(n) for n in range(readers))
+        )
+        elapsed = time.perf_counter() - started_at
+
+    return {
+        "writes_per_s": writes / elapsed,
+        "reads_per_s": len(read_latencies) / elapsed,
+        "read_p99_ms": _percentile(read_latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+def _run_profile(tuned: bool, args: argparse.Namespace) -> Dict[str, float]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            CACHE_SYNC_PATH=os.path.join(tmp, "bench.changes"),
+            SQLITE_TUNING="1" if tuned else "0",
+            SUMMARY_CACHE_ENABLED="0",
+            RATE_LIMIT_ENABLED="0",  # one load generator = one client
+        )
+        env.pop("READ_DATABASE_URL", None)
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            env=env,
+        )
+        try:
+            asyncio.run(_wait_ready(base_url))
+            return asyncio.run(_mixed(base_url, args.writers, args.readers, args.duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'writes/s':>9} {'reads/s':>9} {'read p99 ms':>12} {'errors':>7}")
+    for tuned in (False, True):
+        r = _run_profile(tuned, args)
+        label = "tuned" if tuned else "default"
+        print(
+            f"{label:<8} {r['writes_per_s']:>9.1f} {r['reads_per_s']:>9.1f} "
+            f"{r['read_p99_ms']:>12.1f} {r['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Import-time and cold-start benchmark.
+
+Measures, each in fresh Python processes:
+
+- import: wall time of `import app.main` (no DB work should happen here),
+- cold start: spawning uvicorn until the first request is answered, against
+  a fresh database (migrations run in the lifespan) and against one that is
+  already migrated,
+- workers: `uvicorn --workers N` on a fresh database, checking that the
+  concurrently starting workers migrated it exactly once without errors.
+
+`--importtime K` also prints the K slowest modules from `python -X importtime`.
+
+    python -m benchmarks.startup --repeat 5 --workers 4 --importtime 15
+"""
+import argparse
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(db_path: str) -> Dict[str, str]:
+    return dict(
+        os.environ, DATABASE_URL=f"sqlite:///{db_path}", CACHE_SYNC_PATH=db_path + ".changes"
+    )
+
+
+def _import_seconds(db_path: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=_env(db_path),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def _cold_start(db_path: str, workers: int = 1, timeout: float = 60.0) -> Tuple[float, str]:
+    """Seconds from spawning uvicorn until a request succeeds; plus its stderr."""
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd, env=_env(db_path), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        deadline = started + timeout
+        while True:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("server did not become ready")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/session/active", timeout=1.0).is_success:
+                    break
+            except httpx.TransportError:
+                time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        if workers > 1:
+            time.sleep(2.0)  # let the other workers finish their startup
+    finally:
+        proc.terminate()
+        _, stderr = proc.communicate(timeout=30)
+    return elapsed, stderr
+
+
+def _summary(samples: List[float]) -> str:
+    return f"median {statistics.median(samples) * 1000:8.1f} ms   min {min(samples) * 1000:8.1f} ms"
+
+
+def _importtime(db_path: str, top: int) -> None:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_env(db_path),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    print("\nslowest imports (cumulative):")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="0 skips the multi-worker run")
+    parser.add_argument("--importtime", type=int, default=0, metavar="K")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    from app.db.migrations import HEAD
+
+    tmp = tempfile.mkdtemp()
+    warm_db = os.path.join(tmp, "warm.db")
+
+    imports = [_import_seconds(os.path.join(tmp, f"import-{n}.db")) for n in range(args.repeat)]
+    created = [n for n in range(args.repeat) if os.path.exists(os.path.join(tmp, f"import-{n}.db"))]
+    print(f"import app.main          {_summary(imports)}   (DB files created: {len(created)})")
+
+    fresh = [_cold_start(os.path.join(tmp, f"fresh-{n}.db"))[0] for n in range(args.repeat)]
+    print(f"cold start, fresh DB     {_summary(fresh)}")
+
+    _cold_start(warm_db)
+    warm = [_cold_start(warm_db)[0] for _ in range(args.repeat)]
+    print(f"cold start, migrated DB  {_summary(warm)}")
+
+    if args.workers > 1:
+        db_path = os.path.join(tmp, "workers.db")
+        elapsed, stderr = _cold_start(db_path, workers=args.workers)
+        with sqlite3.connect(db_path) as conn:
+            version = conn.execute("SELECT version FROM schema_version").fetchone()[0]
+            rows = conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0]
+        errors = [line for line in stderr.splitlines() if "Traceback" in line or "ERROR" in line]
+        ok = version == HEAD and rows == 1 and not errors
+        print(
+            f"{args.workers} workers, fresh DB   first ready {elapsed * 1000:8.1f} ms   "
+            f"schema v{version} (head v{HEAD}), errors: {len(errors)}  {'OK' if ok else 'FAIL'}"
+        )
+
+    if args.importtime:
+        _importtime(warm_db, args.importtime)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Benchmark suite: every endpoint, several DB sizes, in-process and over HTTP.
+
+For each size (total sessions) a synthetic history is seeded once into a
+template SQLite file (reused across runs from `--data-dir`) and copied for
+the run. The same concurrent driver then exercises `/session/start`,
+`/session/end`, `/session/active`, `/sessions`, all `/summary/*` and the
+`/analytics/*` reads:
+
+- in-process: a child process calls the ASGI app directly (no sockets),
+- http: a uvicorn server on the same DB, driven over real connections.
+
+Reports requests/sec, p50/p95/p99 latency per endpoint and the peak RSS of
+the process serving the app. Results can be saved as a baseline and later
+runs compared against it (regressions beyond `--tolerance` are flagged).
+The summary cache is off unless `--cache`, so reads exercise the DB.
+
+    python -m benchmarks.suite --sizes 1000,100000 --save-baseline baseline.json
+    python -m benchmarks.suite --sizes 1000,100000 --compare baseline.json
+    python -m benchmarks.suite --sizes 1000,100000,10000000 --data-dir /var/tmp/bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.async_vs_sync import _free_port, _percentile, _wait_ready
+
+READ_PATHS = [
+    "/session/active",
+    "/sessions",
+    "/summary/daily",
+    "/summary/weekly",
+    "/summary/monthly",
+    "/summary/streaks",
+    "/summary/dashboard",
+    "/summary/hourly",
+    "/summary/moods",
+    "/analytics/rolling",
+    "/analytics/histogram",
+    "/analytics/heatmap",
+    "/analytics/moods",
+]
+WRITE_PATHS = ["/session/start", "/session/end"]
+
+# Synthetic history shape: each user has two sessions a day for 100 days,
+# at random hours and with random moods (so the breakdowns are not trivial).
+SESSIONS_PER_USER = 200
+SESSIONS_PER_DAY = 2
+SEED_CHUNK_SIZE = 50000
+# Part of the template file name: bump when the synthetic history changes.
+SEED_FORMAT = 2
+
+MOODS = [None, "Bored", "Stressed", "Relaxed", "Happy"]
+
+
+# Seeding -------------------------------------------------------------------
+
+
+def _users_for(size: int) -> int:
+    return max(1, size // SESSIONS_PER_USER)
+
+
+def _session_rows(user_id: int, sessions: int, today: date) -> List[Dict[str, Any]]:
+    from app.services.summaries import date_keys
+
+    rows = []
+    for n in range(sessions):
+        day = today - timedelta(days=1 + n // SESSIONS_PER_DAY)
+        start = datetime(
+            day.year, day.month, day.day, random.randrange(24), random.randrange(60),
+            tzinfo=timezone.utc,
+        )
+        minutes = random.randint(1, 60)
+        rows.append(
+            dict(
+                user_id=user_id,
+                start_time=start,
+                end_time=start + timedelta(minutes=minutes),
+                duration_minutes=minutes,
+                reels_watched=random.randint(0, 200),
+                mood=random.choice(MOODS),
+                date=day,
+                **date_keys(day),
+            )
+        )
+    return rows
+
+
+def _seed(size: int) -> None:
+    """Fill the (empty) DB behind DATABASE_URL with `size` finished sessions."""
+    from sqlalchemy import insert, text
+
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal, get_engine
+    from app.models.session import Session as SessionModel
+    from app.services.summaries import rebuild_breakdowns, rebuild_rollups, repair_streaks
+
+    engine = get_engine()
+    migrate(engine)
+    random.seed(size)
+    today = date.today()
+    users = _users_for(size)
+    table = SessionModel.__table__
+    remaining = size
+    chunk: List[Dict[str, Any]] = []
+    with engine.begin() as conn:
+        for user_id in range(1, users + 1):
+            # The last user takes the remainder so the total is exact.
+            count = remaining if user_id == users else min(SESSIONS_PER_USER, remaining)
+            remaining -= count
+            chunk.extend(_session_rows(user_id, count, today))
+            if len(chunk) >= SEED_CHUNK_SIZE:
+                conn.execute(insert(table), chunk)
+                chunk = []
+        if chunk:
+            conn.execute(insert(table), chunk)
+        conn.execute(
+            text(
+                "INSERT INTO daily_summaries "
+                "(user_id, date, total_sessions, total_reels, total_minutes) "
+                "SELECT user_id, date, COUNT(*), SUM(reels_watched), SUM(duration_minutes) "
+                "FROM sessions GROUP BY user_id, date"
+            )
+        )
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+        rebuild_breakdowns(db)
+        repair_streaks(db)
+    finally:
+        db.close()
+
+
+def _template_db(size: int, data_dir: str) -> str:
+    """Path of the seeded template DB for `size`, seeding it on first use."""
+    path = os.path.join(data_dir, f"suite{SEED_FORMAT}_{size}.db")
+    if os.path.exists(path):
+        return path
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{partial}",
+            CACHE_SYNC_PATH=os.path.join(tmp, "seed.changes"),
+        )
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--seed-only", str(size)],
+            env=env,
+            check=True,
+        )
+    # Fold the WAL back in so a plain file copy is a complete database.
+    import sqlite3
+
+    with sqlite3.connect(partial) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode = DELETE")
+    os.replace(partial, path)
+    print(f"seeded {size} sessions in {time.perf_counter() - started:.1f}s -> {path}")
+    return path
+
+
+# Driving -------------------------------------------------------------------
+
+
+def _stats(samples: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+    }
+
+
+async def _drive_reads(
+    client: httpx.AsyncClient, path: str, users: int, concurrency: int, requests: int
+) -> Dict[str, float]:
+    samples: List[float] = []
+    errors = 0
+    per_worker = max(1, requests // concurrency)
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in range(per_worker):
+            headers = {"X-User-Id": str(random.randint(1, users))}
+            t0 = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - t0)
+            if resp.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _stats(samples, errors, time.perf_counter() - started)
+
+
+async def _drive_writes(
+    client: httpx.AsyncClient, users: int, concurrency: int, requests: int
+) -> Dict[str, Dict[str, float]]:
+    samples: Dict[str, List[float]] = {path: [] for path in WRITE_PATHS}
+    errors = {path: 0 for path in WRITE_PATHS}
+    per_worker = max(1, requests // concurrency)
+
+    async def worker(user_id: int) -> None:
+        # One user per worker: each user may only have one active session.
+        headers = {"X-User-Id": str(user_id)}
+        for _ in range(per_worker):
+            t0 = time.perf_counter()
+            started = await client.post("/session/start", json={}, headers=headers)
+            samples["/session/start"].append(time.perf_counter() - t0)
+            if started.status_code != 201:
+                errors["/session/start"] += 1
+                continue
+            t0 = time.perf_counter()
+            ended = await client.post(
+                "/session/end",
+                json={"session_id": started.json()["id"], "reels_watched": 7, "mood": "Bored"},
+                headers=headers,
+            )
+            samples["/session/end"].append(time.perf_counter() - t0)
+            if ended.status_code != 200:
+                errors["/session/end"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(users + 1 + n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {path: _stats(samples[path], errors[path], elapsed) for path in WRITE_PATHS}
+
+
+async def _drive_all(client: httpx.AsyncClient, users: int, args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    results.update(await _drive_writes(client, users, args.concurrency, args.requests))
+    for path in READ_PATHS:
+        results[path] = await _drive_reads(client, path, users, args.concurrency, args.requests)
+    return results
+
+
+def _peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def _inprocess_worker(size: int, args: argparse.Namespace) -> None:
+    """Child process: drive the ASGI app directly and print results as JSON."""
+    from app.main import app
+
+    async def run() -> Dict[str, Any]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _drive_all(client, _users_for(size), args)
+
+    endpoints = asyncio.run(run())
+    print(json.dumps({"endpoints": endpoints, "peak_rss_mb": _peak_rss_mb()}))
+
+
+def _run_inprocess(db_path: str, size: int, env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    out = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.suite", "--inprocess-worker", str(size),
+            "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+        ],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _run_http(size: int, env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        env=env,
+    )
+    try:
+        asyncio.run(_wait_ready(base_url, timeout=120.0))
+
+        async def run() -> Dict[str, Any]:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+                return await _drive_all(client, _users_for(size), args)
+
+        endpoints = asyncio.run(run())
+        return {"endpoints": endpoints, "peak_rss_mb": _peak_rss_mb(server.pid)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+# Reporting -----------------------------------------------------------------
+
+
+def _print_results(results: Dict[str, Any]) -> None:
+    print(
+        f"{'size':>9} {'mode':<11} {'endpoint':<20} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    for size, modes in results["runs"].items():
+        for mode, run in modes.items():
+            for path, r in run["endpoints"].items():
+                print(
+                    f"{size:>9} {mode:<11} {path:<20} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} "
+                    f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>6}"
+                )
+            rss = run["peak_rss_mb"]
+            print(f"{size:>9} {mode:<11} {'peak RSS':<20} {rss if rss is None else f'{rss:.1f} MB':>9}")
+
+
+def _compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> int:
+    """Print deltas vs `baseline`; returns the number of regressions."""
+    regressions = 0
+    print(f"\ncompared with baseline from {baseline.get('created', '?')} (tolerance {tolerance:.0%})")
+    print(f"{'size':>9} {'mode':<11} {'endpoint':<20} {'req/s Δ':>9} {'p95 Δ':>9}")
+    for size, modes in results["runs"].items():
+        for mode, run in modes.items():
+            base_run = baseline.get("runs", {}).get(size, {}).get(mode)
+            if base_run is None:
+                continue
+            for path, r in run["endpoints"].items():
+                base = base_run["endpoints"].get(path)
+                if not base or not base["rps"] or not base["p95_ms"]:
+                    continue
+                rps_delta = r["rps"] / base["rps"] - 1
+                p95_delta = r["p95_ms"] / base["p95_ms"] - 1
+                flag = ""
+                if rps_delta < -tolerance or p95_delta > tolerance:
+                    regressions += 1
+                    flag = "  REGRESSION"
+                print(
+                    f"{size:>9} {mode:<11} {path:<20} {rps_delta:>+9.1%} {p95_delta:>+9.1%}{flag}"
+                )
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,100000", help="total sessions per DB")
+    parser.add_argument("--modes", default="inprocess,http")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="per endpoint")
+    parser.add_argument("--cache", action="store_true", help="keep the summary cache on")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "tracker-bench"))
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results JSON as the new baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--seed-only", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--inprocess-worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.path.insert(0, os.getcwd())
+
+    if args.seed_only is not None:
+        _seed(args.seed_only)
+        return
+    if args.inprocess_worker is not None:
+        _inprocess_worker(args.inprocess_worker, args)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    modes = args.modes.split(",")
+    results: Dict[str, Any] = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "cache": args.cache,
+        "runs": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        template = _template_db(size, args.data_dir)
+        runs: Dict[str, Any] = {}
+        for mode in modes:
+            with tempfile.TemporaryDirectory(dir=args.data_dir) as tmp:
+                db_path = os.path.join(tmp, "run.db")
+                shutil.copyfile(template, db_path)
+                env = dict(os.environ)
+                env["DATABASE_URL"] = f"sqlite:///{db_path}"
+                env["CACHE_SYNC_PATH"] = os.path.join(tmp, "run.changes")
+                env["SUMMARY_CACHE_ENABLED"] = "1" if args.cache else "0"
+                # One load generator is one client: measure the server, not the rate limiter.
+                env["RATE_LIMIT_ENABLED"] = "0"
+                env.pop("READ_DATABASE_URL", None)
+                if mode == "inprocess":
+                    runs[mode] = _run_inprocess(db_path, size, env, args)
+                elif mode == "http":
+                    runs[mode] = _run_http(size, env, args)
+                else:
+                    parser.error(f"unknown mode {mode!r}")
+        results["runs"][str(size)] = runs
+
+    _print_results(results)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as fh:
+                json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = _compare(results, json.load(fh), args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Daily summary consistency check / repair benchmark.
+
+Seeds (once, reused from `--data-dir`) the same synthetic history as
+`benchmarks.suite`, copies it, corrupts a fraction of `daily_summaries`
+(totals changed, rows deleted, rows without sessions added) and times, each
+in a fresh process through the CLI:
+
+- check: `python -m app.cli check-summaries` (report only),
+- repair: the same with `--repair`, followed by a check that must come back clean,
+- full: the serial alternative, every daily summary deleted and recomputed
+  with one INSERT ... SELECT ... GROUP BY over all sessions,
+
+for every worker count in `--workers`. Speedup needs as many free CPUs as
+workers; SQLite readers do not block each other in WAL mode.
+
+    python -m benchmarks.summary_check --size 10000000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from benchmarks.suite import _template_db
+
+FULL_REBUILD_SQL = (
+    "DELETE FROM daily_summaries;"
+    "INSERT INTO daily_summaries (user_id, date, total_sessions, total_reels, total_minutes) "
+    "SELECT user_id, date, COUNT(*), COALESCE(SUM(reels_watched), 0), "
+    "COALESCE(SUM(duration_minutes), 0) FROM sessions WHERE end_time IS NOT NULL "
+    "GROUP BY user_id, date;"
+)
+
+
+def _copy(template: str, path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.copy(template, path)
+
+
+def _corrupt(path: str, fraction: float) -> int:
+    """Damage about `fraction` of the daily summaries; returns rows touched."""
+    every = max(2, int(1 / fraction))
+    with sqlite3.connect(path) as conn:
+        changed = conn.execute(
+            "UPDATE daily_summaries SET total_reels = total_reels + 1 WHERE id % ? = 0", (every,)
+        ).rowcount
+        changed += conn.execute(
+            "DELETE FROM daily_summaries WHERE id % ? = 1", (every,)
+        ).rowcount
+        conn.execute(
+            "INSERT INTO daily_summaries (user_id, date, total_sessions, total_reels, total_minutes) "
+            "VALUES (1, '2000-01-01', 1, 1, 1)"
+        )
+    return changed + 1
+
+
+def _cli(path: str, args: List[str]) -> Tuple[float, str]:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{path}",
+        ARCHIVE_DIR=path + ".archive",
+        CACHE_SYNC_PATH=path + ".changes",
+    )
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "app.cli", "check-summaries", *args],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode not in (0, 1) or "Traceback" in proc.stderr:
+        raise RuntimeError(proc.stderr)
+    lines = [line for line in proc.stdout.splitlines() if not line.startswith("  ")]
+    return elapsed, " ".join(lines)
+
+
+def _full_rebuild(path: str) -> float:
+    started = time.perf_counter()
+    with sqlite3.connect(path) as conn:
+        conn.executescript(FULL_REBUILD_SQL)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=10_000_000, help="total sessions")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--chunk-days", type=int, default=7)
+    parser.add_argument("--corrupt", type=float, default=0.01, help="fraction of rows damaged")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "tracker-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    template = _template_db(args.size, args.data_dir)
+    path = os.path.join(args.data_dir, f"check_{args.size}.db")
+    chunking = ["--chunk-days", str(args.chunk_days)]
+
+    print(f"{args.size} sessions, {os.cpu_count()} CPU(s), chunks of {args.chunk_days} days")
+    _copy(template, path)
+    damaged = _corrupt(path, args.corrupt)
+    print(f"full serial recompute: {_full_rebuild(path):8.1f}s")
+    for workers in (int(w) for w in args.workers.split(",")):
+        _copy(template, path)
+        _corrupt(path, args.corrupt)
+        check, report = _cli(path, ["--workers", str(workers), *chunking])
+        print(f"check   workers={workers:<3} {check:8.1f}s  {report}")
+        repair, report = _cli(path, ["--workers", str(workers), "--repair", *chunking])
+        print(f"repair  workers={workers:<3} {repair:8.1f}s  {report}")
+        _, report = _cli(path, ["--workers", str(workers), *chunking])
+        if not report.startswith("Checked") or " 0 day(s) differ" not in report:
+            raise SystemExit(f"not clean after repair: {report}")
+    print(f"({damaged} daily summaries damaged per run; each repair verified clean.)")
+    for suffix in ("", "-wal", "-shm", ".changes"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.rmtree(path + ".archive", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
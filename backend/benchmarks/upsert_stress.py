@@ -0,0 +1,128 @@
+"""
+Concurrency stress test for the summary upserts in `end_session`.
+
+Many threads fold sessions into the *same* brand-new day at once (the
+worst case for a select-then-insert upsert), then many threads race to end
+the *same* session. Checks that no increments are lost, no IntegrityError
+escapes, and each session is counted exactly once; also reports SQL
+statements per summary update.
+
+    python -m benchmarks.upsert_stress --threads 16 --per-thread 200
+
+Uses a temporary SQLite file unless DATABASE_URL points elsewhere (e.g. a
+Postgres instance).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--per-thread", type=int, default=200)
+    parser.add_argument("--racers", type=int, default=16, help="threads ending one session")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'stress.db')}"
+    os.environ.setdefault("CACHE_SYNC_PATH", os.path.join(tmp, "stress.changes"))
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")  # threads share one test client
+    sys.path.insert(0, os.getcwd())
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal, get_engine
+    from app.main import app
+    from app.models.daily_summary import DailySummary
+    from app.models.monthly_summary import MonthlySummary
+    from app.models.weekly_summary import WeeklySummary
+    from app.services.summaries import record_session_totals
+
+    engine = get_engine()
+    migrate(engine)
+    statements = Counter()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements[threading.get_ident()] += 1
+
+    user_id = 424242
+    day = date(2031, 1, 1)  # a day nobody has data for yet
+    errors: Counter = Counter()
+
+    def writer() -> None:
+        for _ in range(args.per_thread):
+            db = SessionLocal()
+            try:
+                record_session_totals(db, user_id, day, reels_delta=2, minutes_delta=3)
+                db.commit()
+            except Exception as exc:  # noqa: BLE001 - we are counting failures
+                db.rollback()
+                errors[type(exc).__name__] += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    expected = args.threads * args.per_thread - sum(errors.values())
+    db = SessionLocal()
+    try:
+        daily = db.query(DailySummary).filter_by(user_id=user_id, summary_date=day).one()
+        weekly = db.query(WeeklySummary).filter_by(user_id=user_id).one()
+        monthly = db.query(MonthlySummary).filter_by(user_id=user_id).one()
+        totals = (daily.total_sessions, weekly.total_sessions, monthly.total_sessions)
+        reels = daily.total_reels
+    finally:
+        db.close()
+
+    ops = args.threads * args.per_thread
+    print(f"summary upserts: {ops} in {elapsed:.2f}s ({ops / elapsed:.0f}/s)")
+    print(f"  errors: {dict(errors) or 'none'}")
+    print(f"  sessions counted (daily, weekly, monthly): {totals}, expected {expected}")
+    print(f"  reels counted: {reels}, expected {expected * 2}")
+    print(f"  SQL statements per update: {sum(statements.values()) / ops:.2f}")
+
+    # Many tabs ending the same session at once: exactly one may win.
+    client = TestClient(app)
+    headers = {"X-User-Id": str(user_id + 1)}
+    session_id = client.post("/session/start", json={}, headers=headers).json()["id"]
+    codes: Counter = Counter()
+    barrier = threading.Barrier(args.racers)
+
+    def racer() -> None:
+        barrier.wait()
+        resp = client.post(
+            "/session/end", json={"session_id": session_id, "reels_watched": 1}, headers=headers
+        )
+        codes[resp.status_code] += 1
+
+    racers = [threading.Thread(target=racer) for _ in range(args.racers)]
+    for t in racers:
+        t.start()
+    for t in racers:
+        t.join()
+    counted = client.get("/summary/daily", headers=headers).json()["items"][0]["total_sessions"]
+    print(f"concurrent ends of one session: status codes {dict(codes)}, counted {counted}x")
+
+    ok = not errors and set(totals) == {expected} and reels == expected * 2 and counted == 1
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Multi-worker scaling and cross-worker freshness.
+
+Seeds (once, reused from `--data-dir`) the same synthetic history as
+`benchmarks.suite` and, for every worker count in `--workers`, serves a copy
+with `gunicorn -c gunicorn.conf.py` (or `uvicorn --workers`) and measures:
+
+- throughput: `--clients` load-generator processes read random users'
+  summaries (cache on, as deployed) for `--duration` seconds while one
+  writer per process keeps starting and ending sessions; reads/s, p50, p99;
+- freshness: for `--probes` users, `--reads` reads spread over the workers
+  (one connection per request) let every worker cache the user's summary,
+  a session is ended, and the summary is read back `--reads` times. A read
+  not showing the session counts as stale. The largest worker count is run
+  once more with CACHE_SYNC_ENABLED=0 to show what the shared counters
+  prevent.
+
+Reads scale with free cores only; the load generators need cores too.
+
+    python -m benchmarks.workers --size 100000 --workers 1,2,4,8
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.async_vs_sync import _free_port, _percentile, _wait_ready
+from benchmarks.suite import READ_PATHS, _template_db, _users_for
+
+# Paths the throughput phase reads (the cacheable, per-user ones).
+LOAD_PATHS = [path for path in READ_PATHS if path.startswith("/summary/")]
+
+
+# Load generation (child processes) ----------------------------------------
+
+
+async def _load(
+    base_url: str, users: int, concurrency: int, duration: float, writer_id: int
+) -> Dict[str, Any]:
+    samples: List[float] = []
+    errors = 0
+    writes = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def reader() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                headers = {"X-User-Id": str(random.randint(1, users))}
+                t0 = time.perf_counter()
+                resp = await client.get(random.choice(LOAD_PATHS), headers=headers)
+                samples.append(time.perf_counter() - t0)
+                if resp.status_code != 200:
+                    errors += 1
+
+        async def writer() -> None:
+            # A user of its own, so its single active session is never contended.
+            nonlocal writes, errors
+            headers = {"X-User-Id": str(writer_id)}
+            while time.monotonic() < deadline:
+                started = await client.post("/session/start", json={}, headers=headers)
+                if started.status_code != 201:
+                    errors += 1
+                    continue
+                ended = await client.post(
+                    "/session/end",
+                    json={"session_id": started.json()["id"], "reels_watched": 3},
+                    headers=headers,
+                )
+                writes += ended.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(writer(), *(reader() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"samples": samples, "errors": errors, "writes": writes, "elapsed": elapsed}
+
+
+def _load_process(
+    base_url: str, users: int, concurrency: int, duration: float, writer_id: int
+) -> Dict[str, Any]:
+    return asyncio.run(_load(base_url, users, concurrency, duration, writer_id))
+
+
+def _throughput(base_url: str, users: int, args: argparse.Namespace) -> Dict[str, float]:
+    with ProcessPoolExecutor(args.clients) as pool:
+        futures = [
+            pool.submit(
+                _load_process, base_url, users, args.concurrency, args.duration, users + 1 + n
+            )
+            for n in range(args.clients)
+        ]
+        results = [future.result() for future in futures]
+    samples = [s for r in results for s in r["samples"]]
+    elapsed = max(r["elapsed"] for r in results)
+    return {
+        "reads_per_s": len(samples) / elapsed,
+        "writes_per_s": sum(r["writes"] for r in results) / elapsed,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+        "errors": sum(r["errors"] for r in results),
+    }
+
+
+# Freshness ------------------------------------------------------------------
+
+
+async def _today_reels(client: httpx.AsyncClient, user_id: int) -> int:
+    # Seeded users have no stored zone: their today is the UTC one.
+    today = datetime.now(timezone.utc).date().isoformat()
+    resp = await client.get("/summary/daily", headers={"X-User-Id": str(user_id)})
+    resp.raise_for_status()
+    return sum(item["total_reels"] for item in resp.json()["items"] if item["date"] == today)
+
+
+async def _freshness(base_url: str, users: int, args: argparse.Namespace) -> Tuple[int, int]:
+    """(stale reads, reads) after writes, each read on a new connection."""
+    stale = reads = 0
+    # No keep-alive: every request opens a connection, accepted by any worker.
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        for user_id in random.sample(range(1, users + 1), args.probes):
+            for _ in range(args.reads):  # warm every worker's cache
+                before = await _today_reels(client, user_id)
+            headers = {"X-User-Id": str(user_id)}
+            started = (await client.post("/session/start", json={}, headers=headers)).json()
+            await client.post(
+                "/session/end",
+                json={"session_id": started["id"], "reels_watched": 5},
+                headers=headers,
+            )
+            for _ in range(args.reads):
+                after = await _today_reels(client, user_id)
+                stale += after != before + 5
+                reads += 1
+    return stale, reads
+
+
+# Servers ------------------------------------------------------------------
+
+
+def _serve(server: str, workers: int, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    if server == "gunicorn":
+        env = dict(env, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+        cmd = [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--log-level", "critical", "app.main:app",
+        ]
+    else:
+        cmd = [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning", "--no-access-log",
+        ]
+    return subprocess.Popen(cmd, env=env)
+
+
+def _run(
+    template: str, workers: int, sync: bool, users: int, args: argparse.Namespace, tmp: str
+) -> Dict[str, Any]:
+    db_path = os.path.join(tmp, "run.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.copyfile(template, db_path)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        CACHE_SYNC_ENABLED="1" if sync else "0",
+        CACHE_SYNC_PATH=os.path.join(tmp, f"run_{workers}_{int(sync)}.changes"),
+        SUMMARY_CACHE_ENABLED="1",
+        # One load generator is one client: measure the server, not the rate limiter.
+        RATE_LIMIT_ENABLED="0",
+    )
+    env.pop("READ_DATABASE_URL", None)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = _serve(args.server, workers, port, env)
+    try:
+        asyncio.run(_wait_ready(base_url, timeout=120.0))
+        result: Dict[str, Any] = {}
+        if sync:
+            result.update(_throughput(base_url, users, args))
+        result["stale"], result["reads"] = asyncio.run(_freshness(base_url, users, args))
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100_000, help="total sessions")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--server", choices=("gunicorn", "uvicorn"), default="gunicorn")
+    parser.add_argument("--clients", type=int, default=4, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="readers per load generator")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probes", type=int, default=20, help="users written to check freshness")
+    parser.add_argument("--reads", type=int, default=20, help="reads per probe before and after")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "tracker-bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    template = _template_db(args.size, args.data_dir)
+    users = _users_for(args.size)
+    counts = [int(w) for w in args.workers.split(",")]
+    print(
+        f"{args.size} sessions, {users} users, {os.cpu_count()} CPU(s), {args.server}, "
+        f"{args.clients}x{args.concurrency} readers + {args.clients} writers, {args.duration:.0f}s"
+    )
+    print(
+        f"{'workers':>7} {'reads/s':>9} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'errors':>6}  stale reads"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in counts:
+            r = _run(template, workers, True, users, args, tmp)
+            print(
+                f"{workers:>7} {r['reads_per_s']:>9.0f} {r['writes_per_s']:>9.0f} "
+                f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>6}  "
+                f"{r['stale']}/{r['reads']}"
+            )
+        r = _run(template, max(counts), False, users, args, tmp)
+        print(f"{max(counts):>7} workers without CACHE_SYNC: {r['stale']}/{r['reads']} stale reads")
+
+
+if __name__ == "__main__":
+    main()
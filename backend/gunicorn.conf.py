@@ -0,0 +1,44 @@
+"""
+Multi-worker deployment: one uvicorn worker process per core under gunicorn.
+
+    cd backend && gunicorn -c gunicorn.conf.py app.main:app
+
+(`uvicorn app.main:app --workers N` runs the same app the same way, without
+gunicorn's worker supervision.)
+
+Nothing DB-related happens at import, so workers fork cheaply; each one
+then runs the app's lifespan. Migrations run under a DB lock and partition
+maintenance is idempotent, so workers may start at once. Every worker has
+its own pools and in-memory caches, kept coherent through the shared
+change counters (`CACHE_SYNC_PATH`, see `app.core.changes`): all workers
+must run on one host. Per-client rate limits apply per worker.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Worker heartbeat; SSE/WebSocket streams are served by the event loop and
+# do not count against it.
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# Engines and caches must be created in the workers, after the fork.
+preload_app = False
+
+
+def on_starting(server) -> None:
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if server.cfg.workers <= 1:
+        return
+    if settings.INGEST_QUEUE_ENABLED:
+        # Pending events live in one process (log + overlay of open sessions).
+        raise RuntimeError("INGEST_QUEUE_ENABLED needs a single worker (WEB_CONCURRENCY=1).")
+    if not settings.CACHE_SYNC_ENABLED:
+        server.log.warning(
+            "CACHE_SYNC_ENABLED is off: workers may serve stale cached summaries "
+            "for up to SUMMARY_CACHE_TTL_SECONDS after another worker's write."
+        )
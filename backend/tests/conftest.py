@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read from the environment at import, so point every file the
+# app writes at a scratch directory before `app` is imported.
+_workdir = tempfile.mkdtemp(prefix="tracker-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/tracker.db")
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_workdir, "archive"))
+os.environ.setdefault("CACHE_SYNC_PATH", os.path.join(_workdir, "tracker.changes"))
+os.environ.setdefault("INGEST_LOG_PATH", os.path.join(_workdir, "tracker.ingest.log"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
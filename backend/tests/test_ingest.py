@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.models.daily_summary import DailySummary
+from app.models.session import Session as SessionModel
+from app.services.ingest import IngestQueue
+from app.services.sweeper import close_stale_sessions
+
+USER_ID = 4401
+
+
+def test_queued_end_loses_to_sweeper_without_double_count(client, tmp_path):
+    queue = IngestQueue(str(tmp_path / "ingest.log"), batch_size=100, flush_interval=1.0)
+    queue.open(SessionLocal)
+    now = datetime.now(timezone.utc)
+    # Stale for a 60-minute sweep but not for the app's own background
+    # sweeper (SESSION_MAX_MINUTES, 720 by default).
+    started = now - timedelta(hours=3)
+    queue.start_session(queue.view(USER_ID), USER_ID, started, started.date())
+    queue.flush()
+
+    db = SessionLocal()
+    try:
+        session = db.query(SessionModel).filter(SessionModel.user_id == USER_ID).one()
+        view = queue.view(USER_ID)
+        # The sweeper closes the row after the end was queued but before the
+        # batch is applied.
+        queue.end_session(view, session, now, 90, 7, "Happy")
+        _, closed, _ = close_stale_sessions(db, 60, now, 10)
+        assert [row["id"] for row in closed] == [session.id]
+
+        queue.flush()
+        assert queue.lost_ends == 1
+        assert queue.stats()["lost_ends"] == 1
+
+        db.expire_all()
+        row = db.get(SessionModel, session.id)
+        assert (row.duration_minutes, row.reels_watched, row.mood) == (60, None, None)
+        summary = (
+            db.query(DailySummary)
+            .filter(DailySummary.user_id == USER_ID, DailySummary.summary_date == started.date())
+            .one()
+        )
+        assert (summary.total_sessions, summary.total_minutes, summary.total_reels) == (1, 60, 0)
+    finally:
+        db.close()
+        queue.stop()
@@ -0,0 +1,8 @@
+def test_monotonic_stats_are_counters(client):
+    client.get("/summary/daily", headers={"X-User-Id": "4301"})
+    body = client.get("/metrics").text
+    assert "# TYPE summary_cache_misses_total counter" in body
+    assert "# TYPE summary_cache_hits_total counter" in body
+    assert "# TYPE rate_limit_read_allowed_total counter" in body
+    assert "# TYPE summary_cache_entries gauge" in body
+    assert "summary_cache_hits gauge" not in body
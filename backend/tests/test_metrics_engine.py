@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.metrics import _current, RequestMetrics, instrument_engine
+
+
+def test_failed_statement_leaves_no_timing_state():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = RequestMetrics()
+    token = _current.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            assert "query_started" not in conn.info
+    finally:
+        _current.reset(token)
+    assert stats.db_queries == 1
+    assert 0 <= stats.db_seconds < 1
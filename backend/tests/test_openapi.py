@@ -0,0 +1,6 @@
+def test_openapi_schema_builds(client):
+    response = client.get("/openapi.json")
+    assert response.status_code == 200
+    schemas = response.json()["components"]["schemas"]
+    assert "DashboardResponse" in schemas
+    assert "DailySummaryResponse" in schemas
@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.ratelimit import BucketPolicy, RateLimiter, RateLimitMiddleware
+
+
+def _limited_client(burst: int) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping() -> dict:
+        return {"ok": True}
+
+    limiter = RateLimiter(
+        read=BucketPolicy(per_second=0.001, burst=burst),
+        write=BucketPolicy(per_second=0.001, burst=burst),
+        max_clients=100,
+    )
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app)
+
+
+def test_rotating_user_header_does_not_reset_the_bucket():
+    client = _limited_client(burst=2)
+    statuses = [
+        client.get("/ping", headers={"X-User-Id": str(user)}).status_code
+        for user in (1, 2, 3)
+    ]
+    assert statuses == [200, 200, 429]
@@ -0,0 +1,75 @@
+import json
+from datetime import date
+
+from app.db.session import SessionLocal
+from app.services.archive import session_archive
+
+# A user of its own, so other tests' sessions do not show up.
+HEADERS = {"X-User-Id": "4201"}
+
+
+def _import(client, *sessions):
+    body = "\n".join(
+        json.dumps({"start_time": start, "end_time": end, "reels_watched": 3})
+        for start, end in sessions
+    )
+    response = client.post("/sessions/import", content=body, headers=HEADERS)
+    assert response.status_code == 200, response.text
+
+
+def test_list_sessions_skips_archived_months(client):
+    _import(
+        client,
+        ("2020-01-10T08:00:00+00:00", "2020-01-10T08:20:00+00:00"),
+        ("2020-02-03T09:00:00+00:00", "2020-02-03T09:15:00+00:00"),
+    )
+    db = SessionLocal()
+    try:
+        session_archive.archive(db, cutoff=date(2020, 2, 1))
+    finally:
+        db.close()
+
+    archived = client.get("/sessions", params={"month": "2020-01"}, headers=HEADERS).json()
+    assert archived["sessions"] == []
+    assert archived["archived_before"] == "2020-02-01"
+
+    live = client.get("/sessions", params={"month": "2020-02"}, headers=HEADERS).json()
+    assert [s["date"] for s in live["sessions"]] == ["2020-02-03"]
+
+    streamed = client.get(
+        "/sessions", params={"month": "2020-01", "stream": "true"}, headers=HEADERS
+    )
+    assert streamed.headers["X-Archived-Before"] == "2020-02-01"
+    assert streamed.text == ""
+
+    # The archived session is still part of the full history.
+    exported = client.get("/sessions/export", headers=HEADERS).text.splitlines()
+    assert [json.loads(line)["date"] for line in exported] == ["2020-01-10", "2020-02-03"]
+
+
+def test_archived_session_ids_are_not_reused(client):
+    headers = {"X-User-Id": "4202"}
+    body = "\n".join(
+        json.dumps({"start_time": start, "end_time": end})
+        for start, end in (
+            ("2019-06-05T08:00:00+00:00", "2019-06-05T08:10:00+00:00"),
+            ("2019-06-06T08:00:00+00:00", "2019-06-06T08:10:00+00:00"),
+        )
+    )
+    assert client.post("/sessions/import", content=body, headers=headers).status_code == 200
+    db = SessionLocal()
+    try:
+        session_archive.archive(db, cutoff=date(2019, 7, 1))
+    finally:
+        db.close()
+    archived_ids = [
+        json.loads(line)["id"]
+        for line in client.get("/sessions/export", headers=headers).text.splitlines()
+    ]
+
+    started = client.post("/session/start", json={}, headers=headers).json()
+    assert started["id"] > max(archived_ids)
+    client.post("/session/end", json={"session_id": started["id"]}, headers=headers)
+
+    exported = client.get("/sessions/export", headers=headers).text.splitlines()
+    assert [json.loads(line)["id"] for line in exported] == archived_ids + [started["id"]]
@@ -0,0 +1,115 @@
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.ratelimit import rate_limiter
+from app.db.session import SessionLocal
+from app.models.daily_summary import DailySummary
+from app.models.session import Session as SessionModel
+from app.services.summaries import date_keys, record_session_totals
+
+USER_ID = 4501
+# A day nobody has a summary for: every end races to create its row.
+DAY = date(2032, 3, 3)
+ENDERS = 16
+WRITERS = 8
+PER_WRITER = 25
+
+
+def test_concurrent_ends_on_a_new_day_are_all_counted(client, monkeypatch):
+    # One client address ends every session; the limiter is not under test.
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    start = datetime.now(timezone.utc) - timedelta(minutes=30)
+    db = SessionLocal()
+    try:
+        sessions = [
+            SessionModel(user_id=USER_ID, start_time=start, date=DAY, **date_keys(DAY))
+            for _ in range(ENDERS)
+        ]
+        db.add_all(sessions)
+        db.commit()
+        ids = [s.id for s in sessions]
+    finally:
+        db.close()
+
+    barrier = threading.Barrier(ENDERS)
+    responses = {}
+    errors = []
+
+    def end(session_id: int, reels: int) -> None:
+        barrier.wait()
+        try:
+            responses[session_id] = client.post(
+                "/session/end",
+                json={"session_id": session_id, "reels_watched": reels},
+                headers={"X-User-Id": str(USER_ID)},
+            )
+        except Exception as exc:  # IntegrityError etc. re-raised by the test client
+            errors.append(exc)
+
+    threads = [threading.Thread(target=end, args=(i, n)) for n, i in enumerate(ids, start=1)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert {r.status_code for r in responses.values()} == {200}
+
+    db = SessionLocal()
+    try:
+        ended = db.query(SessionModel).filter(SessionModel.id.in_(ids)).all()
+        summary = (
+            db.query(DailySummary)
+            .filter(DailySummary.user_id == USER_ID, DailySummary.summary_date == DAY)
+            .one()
+        )
+    finally:
+        db.close()
+    assert all(s.end_time is not None for s in ended)
+    assert summary.total_sessions == ENDERS
+    assert summary.total_reels == sum(s.reels_watched for s in ended)
+    assert summary.total_minutes == sum(s.duration_minutes for s in ended)
+
+
+def test_concurrent_upserts_on_a_new_day_lose_nothing():
+    # On SQLite `end_session` takes the write lock with its claim UPDATE
+    # before the upsert, so race the upsert itself too.
+    user_id, day = USER_ID + 1, DAY + timedelta(days=1)
+    barrier = threading.Barrier(WRITERS)
+    errors = []
+
+    def write() -> None:
+        barrier.wait()
+        for _ in range(PER_WRITER):
+            db = SessionLocal()
+            try:
+                record_session_totals(db, user_id, day, reels_delta=2, minutes_delta=3)
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                errors.append(exc)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    db = SessionLocal()
+    try:
+        summary = (
+            db.query(DailySummary)
+            .filter(DailySummary.user_id == user_id, DailySummary.summary_date == day)
+            .one()
+        )
+    finally:
+        db.close()
+    ops = WRITERS * PER_WRITER
+    assert (summary.total_sessions, summary.total_reels, summary.total_minutes) == (
+        ops,
+        2 * ops,
+        3 * ops,
+    )
@@ -1,11 +1,17 @@
-import React from "react";
+import React, { useEffect } from "react";
 import { Routes, Route, NavLink, useLocation } from "react-router-dom";
 import TrackerPage from "./pages/TrackerPage";
 import DashboardPage from "./pages/DashboardPage";
+import { syncTimezone } from "./api/client";
 
 function App() {
   const location = useLocation();
 
+  useEffect(() => {
+    // Best effort: without it the backend falls back to the sent offset / UTC.
+    syncTimezone().catch(() => {});
+  }, []);
+
   return (
     <div className="app">
       <header className="topbar">
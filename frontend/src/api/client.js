@@ -4,13 +4,30 @@ import axios from "axios";
 const BASE_URL =
   import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
+// Optional user id; the backend scopes all data by the X-User-Id header
+// and falls back to its default user when it is absent.
+const USER_ID = import.meta.env.VITE_USER_ID;
+
 export const api = axios.create({
   baseURL: BASE_URL,
   headers: {
-    "Content-Type": "application/json"
+    "Content-Type": "application/json",
+    ...(USER_ID ? { "X-User-Id": USER_ID } : {})
   }
 });
 
+// Store the browser's IANA time zone on the backend once, so "today",
+// default summary ranges and streaks follow the user's local day (and DST).
+// Only writes when it changed, since a change resets the summary cache.
+export async function syncTimezone() {
+  const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+  if (!timezone) return;
+  const res = await api.get("/user/timezone");
+  if (res.data.timezone !== timezone) {
+    await api.put("/user/timezone", { timezone });
+  }
+}
+
 // Session-related API calls
 export async function startSession() {
   // Send timezone offset so backend can compute the correct local date.
@@ -56,3 +73,23 @@ export async function getStreaks() {
   return res.data;
 }
 
+// Daily, weekly, monthly and streaks in one request (what the dashboard loads).
+export async function getDashboard() {
+  const res = await api.get("/summary/dashboard");
+  return res.data;
+}
+
+
+// Live updates pushed by the backend (GET /events, server-sent events).
+// EventSource cannot send headers, so the user id goes in the query string.
+// `onEvent` receives every parsed event; a `ready` event arrives on each
+// (re)connect. Consumers load their data on mount, skip the first `ready` and
+// reload on every later one (events sent while disconnected are lost).
+// Returns a function that closes the stream.
+export function subscribeEvents(onEvent) {
+  const url = new URL("/events", BASE_URL);
+  if (USER_ID) url.searchParams.set("user_id", USER_ID);
+  const source = new EventSource(url);
+  source.onmessage = (message) => onEvent(JSON.parse(message.data));
+  return () => source.close();
+}
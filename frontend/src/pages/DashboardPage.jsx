@@ -1,10 +1,5 @@
-import React, { useEffect, useMemo, useState } from "react";
-import {
-  getDailySummaries,
-  getWeeklySummaries,
-  getMonthlySummaries,
-  getStreaks
-} from "../api/client";
+import React, { useEffect, useMemo, useRef, useState } from "react";
+import { getDashboard, subscribeEvents } from "../api/client";
 import StatsCard from "../components/StatsCard";
 import {
   LineChart,
@@ -18,32 +13,77 @@ import {
   ResponsiveContainer
 } from "recharts";
 
+// Replace the item matching `row` by `sameKey`, or insert it, keeping the
+// list ordered by `sortKey`. Used to apply pushed summary rows.
+function upsertItem(items, row, sameKey, sortKey) {
+  if (!row) return items;
+  const rest = items.filter((item) => !sameKey(item, row));
+  return [...rest, row].sort((a, b) => sortKey(a) - sortKey(b));
+}
+
+const sameDay = (a, b) => a.date === b.date;
+const sameWeek = (a, b) => a.year === b.year && a.week === b.week;
+const sameMonth = (a, b) => a.year === b.year && a.month === b.month;
+const byDate = (item) => Date.parse(item.date || item.start_date);
+
 function DashboardPage() {
   const [daily, setDaily] = useState([]);
   const [weekly, setWeekly] = useState([]);
   const [monthly, setMonthly] = useState([]);
   const [streaks, setStreaks] = useState({ current_streak: 0, longest_streak: 0 });
   const [loading, setLoading] = useState(false);
+  // Pushed events received while a full reload is in flight; replayed on
+  // top of the reloaded data (rows are absolute, so replaying is safe).
+  const pendingRef = useRef(null);
 
   useEffect(() => {
+    function applyChange(event) {
+      // Daily items only cover the last 30 days; older rows stay off the chart.
+      setDaily((items) =>
+        items.length && event.daily && event.daily.date < items[0].date
+          ? items
+          : upsertItem(items, event.daily, sameDay, byDate)
+      );
+      setWeekly((items) => upsertItem(items, event.weekly, sameWeek, byDate));
+      setMonthly((items) => upsertItem(items, event.monthly, sameMonth, byDate));
+      if (event.streaks) setStreaks(event.streaks);
+    }
+
     async function fetchAll() {
+      pendingRef.current = pendingRef.current || [];
       setLoading(true);
       try {
-        const [d, w, m, s] = await Promise.all([
-          getDailySummaries(),
-          getWeeklySummaries(),
-          getMonthlySummaries(),
-          getStreaks()
-        ]);
-        setDaily(d.items || []);
-        setWeekly(w.items || []);
-        setMonthly(m.items || []);
-        setStreaks(s);
+        const data = await getDashboard();
+        setDaily(data.daily || []);
+        setWeekly(data.weekly || []);
+        setMonthly(data.monthly || []);
+        setStreaks(data.streaks);
       } finally {
+        const pending = pendingRef.current || [];
+        pendingRef.current = null;
+        pending.forEach(applyChange);
         setLoading(false);
       }
     }
-    fetchAll();
+
+    // Load on mount, so the page fills even if the event stream is blocked or
+    // slow; then keep the charts current from pushed summary rows instead of
+    // re-fetching every endpoint. Every reconnect reloads once, since events
+    // sent while disconnected are lost; the first `ready` is covered by the
+    // mount load (still in flight or done) and is skipped.
+    let connected = false;
+    fetchAll().catch(() => {});
+    return subscribeEvents((event) => {
+      if (event.type === "summary.changed") {
+        if (pendingRef.current) pendingRef.current.push(event);
+        else applyChange(event);
+      } else if (event.type === "ready") {
+        if (connected) fetchAll().catch(() => {});
+        connected = true;
+      } else if (["summary.reset", "resync"].includes(event.type)) {
+        fetchAll().catch(() => {});
+      }
+    });
   }, []);
 
   const today = useMemo(() => {
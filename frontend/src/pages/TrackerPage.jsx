@@ -2,7 +2,8 @@ import React, { useEffect, useMemo, useState } from "react";
 import {
   startSession,
   endSession,
-  getActiveSession
+  getActiveSession,
+  subscribeEvents
 } from "../api/client";
 import ReelsInputModal from "../components/ReelsInputModal";
 
@@ -30,10 +31,30 @@ function TrackerPage() {
   );
 
   useEffect(() => {
-    // On load, check if a backend session is already active.
-    getActiveSession()
-      .then((data) => setActiveSession(data))
-      .catch(() => {});
+    // On load, and again on every event-stream reconnect, check if a
+    // backend session is already active; in between, follow it live (e.g.
+    // started or ended in another tab). The first `ready` only confirms the
+    // connection: the mount load already covers it.
+    let connected = false;
+    function loadActive() {
+      getActiveSession()
+        .then((data) => setActiveSession(data))
+        .catch(() => {});
+    }
+
+    loadActive();
+    return subscribeEvents((event) => {
+      if (event.type === "ready") {
+        if (connected) loadActive();
+        connected = true;
+      } else if (event.type === "session.started") {
+        setActiveSession(event.session);
+      } else if (event.type === "session.ended") {
+        setActiveSession((current) =>
+          current && current.id === event.session.id ? null : current
+        );
+      }
+    });
   }, []);
 
   async function handleStart() {